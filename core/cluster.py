@@ -0,0 +1,186 @@
+"""
+Multi-Worker Web Mode
+Runs N independent NiceGUI server processes (one event loop / core each) behind
+a small sticky reverse proxy on the public port:
+
+    browser --> proxy :8080 --> worker 0 :8081
+                            --> worker 1 :8082 ...
+
+- Sticky sessions: a NiceGUI page and its websocket must hit the same process.
+  The proxy pins every browser to a worker with a cookie (set on the first
+  response); new browsers go to the worker with the fewest open connections.
+- Connections are piped byte for byte after the first request head, so
+  websocket upgrades and streaming responses pass through untouched.
+- Workers share ~/.yat: SQLite files run in WAL mode (core/sqlite_utils.py),
+  provider rate limits live in SQLite (storage/rate_limiter.py), so do the running
+  streams of every worker (storage/stream_activity.py, read by the database
+  maintenance in worker 0); memory-mapped vector indexes are per worker
+  (core/paths.get_worker_data_path).
+- A worker that exits is restarted; its browsers are re-pinned on their next request.
+
+Usage:
+    python main.py --web --workers 4 [--port 8080]
+"""
+import asyncio
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import webbrowser
+from typing import List, Optional
+
+WORKER_COOKIE = "yat_worker"
+MAX_HEAD_BYTES = 64 * 1024
+PIPE_CHUNK = 64 * 1024
+STARTUP_TIMEOUT = 60.0
+HEALTH_INTERVAL = 1.0
+
+_COOKIE_RE = re.compile(rb"^cookie:.*?\b" + WORKER_COOKIE.encode() + rb"=(\d+)", re.IGNORECASE | re.MULTILINE)
+
+
+class Worker:
+    def __init__(self, index: int, port: int, command: List[str]):
+        self.index = index
+        self.port = port
+        self.command = command
+        self.process: Optional[subprocess.Popen] = None
+        self.connections = 0
+        self.restarts = 0
+
+    def start(self):
+        env = {**os.environ, "YAT_WORKER_ID": str(self.index)}
+        self.process = subprocess.Popen(self.command + ["--worker", "--port", str(self.port)], env=env)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        if self.alive:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class StickyProxy:
+    def __init__(self, workers: List[Worker], host: str = "127.0.0.1"):
+        self.workers = workers
+        self.host = host
+
+    def _pick(self, head: bytes) -> tuple:
+        """(worker, pinned) - the cookie's worker if it is alive, else the least busy one"""
+        match = _COOKIE_RE.search(head)
+        if match:
+            index = int(match.group(1))
+            if 0 <= index < len(self.workers) and self.workers[index].alive:
+                return self.workers[index], True
+        candidates = [w for w in self.workers if w.alive] or self.workers
+        return min(candidates, key=lambda w: w.connections), False
+
+    async def handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        worker = None
+        try:
+            try:
+                head = await client_reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            worker, pinned = self._pick(head)
+            worker.connections += 1
+            try:
+                backend_reader, backend_writer = await asyncio.open_connection(self.host, worker.port)
+            except OSError:
+                client_writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await client_writer.drain()
+                return
+
+            backend_writer.write(head)
+            await backend_writer.drain()
+            cookie = None if pinned else f"{WORKER_COOKIE}={worker.index}; Path=/; HttpOnly; SameSite=Lax"
+            await asyncio.gather(
+                self._pipe(client_reader, backend_writer),
+                self._pipe(backend_reader, client_writer, set_cookie=cookie),
+            )
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            if worker is not None:
+                worker.connections -= 1
+            client_writer.close()
+
+    @staticmethod
+    async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, set_cookie: Optional[str] = None):
+        try:
+            if set_cookie:
+                # Pin the browser: add the cookie to the first response head
+                head = await reader.readuntil(b"\r\n\r\n")
+                writer.write(head[:-2] + f"Set-Cookie: {set_cookie}\r\n\r\n".encode())
+            while True:
+                data = await reader.read(PIPE_CHUNK)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+
+def wait_for_port(port: int, timeout: float) -> bool:
+    import socket
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+async def _supervise(workers: List[Worker], proxy: StickyProxy, port: int, host: str):
+    server = await asyncio.start_server(proxy.handle, host, port, limit=MAX_HEAD_BYTES)
+    print(f"[OK] Proxy listening on http://{host}:{port} -> {len(workers)} worker(s)")
+    async with server:
+        while True:
+            await asyncio.sleep(HEALTH_INTERVAL)
+            for worker in workers:
+                if not worker.alive:
+                    worker.restarts += 1
+                    print(f"[WARN] Worker {worker.index} exited (code {worker.process.returncode}) - restarting")
+                    worker.start()
+
+
+def run_cluster(workers: int, port: int = 8080, host: str = "127.0.0.1", show: bool = True, script: Optional[str] = None):
+    """Start `workers` server processes on port+1.. and the sticky proxy on `port` (blocks)"""
+    command = [sys.executable] if getattr(sys, "frozen", False) else [sys.executable, script or sys.argv[0]]
+    command += ["--web"]
+    pool = [Worker(i, port + 1 + i, command) for i in range(workers)]
+
+    def on_terminate(signum, frame):
+        raise KeyboardInterrupt  # Stop the workers too (finally below), not just the proxy
+    signal.signal(signal.SIGTERM, on_terminate)
+
+    print(f"[*] Starting {workers} worker(s) on ports {port + 1}-{port + workers}...")
+    for worker in pool:
+        worker.start()
+    try:
+        for worker in pool:
+            if not wait_for_port(worker.port, STARTUP_TIMEOUT):
+                print(f"[ERR] Worker {worker.index} did not start within {STARTUP_TIMEOUT:.0f}s")
+        if show:
+            webbrowser.open(f"http://{host}:{port}")
+        asyncio.run(_supervise(pool, StickyProxy(pool), port, host))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("[*] Stopping workers...")
+        for worker in pool:
+            worker.stop()
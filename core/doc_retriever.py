@@ -0,0 +1,260 @@
+"""
+Document Retriever (RAG)
+Grounds answers in local documents: markdown files are chunked along their
+headings, embedded in batches and stored in a memory-mapped vector index.
+For each chat request the top-k chunks for the user's question are injected
+as a system message (see LLMManager.stream_chat).
+
+- Files are read line by line (never fully loaded) and cut into ~CHUNK_CHARS pieces,
+  each tagged with its heading path so a chunk makes sense on its own.
+- A manifest (path, mtime, size) makes re-indexing incremental: only new/changed
+  files are re-chunked, deleted files are dropped. Checked at most every few seconds,
+  in a background task - requests are answered from the current index meanwhile.
+
+Storage (~/.yat): rag_index.db (manifest + chunk texts), rag_index.vec/.ids/.json (vectors)
+
+Settings (user_settings.json, all optional):
+    rag_enabled      bool    Inject doc excerpts into chat requests (default: off)
+    rag_paths        list    Extra folders with *.md / *.txt files (docs/ is always included)
+    rag_embedder     str     "local" or "provider_id|model_id" (default: local)
+    rag_top_k        int     Chunks per request (default: 4)
+    rag_min_score    float   Minimum similarity of a chunk (default: 0.15)
+"""
+import asyncio
+import itertools
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from core.embeddings import Embedder
+from core.paths import get_worker_data_path, resolve_resource_path
+from core.sqlite_utils import connect
+from core.providers.types import Message, Role
+from core.vector_index import VectorIndex
+
+CHUNK_CHARS = 1200
+EMBED_BATCH = 32
+REFRESH_INTERVAL = 5.0   # Seconds between mtime checks
+DEFAULT_TOP_K = 4
+DEFAULT_MIN_SCORE = 0.15
+FILE_PATTERNS = ("*.md", "*.txt")
+
+CONTEXT_HEADER = (
+    "The following excerpts from the local documentation may help to answer the user's question. "
+    "Use them if relevant, cite the source in brackets, and ignore them otherwise."
+)
+
+
+def iter_chunks(path: str, max_chars: int = CHUNK_CHARS) -> Iterator[Dict]:
+    """Stream a markdown/text file into chunks: split at headings and at max_chars"""
+    headings: List[str] = []
+    lines: List[str] = []
+    size, start_line, in_code = 0, 1, False
+
+    def emit():
+        text = "\n".join(lines).strip()
+        if text:
+            yield {"heading": " > ".join(headings), "start_line": start_line, "content": text}
+
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.rstrip("\n")
+            if line.lstrip().startswith("```"):
+                in_code = not in_code
+            is_heading = not in_code and line.startswith("#")
+
+            if (is_heading or size + len(line) > max_chars) and lines:
+                yield from emit()
+                lines, size, start_line = [], 0, number
+
+            if is_heading:
+                level = len(line) - len(line.lstrip("#"))
+                headings = headings[:level - 1] + [line.lstrip("#").strip()]
+            lines.append(line)
+            size += len(line) + 1
+    yield from emit()
+
+
+class DocumentRetriever:
+    def __init__(self, embedder: Embedder, paths: Optional[List[str]] = None, top_k: int = DEFAULT_TOP_K,
+                 min_score: float = DEFAULT_MIN_SCORE, db_path: Optional[str] = None, index_path: Optional[str] = None):
+        self.embedder = embedder
+        self.top_k = top_k
+        self.min_score = min_score
+        self.paths = [resolve_resource_path("docs")] + list(paths or [])
+        self.db_path = db_path or get_worker_data_path("rag_index.db")
+        self.index = VectorIndex(index_path or get_worker_data_path("rag_index"), name=embedder.name, dtype="float16")
+        self._lock = asyncio.Lock()
+        self._last_refresh = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.init_database()
+
+    def init_database(self):
+        conn = connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime REAL,
+                size INTEGER,
+                embedder TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT,
+                heading TEXT,
+                start_line INTEGER,
+                content TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_path ON chunks(path)")
+
+        # Vectors from another embedder are gone (index was reset) -> re-embed everything
+        if len(self.index) == 0:
+            conn.execute("DELETE FROM files")
+            conn.execute("DELETE FROM chunks")
+        conn.commit()
+        conn.close()
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        found = {}
+        for folder in self.paths:
+            base = Path(folder)
+            if not base.is_dir():
+                continue
+            for pattern in FILE_PATTERNS:
+                for file_path in base.rglob(pattern):
+                    found[str(file_path.resolve())] = file_path.stat()
+        return found
+
+    # --- Indexing --------------------------------------------------------------
+
+    async def refresh(self, force: bool = False) -> Dict:
+        """Re-index new/changed files, drop deleted ones. Cheap when nothing changed."""
+        if not force and time.monotonic() - self._last_refresh < REFRESH_INTERVAL:
+            return {}
+        async with self._lock:
+            self._last_refresh = time.monotonic()
+            started = time.perf_counter()
+            files = await asyncio.to_thread(self._scan)
+
+            conn = connect(self.db_path)
+            known = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT path, mtime, size FROM files")}
+            changed = [p for p, st in files.items() if known.get(p) != (st.st_mtime, st.st_size)]
+            removed = [p for p in known if p not in files]
+
+            for path in removed + changed:
+                ids = [row[0] for row in conn.execute("SELECT id FROM chunks WHERE path = ?", (path,))]
+                self.index.remove(ids)
+                conn.execute("DELETE FROM chunks WHERE path = ?", (path,))
+                conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            conn.commit()
+
+            added = 0
+            for path in changed:
+                try:
+                    added += await self._index_file(conn, path, files[path])
+                except Exception as e:
+                    print(f"[RAG] Skipped {path}: {e}")
+            conn.commit()
+            conn.close()
+            self.index.flush()
+
+            stats = {"changed": len(changed), "removed": len(removed), "chunks_added": added,
+                     "ms": round((time.perf_counter() - started) * 1000, 1)}
+            if changed or removed:
+                print(f"[RAG] Re-indexed {len(changed)} file(s), removed {len(removed)}: "
+                      f"+{added} chunks in {stats['ms']:.0f} ms ({len(self.index)} total)")
+            return stats
+
+    def schedule_refresh(self, force: bool = False):
+        """Start refresh() in the background unless one is running or the last check is recent"""
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if not force and time.monotonic() - self._last_refresh < REFRESH_INTERVAL:
+            return
+
+        async def run():
+            try:
+                await self.refresh(force=True)
+            except Exception as e:
+                print(f"[WARN] RAG refresh failed: {e}")
+        self._refresh_task = asyncio.create_task(run())
+
+    async def _index_file(self, conn: sqlite3.Connection, path: str, stat: os.stat_result) -> int:
+        count = 0
+        chunks = iter_chunks(path)
+        while True:
+            # Read the next batch off the event loop (large files, slow disks)
+            batch = await asyncio.to_thread(lambda: list(itertools.islice(chunks, EMBED_BATCH)))
+            if not batch:
+                break
+            vectors = await self.embedder.embed([f"{c['heading']}\n{c['content']}" for c in batch])
+            ids = []
+            for chunk in batch:
+                cursor = conn.execute("""
+                    INSERT INTO chunks (path, heading, start_line, content)
+                    VALUES (?, ?, ?, ?)
+                """, (path, chunk["heading"], chunk["start_line"], chunk["content"]))
+                ids.append(cursor.lastrowid)
+            self.index.add(ids, vectors)
+            count += len(batch)
+
+        conn.execute("""
+            INSERT OR REPLACE INTO files (path, mtime, size, embedder)
+            VALUES (?, ?, ?, ?)
+        """, (path, stat.st_mtime, stat.st_size, self.embedder.name))
+        conn.commit()  # One transaction per file - retrieve() sees finished files right away
+        return count
+
+    # --- Retrieval -------------------------------------------------------------
+
+    async def retrieve(self, query: str, k: Optional[int] = None, min_score: Optional[float] = None) -> List[Dict]:
+        """Top-k chunks for `query`, best first (from the current index, changes are picked up in the background)"""
+        k = k or self.top_k
+        min_score = self.min_score if min_score is None else min_score
+        self.schedule_refresh()
+        if not query.strip() or len(self.index) == 0:
+            return []
+        vector = (await self.embedder.embed([query]))[0]
+        hits = self.index.search(vector, k=k, threshold=min_score)
+        if not hits:
+            return []
+
+        conn = connect(self.db_path)
+        placeholders = ",".join("?" * len(hits))
+        rows = {row[0]: row for row in conn.execute(f"""
+            SELECT id, path, heading, start_line, content
+            FROM chunks WHERE id IN ({placeholders})
+        """, [chunk_id for chunk_id, _ in hits])}
+        conn.close()
+
+        return [{
+            "source": f"{os.path.basename(rows[chunk_id][1])}:{rows[chunk_id][3]}",
+            "heading": rows[chunk_id][2],
+            "content": rows[chunk_id][4],
+            "score": round(score, 4),
+        } for chunk_id, score in hits if chunk_id in rows]
+
+    @staticmethod
+    def build_context_message(chunks: List[Dict]) -> Message:
+        parts = [CONTEXT_HEADER]
+        for chunk in chunks:
+            title = f" - {chunk['heading']}" if chunk["heading"] else ""
+            parts.append(f"[{chunk['source']}{title}]\n{chunk['content']}")
+        return Message(role=Role.SYSTEM, content="\n\n".join(parts), metadata={"retrieval": True})
+
+    def get_stats(self) -> Dict:
+        conn = connect(self.db_path)
+        files = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        text_bytes = conn.execute("SELECT COALESCE(SUM(LENGTH(content)), 0) FROM chunks").fetchone()[0]
+        conn.close()
+        return {
+            "files": files,
+            "chunks": len(self.index),
+            "index_bytes": self.index.nbytes,
+            "text_bytes": text_bytes,
+            "embedder": self.embedder.name,
+        }
@@ -1,10 +1,43 @@
 
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from bisect import bisect_left, bisect_right
+import math
 import re
 
 import sys
 import os
+import threading
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+PHRASE_RE = re.compile(r'"([^"]+)"')
+
+# BM25 parameters (common defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 3.0          # Extra weight for query terms that appear in the title
+MAX_PREFIX_EXPANSIONS = 50  # Limit for "pro" -> provider, providers, prompt, ...
+MAX_SNIPPETS = 3
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+_shared_manager: Optional["DocsManager"] = None
+_shared_lock = threading.Lock()
+
+
+def get_docs_manager() -> "DocsManager":
+    """Process-wide DocsManager: built on first use, re-checked (mtime) on every call"""
+    global _shared_manager
+    with _shared_lock:
+        if _shared_manager is None:
+            _shared_manager = DocsManager()
+        else:
+            _shared_manager.refresh()
+        return _shared_manager
+
 
 class DocsManager:
     def __init__(self, docs_path: str = "docs"):
@@ -13,40 +46,108 @@ class DocsManager:
             base_dir = Path(sys._MEIPASS)
         except AttributeError:
             base_dir = Path(__file__).parent.parent
-            
+
         self.docs_dir = base_dir / docs_path
         self.documents: List[Dict] = []
+        self._signature: Dict[str, Tuple[float, int]] = {}  # filename -> (mtime, size) at load
+        self._html: Dict[str, str] = {}  # Rendered HTML per filename (lazy)
+
+        # Inverted index: token -> {doc index -> [token positions]}
+        self._postings: Dict[str, Dict[int, List[int]]] = {}
+        self._vocabulary: List[str] = []        # Sorted tokens (prefix search via bisect)
+        self._doc_lengths: List[int] = []       # Tokens per document
+        self._avg_doc_length = 0.0
+        self._token_lines: List[List[int]] = [] # doc -> line number of every token position
+        self._line_offsets: List[List[int]] = [] # doc -> char offset of every line start (snippets)
+        self._title_tokens: List[set] = []
+
+        self._load_docs()
+
+    def _scan(self) -> Dict[str, Tuple[float, int]]:
+        if not self.docs_dir.exists():
+            return {}
+        signature = {}
+        for file_path in self.docs_dir.glob("*.md"):
+            stat = file_path.stat()
+            signature[file_path.name] = (stat.st_mtime, stat.st_size)
+        return signature
+
+    def refresh(self) -> bool:
+        """Reload if a doc was added, changed or removed. Returns True if something changed."""
+        if self._scan() == self._signature:
+            return False
         self._load_docs()
+        return True
 
     def _load_docs(self):
-        """Load all markdown files from docs directory"""
+        """Load all markdown files from docs directory (unchanged files are reused)"""
+        previous = {d["filename"]: d for d in self.documents}
         self.documents = []
+        signature = self._scan()
+        files = []
         if not self.docs_dir.exists():
+            # No early return: the (empty) index and the signature must match self.documents
             print(f"Warning: Docs directory '{self.docs_dir}' not found.")
-            return
+        else:
+            # Sort files: Quick Start first, then numbered, then others
+            files = sorted(list(self.docs_dir.glob("*.md")))
 
-        # Sort files: Quick Start first, then numbered, then others
-        files = sorted(list(self.docs_dir.glob("*.md")))
-        
         for file_path in files:
+            name = file_path.name
+            if name in previous and self._signature.get(name) == signature.get(name):
+                self.documents.append(previous[name])
+                continue
+            self._html.pop(name, None)
             try:
                 with open(file_path, "r", encoding="utf-8") as f:
                     content = f.read()
-                    
+
                     # Extract title from first H1
                     title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
                     title = title_match.group(1) if title_match else file_path.stem.replace('-', ' ').title()
-                    
+
+                    # Only one copy of the text: snippets are sliced via line offsets
                     self.documents.append({
-                        "filename": file_path.name,
+                        "filename": name,
                         "title": title,
                         "content": content,
-                        "path": str(file_path),
-                        "lines": content.splitlines()
+                        "path": str(file_path)
                     })
             except Exception as e:
                 print(f"Error reading {file_path}: {e}")
 
+        for name in set(self._html) - set(signature):
+            del self._html[name]
+        self._signature = signature
+        self._build_index()
+
+    def _build_index(self):
+        """Build the inverted index once; searches only touch the postings of the query terms"""
+        self._postings = {}
+        self._doc_lengths = []
+        self._token_lines = []
+        self._line_offsets = []
+        self._title_tokens = []
+
+        for doc_idx, doc in enumerate(self.documents):
+            position, offset = 0, 0
+            token_lines, line_offsets = [], []
+            for line_idx, line in enumerate(doc["content"].splitlines(keepends=True)):
+                line_offsets.append(offset)
+                offset += len(line)
+                for token in tokenize(line):
+                    self._postings.setdefault(token, {}).setdefault(doc_idx, []).append(position)
+                    token_lines.append(line_idx)
+                    position += 1
+            line_offsets.append(offset)
+            self._doc_lengths.append(position)
+            self._token_lines.append(token_lines)
+            self._line_offsets.append(line_offsets)
+            self._title_tokens.append(set(tokenize(doc["title"])))
+
+        self._vocabulary = sorted(self._postings)
+        self._avg_doc_length = (sum(self._doc_lengths) / len(self._doc_lengths)) if self._doc_lengths else 0.0
+
     def get_all_docs(self) -> List[Dict]:
         """Return list of all loaded documents (metadata only)"""
         return [{"filename": d["filename"], "title": d["title"]} for d in self.documents]
@@ -58,45 +159,134 @@ class DocsManager:
                 return doc["content"]
         return None
 
+    def get_doc_html(self, filename: str) -> Optional[str]:
+        """Rendered HTML of a document (cached until the file changes); None if markdown2 is unavailable"""
+        if filename in self._html:
+            return self._html[filename]
+        content = self.get_doc_content(filename)
+        if content is None:
+            return None
+        try:
+            import markdown2  # Ships with NiceGUI
+        except ImportError:
+            return None
+        html = markdown2.markdown(content, extras=["fenced-code-blocks", "tables", "header-ids"])
+        self._html[filename] = html
+        return html
+
+    # --- Search ----------------------------------------------------------------
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        """All indexed tokens starting with `prefix` (sorted vocabulary -> two bisects)"""
+        start = bisect_left(self._vocabulary, prefix)
+        end = bisect_right(self._vocabulary, prefix + "\uffff")
+        return self._vocabulary[start:min(end, start + MAX_PREFIX_EXPANSIONS)]
+
+    def _phrase_positions(self, terms: List[str]) -> Dict[int, List[int]]:
+        """doc -> start positions where `terms` occur consecutively"""
+        if not terms or any(t not in self._postings for t in terms):
+            return {}
+        result = {}
+        first = self._postings[terms[0]]
+        for doc_idx, positions in first.items():
+            following = [set(self._postings[t].get(doc_idx, ())) for t in terms[1:]]
+            starts = [p for p in positions if all((p + i + 1) in s for i, s in enumerate(following))]
+            if starts:
+                result[doc_idx] = starts
+        return result
+
+    def _snippet(self, doc_idx: int, line_idx: int) -> str:
+        offsets = self._line_offsets[doc_idx]
+        return self.documents[doc_idx]["content"][offsets[line_idx]:offsets[line_idx + 1]].strip()
+
+    def _bm25(self, tf: int, df: int, doc_idx: int) -> float:
+        n = len(self.documents)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_idx] / (self._avg_doc_length or 1))
+        return idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+    def _parse_query(self, query: str) -> Tuple[List[List[str]], List[str], List[str]]:
+        """
+        -> (phrases, exact terms, prefixes). "quoted text" is a phrase, word* is a prefix,
+        and so is the last word while it is still being typed (no trailing space).
+        """
+        phrases = [tokens for tokens in (tokenize(p) for p in PHRASE_RE.findall(query)) if tokens]
+        rest = PHRASE_RE.sub(" ", query)
+        words = rest.split()
+        terms, prefixes = [], []
+        for i, word in enumerate(words):
+            tokens = tokenize(word)
+            if not tokens:
+                continue
+            typing = i == len(words) - 1 and not rest.endswith((" ", "\t"))
+            if word.endswith("*") or typing:
+                terms.extend(tokens[:-1])
+                prefixes.append(tokens[-1])
+            else:
+                terms.extend(tokens)
+        return phrases, terms, prefixes
+
     def search(self, query: str) -> List[Dict]:
-        """Search docs for query string"""
+        """BM25 search with "phrase" and prefix matching; cost depends on the query terms' postings only"""
         if not query or len(query.strip()) < 2:
             return []
 
-        results = []
-        query_lower = query.lower()
-        keywords = query_lower.split()
+        phrases, terms, prefixes = self._parse_query(query)
+        scores: Dict[int, float] = {}
+        hit_positions: Dict[int, List[int]] = {}
 
-        for doc in self.documents:
-            score = 0
-            matches = []
-            
-            # Title match
-            if query_lower in doc["title"].lower():
-                score += 10
-            
-            # Content match
-            for i, line in enumerate(doc["lines"]):
-                line_lower = line.lower()
-                found_keywords = [k for k in keywords if k in line_lower]
-                
-                if found_keywords:
-                    # Highlight logic (simple html bold)
-                    # We won't modify content here, just return the snippet
-                    matches.append({
-                        "line": i + 1,
-                        "content": line.strip()
-                    })
-                    score += len(found_keywords)
-            
-            if score > 0:
-                results.append({
-                    "filename": doc["filename"],
-                    "title": doc["title"],
-                    "score": score,
-                    "matches": matches[:3], # Top 3 snippets
-                    "match_count": len(matches)
-                })
+        def add(doc_idx: int, score: float, positions: List[int]):
+            scores[doc_idx] = scores.get(doc_idx, 0.0) + score
+            hit_positions.setdefault(doc_idx, []).extend(positions)
+
+        # Exact terms
+        for term in terms:
+            postings = self._postings.get(term, {})
+            for doc_idx, positions in postings.items():
+                add(doc_idx, self._bm25(len(positions), len(postings), doc_idx), positions)
+
+        # Prefixes: best expansion per document counts (typing "prov" shouldn't outweigh a full word)
+        for prefix in prefixes:
+            best: Dict[int, Tuple[float, List[int]]] = {}
+            for token in self._expand_prefix(prefix):
+                postings = self._postings[token]
+                for doc_idx, positions in postings.items():
+                    score = self._bm25(len(positions), len(postings), doc_idx)
+                    if score > best.get(doc_idx, (0.0, []))[0]:
+                        best[doc_idx] = (score, positions)
+            for doc_idx, (score, positions) in best.items():
+                add(doc_idx, score, positions)
+
+        # Phrases: every phrase must occur, each adds its own weight
+        if phrases:
+            phrase_matches = [self._phrase_positions(p) for p in phrases]
+            required = set.intersection(*(set(m) for m in phrase_matches))
+            for doc_idx in list(scores):
+                if doc_idx not in required:
+                    del scores[doc_idx]
+            for phrase, matches in zip(phrases, phrase_matches):
+                for doc_idx in required:
+                    add(doc_idx, self._bm25(len(matches[doc_idx]), len(matches), doc_idx) * len(phrase), matches[doc_idx])
+
+        # Title boost
+        query_tokens = set(terms) | {t for p in phrases for t in p}
+        for doc_idx in scores:
+            title_tokens = self._title_tokens[doc_idx]
+            hits = len(query_tokens & title_tokens)
+            hits += sum(1 for prefix in prefixes if any(t.startswith(prefix) for t in title_tokens))
+            scores[doc_idx] += TITLE_BOOST * hits
+
+        results = []
+        for doc_idx, score in scores.items():
+            doc = self.documents[doc_idx]
+            lines = sorted({self._token_lines[doc_idx][p] for p in hit_positions.get(doc_idx, [])})
+            results.append({
+                "filename": doc["filename"],
+                "title": doc["title"],
+                "score": round(score, 3),
+                "matches": [{"line": i + 1, "content": self._snippet(doc_idx, i)} for i in lines[:MAX_SNIPPETS]],
+                "match_count": len(lines)
+            })
 
         # Sort by score
         results.sort(key=lambda x: x["score"], reverse=True)
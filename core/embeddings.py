@@ -0,0 +1,124 @@
+"""
+Text Embeddings
+Turns texts into L2-normalized float32 vectors, either with a local model
+(feature hashing, no download, no network) or through a provider's embeddings API.
+
+Spec strings (user_settings.json):
+    "local"                                 HashingEmbedder (default)
+    "openai|text-embedding-3-small"         provider_id|model_id of an embedding-capable provider
+"""
+import asyncio
+import hashlib
+import re
+from abc import ABC, abstractmethod
+from typing import List, Optional
+import numpy as np
+from core.providers.base_provider import EmbeddingsNotSupportedError
+
+DEFAULT_LOCAL_DIM = 384
+EMBED_BATCH_SIZE = 64  # Texts per provider request
+LOCAL_THREAD_THRESHOLD = 32  # Larger local batches are hashed off the event loop
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row (zero rows stay zero) -> dot product == cosine similarity"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class Embedder(ABC):
+    """Base class: `name` identifies the vector space (indexes built with another name are rebuilt)"""
+    name: str = ""
+    dim: Optional[int] = None
+
+    @abstractmethod
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """One L2-normalized float32 row per text"""
+        pass
+
+
+class HashingEmbedder(Embedder):
+    """
+    Local embedder: signed feature hashing of words, word bigrams and character
+    trigrams with sublinear term frequency. Not a neural model, but robust for
+    near-duplicates (case, punctuation, small edits, word order) and free to run.
+    """
+
+    def __init__(self, dim: int = DEFAULT_LOCAL_DIM):
+        self.dim = dim
+        self.name = f"local-hash-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN_RE.findall(text.lower())
+        features = [f"w:{w}" for w in words]
+        features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            padded = f"<{w}>"
+            features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        return features
+
+    def embed_sync(self, texts: List[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                slot = value % self.dim
+                sign = 1.0 if (value >> 63) & 1 else -1.0
+                counts[slot] = counts.get(slot, 0.0) + sign
+            if counts:
+                slots = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+                values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+                matrix[row, slots] = np.sign(values) * np.log1p(np.abs(values))
+        return normalize_rows(matrix)
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        if len(texts) > LOCAL_THREAD_THRESHOLD:
+            return await asyncio.to_thread(self.embed_sync, texts)
+        return self.embed_sync(texts)
+
+
+class ProviderEmbedder(Embedder):
+    """Embeddings through a registered provider (OpenAI, Ollama, ...) in batches"""
+
+    def __init__(self, llm_manager, provider_id: str, model_id: str, batch_size: int = EMBED_BATCH_SIZE):
+        """Raises EmbeddingsNotSupportedError if the provider has no embeddings API"""
+        provider = llm_manager.providers.get(provider_id)
+        if provider is not None and not provider.supports_embeddings:
+            raise EmbeddingsNotSupportedError(f"Provider '{provider_id}' does not support embeddings")
+        self.llm_manager = llm_manager
+        self.provider_id = provider_id
+        self.model_id = model_id
+        self.batch_size = batch_size
+        self.name = f"{provider_id}|{model_id}"
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        provider = self.llm_manager.providers.get(self.provider_id)
+        if provider is None:
+            raise RuntimeError(f"Embedding provider '{self.provider_id}' is not available")
+
+        rows = []
+        for start in range(0, len(texts), self.batch_size):
+            rows.extend(await provider.embed(self.model_id, texts[start:start + self.batch_size]))
+        matrix = normalize_rows(np.array(rows, dtype=np.float32).reshape(len(texts), -1))
+        self.dim = matrix.shape[1]
+        return matrix
+
+
+def create_embedder(llm_manager, spec: Optional[str] = None) -> Embedder:
+    """Build an embedder from a spec string, falling back to the local one"""
+    if spec and spec != "local" and "|" in spec:
+        provider_id, model_id = spec.split("|", 1)
+        if provider_id in llm_manager.providers:
+            try:
+                return ProviderEmbedder(llm_manager, provider_id, model_id)
+            except EmbeddingsNotSupportedError as e:
+                print(f"[WARN] {e} - using local embeddings")
+        else:
+            print(f"[WARN] Embedding provider '{provider_id}' not available - using local embeddings")
+    return HashingEmbedder()
@@ -1,17 +1,161 @@
-from typing import Dict, List, Optional
-from .providers.base_provider import BaseLLMProvider
-from .providers.types import ProviderConfig, ModelInfo, Message
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+from .providers.base_provider import BaseLLMProvider, bind_response_metadata, unbind_response_metadata
+from .providers.types import ProviderConfig, ModelInfo, Message, Role
+from .token_budget import ContextWindow, TokenCounter, fit_context, input_budget
 
 class LLMManager:
     def __init__(self):
         self.providers: Dict[str, BaseLLMProvider] = {}
         self.active_provider_id: Optional[str] = None
         self.active_model_id: Optional[str] = None
-    
+        # In-flight streams per provider INSTANCE (needed to drain retired instances)
+        self._active_streams: Dict[BaseLLMProvider, int] = {}
+        self._background_tasks: set = set()  # Strong refs, asyncio only keeps weak ones
+        self._rebuilds: Dict[str, asyncio.Task] = {}  # provider_id -> latest scheduled rebuild_provider()
+        # Last known ModelInfo per (provider_id, model_id) - needed for context budgeting
+        self._model_info: Dict[tuple, ModelInfo] = {}
+        self._token_counters: Dict[str, TokenCounter] = {}
+        # Optional caches, attached in main.py when enabled in user_settings.json
+        self.response_cache = None   # storage.response_cache.ResponseCache (exact match)
+        self.semantic_cache = None   # core.semantic_cache.SemanticCache (similar prompts)
+        self.retriever = None        # core.doc_retriever.DocumentRetriever (RAG over local docs)
+        self.rate_limiter = None     # storage.rate_limiter.SharedRateLimiter (shared across worker processes)
+        self.stream_activity = None  # storage.stream_activity.StreamActivity (running streams of all worker processes)
+
     def register_provider(self, provider_id: str, provider: BaseLLMProvider):
         self.providers[provider_id] = provider
 
+    def on_provider_config_change(self, event):
+        """
+        ProviderConfigManager listener: options are applied to the running instance in place
+        (they are read per request, so e.g. Ollama's keep_alive takes effect immediately).
+        base_url and the API key are baked into the plugin's client by initialize(), so a change
+        to those builds a new instance and hot-swaps it in (see rebuild_provider).
+        """
+        provider = self.providers.get(event.provider_id)
+        if provider is None:
+            return
+        if event.kind in ('enabled', 'disabled'):
+            provider.config.enabled = event.kind == 'enabled'
+        elif event.kind == 'config':
+            provider.config.options.update(event.changes)
+            if 'base_url' in event.changes:
+                self.schedule_rebuild(event.provider_id)
+        elif event.kind == 'api_key':
+            self.schedule_rebuild(event.provider_id)
+        elif event.kind == 'status' and event.changes.get('new') == 'error':
+            # Key removed: don't keep showing the instance as verified
+            provider.config.status = 'error'
+
+    @property
+    def active_stream_count(self) -> int:
+        """Number of streams currently running across all provider instances"""
+        return sum(self._active_streams.values())
+
+    async def swap_provider(self, provider_id: str, provider: BaseLLMProvider, drain_timeout: float = 60.0) -> Optional[BaseLLMProvider]:
+        """
+        Atomically replace a registered provider with an already initialized instance.
+        New requests go to the new instance immediately; the old one finishes its
+        in-flight streams in the background and is shut down afterwards.
+        """
+        old_provider = self.providers.get(provider_id)
+        self.providers[provider_id] = provider
+
+        if old_provider is not None and old_provider is not provider:
+            task = asyncio.create_task(self._retire_provider(provider_id, old_provider, drain_timeout))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        return old_provider
+
+    async def rebuild_provider(self, provider_id: str) -> Optional[BaseLLMProvider]:
+        """
+        New instance of the same plugin class with the current base_url (options) and API key
+        (environment), initialized off to the side and swapped in. In-flight streams finish on
+        the old client. Returns the new instance (None: kept the old one).
+        """
+        old_provider = self.providers.get(provider_id)
+        if old_provider is None:
+            return None
+        config = old_provider.config.model_copy(deep=True)
+        config.init_error = None
+        config.base_url = config.options.get('base_url', config.base_url)
+        if config.options.get('api_key_env'):
+            config.api_key = os.getenv(config.options['api_key_env'])
+
+        provider = type(old_provider)(config)
+        await provider.initialize()
+        # Never replace a working instance with one that failed to initialize
+        if provider.config.init_error and not old_provider.config.init_error:
+            await provider.shutdown()
+            print(f"[ERR] Re-initializing '{provider_id}' failed, keeping current instance: {provider.config.init_error}")
+            return None
+        await self.swap_provider(provider_id, provider)
+        print(f"[OK] Re-initialized '{provider_id}' with new connection settings")
+        return provider
+
+    def schedule_rebuild(self, provider_id: str) -> asyncio.Task:
+        """rebuild_provider() in the background; changes in quick succession rebuild one after the other"""
+        previous = self._rebuilds.get(provider_id)
+
+        async def rebuild():
+            if previous is not None:
+                await asyncio.gather(previous, return_exceptions=True)
+            try:
+                await self.rebuild_provider(provider_id)
+            except Exception as e:
+                print(f"[ERR] Re-initializing '{provider_id}' failed: {e}")
+
+        task = asyncio.create_task(rebuild())
+        self._rebuilds[provider_id] = task
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        task.add_done_callback(lambda t: self._rebuilds.pop(provider_id, None) if self._rebuilds.get(provider_id) is t else None)
+        return task
+
+    async def wait_for_rebuild(self, provider_id: str):
+        """Until a scheduled rebuild of provider_id (if any) is swapped in"""
+        task = self._rebuilds.get(provider_id)
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _retire_provider(self, provider_id: str, provider: BaseLLMProvider, drain_timeout: float):
+        """Wait until all streams on a replaced instance are done, then close it"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + drain_timeout
+        while self._active_streams.get(provider, 0) > 0 and loop.time() < deadline:
+            await asyncio.sleep(0.1)
+
+        pending = self._active_streams.get(provider, 0)
+        if pending:
+            print(f"[WARN] Retiring '{provider_id}' with {pending} stream(s) still running (drain timeout)")
+
+        try:
+            await provider.shutdown()
+            print(f"[OK] Retired old instance of '{provider_id}'")
+        except Exception as e:
+            print(f"[ERR] Failed to shut down old instance of '{provider_id}': {e}")
+
+    def schedule_preload(self, provider_id: str, model_id: str):
+        """Warm up a model in the background (no-op for providers without preloading)"""
+        provider = self.providers.get(provider_id)
+        if provider is None or not model_id:
+            return
+
+        async def preload():
+            try:
+                await provider.preload_model(model_id)
+            except Exception as e:
+                print(f"[WARN] Preloading {provider_id}/{model_id} failed: {e}")
+
+        task = asyncio.create_task(preload())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
     async def get_all_models(self) -> List[ModelInfo]:
+        """Chat models of all enabled providers"""
         all_models = []
         for provider_id, provider in self.providers.items():
             if provider.config.enabled:
@@ -19,39 +163,223 @@ class LLMManager:
                     models = await provider.get_models()
                     for m in models:
                         m.provider_id = provider_id # Inject the ID so UI knows which provider to call
-                    all_models.extend(models)
+                        self._model_info[(provider_id, m.id)] = m
+                    all_models.extend(m for m in models if m.is_chat_model)
                 except Exception as e:
                     print(f"Error fetching models from {provider.config.name}: {e}")
         return all_models
 
-    async def get_available_models(self) -> List[ModelInfo]:
-        """Fetch models only from the currently active provider"""
-        if not self.active_provider_id or self.active_provider_id not in self.providers:
+    async def get_available_models(self, provider_id: Optional[str] = None) -> List[ModelInfo]:
+        """Fetch chat models only from the active provider (or the given one, see core/session.py)"""
+        pid = provider_id or self.active_provider_id
+        if not pid or pid not in self.providers:
             return []
-            
-        provider = self.providers[self.active_provider_id]
+
+        provider = self.providers[pid]
         try:
             models = await provider.get_models()
             for m in models:
-                m.provider_id = self.active_provider_id
-            return models
+                m.provider_id = pid
+                self._model_info[(pid, m.id)] = m
+            return [m for m in models if m.is_chat_model]
         except Exception as e:
             # Let the UI handle the empty list/error state
             print(f"Error fetching models from active provider {provider.config.name}: {e}")
             return []
 
-    async def stream_chat(self, message_history: List[Message], provider_id: str = None, model_id: str = None):
+    def get_model_info(self, provider_id: str, model_id: str) -> Optional[ModelInfo]:
+        return self._model_info.get((provider_id, model_id))
+
+    def get_token_counter(self, provider_id: Optional[str] = None) -> TokenCounter:
+        pid = provider_id or self.active_provider_id or ""
+        if pid not in self._token_counters:
+            self._token_counters[pid] = TokenCounter(pid)
+        return self._token_counters[pid]
+
+    def count_tokens(self, message: Message, provider_id: Optional[str] = None) -> int:
+        """Count (and cache in metadata) the tokens of a message for the given/active provider"""
+        return self.get_token_counter(provider_id).count_message(message)
+
+    def build_context(self, message_history: List[Message], provider_id: str, model_id: str) -> ContextWindow:
+        """Trim the history to the newest turns that fit the model's context window"""
+        window = fit_context(
+            message_history,
+            self.get_token_counter(provider_id),
+            input_budget(self.get_model_info(provider_id, model_id))
+        )
+        if window.dropped:
+            print(f"[CTX] Sliding window: dropped {window.dropped} old message(s), "
+                  f"~{window.input_tokens}/{window.budget} tokens")
+        return window
+
+    async def stream_chat(
+        self,
+        message_history: List[Message],
+        provider_id: str = None,
+        model_id: str = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        use_cache: bool = False,
+        use_retrieval: bool = True
+    ):
+        """
+        Stream a reply. If `metadata` is given (usually the assistant message's
+        metadata dict) it receives timings and whatever the provider reports.
+        `params` are sampling parameters passed to the provider (temperature, max_tokens).
+        `use_cache`: answer from and store into the response/semantic caches. Only
+        user chat turns opt in - internal requests (summaries, ...) share a fixed
+        system prompt and would be served each other's answers.
+        """
         pid = provider_id or self.active_provider_id
         mid = model_id or self.active_model_id
         print(f"DEBUG: stream_chat using Provider='{pid}', Model='{mid}'")
-        
+
         if not pid or pid not in self.providers:
             yield "Error: No active provider selected."
             return
 
+        if use_retrieval and self.retriever is not None:
+            message_history = await self._augment(message_history, metadata)
+
+        window = self.build_context(message_history, pid, mid)
+        if metadata is not None:
+            metadata.update({
+                "provider_id": pid,
+                "model_id": mid,
+                "context": {"input_tokens": window.input_tokens, "dropped_messages": window.dropped},
+            })
+
+        params = params or {}
+        cache = self.response_cache if use_cache else None
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.make_key(pid, mid, window.messages, params)
+            entry = cache.get(cache_key)
+            if entry is not None:
+                info = {
+                    "type": "exact",
+                    "age_s": round(time.time() - entry["created_at"], 1),
+                    "hits": entry["hit_count"],
+                    "original_ttft_ms": entry["metadata"].get("ttft_ms"),
+                }
+                async for chunk in self._replay_cached(entry["content"], info, metadata):
+                    yield chunk
+                return
+
+        semantic = self.semantic_cache if use_cache else None
+        if semantic is not None:
+            try:
+                match = await semantic.lookup(pid, mid, window.messages)
+            except Exception as e:
+                print(f"[WARN] Semantic cache lookup failed: {e}")
+                match, semantic = None, None
+            if match is not None:
+                info = {
+                    "type": "semantic",
+                    "similarity": round(match.score, 4),
+                    "prompt": match.prompt,
+                    "age_s": round(time.time() - match.created_at, 1),
+                    "hits": match.hit_count,
+                }
+                if match.serve:
+                    async for chunk in self._replay_cached(match.content, info, metadata):
+                        yield chunk
+                    return
+                if metadata is not None:
+                    # Not close enough to answer for the model - offer it alongside the fresh answer
+                    metadata["cache_suggestion"] = {**info, "content": match.content}
+
+        # Provider rate limit (cache hits above don't count against it)
+        if self.rate_limiter is not None:
+            waited_ms = await self.rate_limiter.acquire(pid)
+            if waited_ms and metadata is not None:
+                metadata["rate_limit_wait_ms"] = waited_ms
+
+        # Pin the instance for the whole stream (a hot-reload may swap the registry entry)
         provider = self.providers[pid]
+        self._active_streams[provider] = self._active_streams.get(provider, 0) + 1
+        if self.stream_activity is not None:
+            self.stream_activity.notify(self.active_stream_count)
+        token = bind_response_metadata(metadata)
+        started = time.perf_counter()
+        first_chunk = True
+        chunks = []
         try:
-            async for chunk in provider.stream_chat(mid, message_history):
+            async for chunk in provider.stream_chat(mid, window.messages, **params):
+                if first_chunk and metadata is not None:
+                    metadata["ttft_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    first_chunk = False
+                chunks.append(chunk)
                 yield chunk
+
+            # Only complete, error-free answers go into the cache
+            content = "".join(chunks)
+            if content and not content.startswith("Error:"):
+                if cache_key:
+                    cache.put(cache_key, pid, mid, content, {"ttft_ms": (metadata or {}).get("ttft_ms")})
+                if semantic is not None:
+                    try:
+                        await semantic.store(pid, mid, window.messages, content)
+                    except Exception as e:
+                        print(f"[WARN] Semantic cache store failed: {e}")
         except Exception as e:
             yield f"Error: {str(e)}"
+        finally:
+            if metadata is not None:
+                metadata["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            unbind_response_metadata(token)
+            self._active_streams[provider] -= 1
+            if self._active_streams[provider] <= 0:
+                del self._active_streams[provider]
+            if self.stream_activity is not None:
+                self.stream_activity.notify(self.active_stream_count)
+
+
+    async def _augment(self, message_history: List[Message], metadata: Optional[Dict[str, Any]]) -> List[Message]:
+        """RAG: put the best matching doc chunks for the last user message behind the system prompts"""
+        last = message_history[-1] if message_history else None
+        if last is None or last.role != Role.USER:
+            return message_history
+
+        started = time.perf_counter()
+        try:
+            chunks = await self.retriever.retrieve(last.content)
+        except Exception as e:
+            print(f"[WARN] Retrieval failed: {e}")
+            return message_history
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        if metadata is not None:
+            metadata["retrieval"] = {
+                "latency_ms": latency_ms,
+                "chunks": [{"source": c["source"], "score": c["score"]} for c in chunks],
+                "index_chunks": len(self.retriever.index),
+                "index_bytes": self.retriever.index.nbytes,
+            }
+        if not chunks:
+            return message_history
+
+        context = self.retriever.build_context_message(chunks)
+        position = 0
+        while position < len(message_history) and message_history[position].role == Role.SYSTEM:
+            position += 1
+        return message_history[:position] + [context] + message_history[position:]
+
+    async def _replay_cached(self, content: str, info: Dict[str, Any], metadata: Optional[Dict[str, Any]]):
+        """Play a cached answer back as a stream - instantly or paced at replay_chars_per_s"""
+        started = time.perf_counter()
+        if metadata is not None:
+            metadata["cached"] = True
+            metadata["cache"] = info
+
+        cps = self.response_cache.replay_chars_per_s if self.response_cache else 0
+        step = 64 if not cps else max(1, int(cps / 20))  # Paced: ~20 updates per second
+        for i in range(0, len(content), step):
+            piece = content[i:i + step]
+            if i == 0 and metadata is not None:
+                metadata["ttft_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            yield piece
+            await asyncio.sleep(len(piece) / cps if cps else 0)  # Always yield to the event loop
+
+        if metadata is not None:
+            metadata["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
@@ -0,0 +1,218 @@
+"""
+Message Index
+Embedding index over all chat messages for meaning-based search and
+"related conversations".
+
+- New messages are queued by the SQLite chat storage on save and embedded in small
+  batches in the background (the UI never waits for an embedding).
+- Existing history is backfilled in batches at startup, resuming where it stopped.
+- Every SYNC_SECONDS the index is reconciled with the database: messages saved by
+  other processes (other workers in multi-worker mode, tools) are embedded, vectors
+  of messages deleted or archived elsewhere are dropped. Each worker has its own
+  index file (core/paths.get_worker_data_path), so this is what keeps them alike.
+- Vectors live in an int8 memory-mapped matrix (~0.4 KB per message at 384 dims),
+  search is a vectorized top-k cosine scan (see core/vector_index.py).
+
+Settings (user_settings.json, all optional):
+    semantic_search_enabled    bool   Build/use the index (default: on)
+    semantic_search_embedder   str    "local" or "provider_id|model_id" (default: local)
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
+import numpy as np
+from core.embeddings import Embedder
+from core.paths import get_worker_data_path
+from core.vector_index import VectorIndex
+
+BACKFILL_BATCH_SIZE = 256
+FLUSH_DELAY = 0.5             # Seconds to collect new messages before embedding them
+RELATED_QUERY_MESSAGES = 20   # Newest messages of a chat that describe "what it is about"
+RELATED_CANDIDATES = 200      # Message hits that are grouped into conversations
+MIN_INDEXED_CHARS = 3         # Skip empty/trivial messages ("ok", placeholders)
+SYNC_SECONDS = 30.0           # Reconcile with messages saved/deleted by other processes
+
+
+class MessageIndex:
+    def __init__(self, db, embedder: Embedder, index_path: Optional[str] = None, dtype: str = "int8"):
+        self.db = db
+        self.embedder = embedder
+        self.index = VectorIndex(index_path or get_worker_data_path("message_index"), name=embedder.name, dtype=dtype)
+        self._pending: Dict[int, str] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._backfill_task: Optional[asyncio.Task] = None
+        self._skipped: Set[int] = set()  # Seen but not indexable - not fetched again by sync()
+        self.last_sync: Optional[Dict] = None
+        self.last_search_ms: Optional[float] = None
+
+    @staticmethod
+    def _indexable(content: str) -> bool:
+        text = (content or "").strip()
+        return len(text) >= MIN_INDEXED_CHARS and not text.startswith("Error:")
+
+    @property
+    def pending(self) -> int:
+        """Messages saved but not embedded yet"""
+        return len(self._pending)
+
+    # --- Indexing --------------------------------------------------------------
+
+    def enqueue(self, message_id: int, content: str):
+        """Called for every saved message; embedding happens batched in the background"""
+        if not self._indexable(content):
+            return
+        self._pending[message_id] = content
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+            except RuntimeError:
+                pass  # No event loop (scripts) - caught up by the next backfill()
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(FLUSH_DELAY)
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"[WARN] Message index update failed: {e}")
+
+    async def flush(self):
+        """Embed all queued messages now"""
+        while self._pending:
+            batch = dict(list(self._pending.items())[:BACKFILL_BATCH_SIZE])
+            for message_id in batch:
+                self._pending.pop(message_id, None)
+            vectors = await self.embedder.embed(list(batch.values()))
+            self.index.add(batch.keys(), vectors)
+        self.index.flush()
+
+    async def backfill(self, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+        """Embed all messages that are not indexed yet, batch by batch. Returns the number added."""
+        added, after_id, started = 0, 0, time.perf_counter()
+        while True:
+            rows = await asyncio.to_thread(self.db.get_messages_after, after_id, batch_size)
+            if not rows:
+                break
+            after_id = rows[-1][0]
+            self._skipped.update(i for i, c in rows if not self._indexable(c))
+            missing = [(i, c) for i, c in rows if i not in self.index and self._indexable(c)]
+            if missing:
+                vectors = await self.embedder.embed([c for _, c in missing])
+                self.index.add([i for i, _ in missing], vectors)
+                added += len(missing)
+            await asyncio.sleep(0)  # Let the UI breathe between batches
+        self.index.flush()
+        if added:
+            print(f"[INDEX] Backfilled {added} message(s) in {time.perf_counter() - started:.1f}s "
+                  f"({len(self.index)} indexed, {self.index.nbytes / 1e6:.1f} MB)")
+        return added
+
+    async def sync(self) -> Dict:
+        """
+        Reconcile with the database: embed messages this process never saw (saved by
+        another worker, restored from the archive by a tool), drop vectors of messages
+        that are gone (deleted or archived by another process). Returns the counts.
+        """
+        started = time.perf_counter()
+        indexed = np.asarray(self.index.ids(), dtype=np.int64)  # Before reading the DB: ids added meanwhile are never "gone"
+        db_ids = np.asarray(await asyncio.to_thread(self.db.get_all_message_ids), dtype=np.int64)
+
+        gone = np.setdiff1d(indexed, db_ids).tolist()
+        if gone:
+            self.remove(gone)
+
+        missing = [i for i in np.setdiff1d(db_ids, indexed).tolist()
+                   if i not in self._skipped and i not in self._pending]
+        added = 0
+        for start in range(0, len(missing), BACKFILL_BATCH_SIZE):
+            rows = await asyncio.to_thread(self.db.get_message_texts, missing[start:start + BACKFILL_BATCH_SIZE])
+            self._skipped.update(i for i, c in rows if not self._indexable(c))
+            rows = [(i, c) for i, c in rows if i not in self.index and self._indexable(c)]
+            if rows:
+                vectors = await self.embedder.embed([c for _, c in rows])
+                self.index.add([i for i, _ in rows], vectors)
+                added += len(rows)
+            await asyncio.sleep(0)
+        if added:
+            self.index.flush()
+
+        self.last_sync = {"added": added, "removed": len(gone), "ms": round((time.perf_counter() - started) * 1000, 1)}
+        if added or gone:
+            print(f"[INDEX] Synced with the database: +{added} / -{len(gone)} message(s)")
+        return self.last_sync
+
+    def start_backfill(self, sync_seconds: float = SYNC_SECONDS):
+        """Run backfill() as a background task, then sync() every `sync_seconds`"""
+        async def run():
+            try:
+                await self.backfill()
+            except Exception as e:
+                print(f"[WARN] Message index backfill failed: {e}")
+            while True:
+                await asyncio.sleep(sync_seconds)
+                try:
+                    await self.sync()
+                except Exception as e:
+                    print(f"[WARN] Message index sync failed: {e}")
+        self._backfill_task = asyncio.create_task(run())
+
+    def remove(self, message_ids: List[int]):
+        for message_id in message_ids:
+            self._pending.pop(message_id, None)
+        self.index.remove(message_ids)
+        self.index.flush()
+
+    # --- Queries ---------------------------------------------------------------
+
+    async def search(self, query: str, k: int = 10) -> List[Dict]:
+        """Messages closest in meaning to `query` (message refs + score)"""
+        vector = (await self.embedder.embed([query]))[0]
+        started = time.perf_counter()
+        hits = self.index.search(vector, k=k)
+        refs = self.db.get_message_refs([message_id for message_id, _ in hits])
+        self.last_search_ms = round((time.perf_counter() - started) * 1000, 2)
+        return [{**refs[message_id], "score": round(score, 4)} for message_id, score in hits if message_id in refs]
+
+    async def related_conversations(self, conversation_id: str, k: int = 5) -> List[Dict]:
+        """
+        Conversations about similar topics: the query is the mean vector of the chat's
+        newest messages, hits are grouped by conversation (best message wins).
+        """
+        started = time.perf_counter()
+        own_ids = self.db.get_message_ids(conversation_id)  # Newest first
+        vectors = self.index.get(own_ids[:RELATED_QUERY_MESSAGES])
+        if not len(vectors):
+            return []
+        query = vectors.mean(axis=0)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+
+        hits = self.index.search(query / norm, k=RELATED_CANDIDATES, exclude=own_ids)
+        refs = self.db.get_message_refs([message_id for message_id, _ in hits])
+
+        related: Dict[str, Dict] = {}
+        for message_id, score in hits:
+            ref = refs.get(message_id)
+            if ref is None or ref["conversation_id"] == conversation_id or ref["conversation_id"] in related:
+                continue
+            related[ref["conversation_id"]] = {
+                "id": ref["conversation_id"],
+                "title": ref["title"],
+                "score": round(score, 4),
+                "snippet": ref["content"][:120],
+            }
+            if len(related) >= k:
+                break
+
+        self.last_search_ms = round((time.perf_counter() - started) * 1000, 2)
+        return list(related.values())
+
+    def get_stats(self) -> Dict:
+        return {
+            "indexed": len(self.index),
+            "pending": self.pending,
+            "index_bytes": self.index.nbytes,
+            "embedder": self.embedder.name,
+            "last_search_ms": self.last_search_ms,
+            "last_sync": self.last_sync,
+        }
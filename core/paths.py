@@ -11,6 +11,18 @@ def get_data_path(filename: str) -> str:
     """Get absolute path for a file in the user data directory."""
     return str(USER_DATA_DIR / filename)
 
+def get_worker_data_path(filename: str) -> str:
+    """
+    Like get_data_path(), but private to one server worker in multi-worker web mode
+    (YAT_WORKER_ID is set by core/cluster.py): "message_index" -> "message_index.w2".
+    For files that must not be shared between processes (memory-mapped vector indexes).
+    """
+    worker_id = os.environ.get("YAT_WORKER_ID")
+    if worker_id:
+        stem, ext = os.path.splitext(filename)
+        filename = f"{stem}.w{worker_id}{ext}"
+    return get_data_path(filename)
+
 def ensure_data_dir():
     """Ensure the user data directory exists."""
     if not USER_DATA_DIR.exists():
@@ -6,7 +6,7 @@ import importlib.util
 import inspect
 import sys
 from pathlib import Path
-from typing import Dict, List, Optional, Type
+from typing import Dict, Iterable, List, Optional, Type
 from core.providers.base_provider import BaseLLMProvider
 from core.providers.types import ProviderConfig
 
@@ -14,10 +14,13 @@ from core.providers.types import ProviderConfig
 class PluginLoader:
     """Dynamically loads provider plugins from the plugins directory"""
     
-    def __init__(self, plugins_dir: str = "plugins"):
+    def __init__(self, plugins_dir: str = "plugins", isolated_plugins: Optional[Iterable[str]] = None):
         self.plugins_dir = Path(plugins_dir)
         self.loaded_plugins: Dict[str, Type[BaseLLMProvider]] = {}
         self.plugin_errors: Dict[str, str] = {}
+        # Plugins hosted in worker subprocesses instead of the UI process
+        # (not possible in frozen builds: there is no interpreter to spawn)
+        self.isolated_plugins = set(isolated_plugins or []) if not getattr(sys, 'frozen', False) else set()
         
     def discover_plugins(self) -> List[str]:
         """Discover all Python files in the plugins directory"""
@@ -66,6 +69,14 @@ class PluginLoader:
             self.plugin_errors[plugin_name] = f"Plugin file not found: {plugin_path}"
             return None
         
+        if plugin_name in self.isolated_plugins:
+            # Do NOT import the module here - the worker process does that
+            from core.remote_provider import RemoteProvider
+            provider_class = RemoteProvider.for_plugin(plugin_name, str(self.plugins_dir.resolve()))
+            self.loaded_plugins[plugin_name] = provider_class
+            print(f"[OK] Loaded plugin: {plugin_name} (isolated worker)")
+            return provider_class
+        
         try:
             # Load module dynamically
             spec = importlib.util.spec_from_file_location(plugin_name, plugin_path)
@@ -131,14 +142,18 @@ class PluginLoader:
     
     def reload_plugin(self, plugin_name: str) -> bool:
         """Reload a plugin (for hot-reload)"""
-        if plugin_name in self.loaded_plugins:
-            del self.loaded_plugins[plugin_name]
+        previous_class = self.loaded_plugins.pop(plugin_name, None)
+        previous_module = sys.modules.pop(plugin_name, None) if plugin_name not in self.isolated_plugins else None
         
         if plugin_name in self.plugin_errors:
             del self.plugin_errors[plugin_name]
         
-        if plugin_name in sys.modules:
-            del sys.modules[plugin_name]
-        
         result = self.load_plugin(plugin_name)
+        
+        if result is None and previous_class is not None:
+            # Broken edit: keep the last working version registered
+            self.loaded_plugins[plugin_name] = previous_class
+            if previous_module is not None:
+                sys.modules[plugin_name] = previous_module
+        
         return result is not None
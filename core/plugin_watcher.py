@@ -0,0 +1,95 @@
+"""
+Plugin Watcher (Hot-Reload)
+Polls the plugins directory and reloads plugins whose file changed on disk
+"""
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Type
+from core.plugin_loader import PluginLoader
+from core.providers.base_provider import BaseLLMProvider
+
+
+class PluginWatcher:
+    """
+    Watches plugins/*.py via mtime polling (no extra dependency, works on all OS).
+
+    On change the plugin module is re-imported through the PluginLoader and the
+    new provider class is handed to `on_reload`, which is responsible for building
+    the new instance and swapping it in (see LLMManager.swap_provider).
+    """
+
+    def __init__(
+        self,
+        plugin_loader: PluginLoader,
+        on_reload: Callable[[str, Type[BaseLLMProvider]], Awaitable[None]],
+        interval: float = 1.0
+    ):
+        self.plugin_loader = plugin_loader
+        self.on_reload = on_reload
+        self.interval = interval
+        self._mtimes: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _snapshot(self) -> Dict[str, float]:
+        """Current mtime of every plugin file (private files excluded like in discovery)"""
+        mtimes = {}
+        plugins_dir: Path = self.plugin_loader.plugins_dir
+        if not plugins_dir.exists():
+            return mtimes
+        for file_path in plugins_dir.glob("*.py"):
+            if file_path.name.startswith("_"):
+                continue
+            try:
+                mtimes[file_path.stem] = file_path.stat().st_mtime
+            except OSError:
+                continue  # File vanished between glob and stat
+        return mtimes
+
+    def start(self):
+        """Start watching (must be called from within the running event loop)"""
+        if self._task and not self._task.done():
+            return
+        self._mtimes = self._snapshot()
+        self._task = asyncio.create_task(self._run())
+        print(f"[OK] Plugin hot-reload active: watching {self.plugin_loader.plugins_dir}")
+
+    async def stop(self):
+        """Stop watching"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            current = self._snapshot()
+            changed = [name for name, mtime in current.items() if self._mtimes.get(name) != mtime]
+
+            for name in self._mtimes.keys() - current.keys():
+                print(f"[INFO] Plugin file removed: {name} (instance stays registered until restart)")
+
+            if changed:
+                # Editors often write in several steps - wait until the files settle
+                await asyncio.sleep(min(self.interval, 0.3))
+                current = self._snapshot()
+
+            self._mtimes = current
+
+            for plugin_name in changed:
+                await self._reload(plugin_name)
+
+    async def _reload(self, plugin_name: str):
+        print(f"\n[RELOAD] Plugin changed: {plugin_name}")
+        if not self.plugin_loader.reload_plugin(plugin_name):
+            error = self.plugin_loader.plugin_errors.get(plugin_name, "unknown error")
+            print(f"[ERR] Hot-reload of '{plugin_name}' failed, keeping current version: {error}")
+            return
+
+        try:
+            await self.on_reload(plugin_name, self.plugin_loader.loaded_plugins[plugin_name])
+        except Exception as e:
+            print(f"[ERR] Hot-swap of '{plugin_name}' failed, keeping current instance: {e}")
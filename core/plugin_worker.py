@@ -0,0 +1,171 @@
+"""
+Plugin Worker Process
+Hosts a single provider plugin outside the UI process (isolation mode).
+
+The UI process (see core/remote_provider.py) starts this module with
+`python -m core.plugin_worker ...`, the worker connects back over a local
+TCP socket and serves requests until the connection closes.
+
+Wire format (both directions): 4-byte big-endian length + UTF-8 JSON object.
+Requests:  {"id": int, "op": "init" | "get_models" | "stream_chat" | "check_health" | "preload_model" | "embed" | "cancel" | "shutdown", "args": {...}}
+Responses: {"id": int, "type": "result" | "chunk" | "meta" | "end" | "error", "data": ...}
+"""
+import argparse
+import asyncio
+import json
+import socket
+import struct
+import sys
+from typing import Dict, Optional
+
+_HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024  # Guard against garbage on the socket
+SOCKET_BUFFER = 64 * 1024  # Kernel buffer per direction (loopback autotunes to MBs) - keeps back-pressure tight
+
+
+def limit_socket_buffer(writer: asyncio.StreamWriter, option: int):
+    """Cap SO_SNDBUF / SO_RCVBUF of a connection (best effort)"""
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, option, SOCKET_BUFFER)
+        except OSError:
+            pass
+
+
+def encode_frame(payload: dict) -> bytes:
+    """Serialize one frame (header + body in a single buffer -> one write per frame)"""
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return _HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[dict]:
+    """Read one frame, returns None on clean EOF"""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame too large: {length} bytes")
+    body = await reader.readexactly(length)
+    return json.loads(body)
+
+
+class PluginWorker:
+    """Serves one provider instance over a framed socket connection"""
+
+    def __init__(self, plugin_name: str, plugins_dir: str):
+        self.plugin_name = plugin_name
+        self.plugins_dir = plugins_dir
+        self.provider = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.streams: Dict[int, asyncio.Task] = {}
+
+    def send(self, payload: dict):
+        self.writer.write(encode_frame(payload))
+
+    def _create_provider(self, config_data: dict):
+        from core.plugin_loader import PluginLoader
+        from core.providers.types import ProviderConfig
+
+        loader = PluginLoader(plugins_dir=self.plugins_dir)
+        provider_class = loader.load_plugin(self.plugin_name)
+        if provider_class is None:
+            raise RuntimeError(loader.plugin_errors.get(self.plugin_name, "Plugin could not be loaded"))
+        return provider_class(ProviderConfig(**config_data))
+
+    async def handle(self, request: dict):
+        req_id, op, args = request.get("id"), request.get("op"), request.get("args") or {}
+        try:
+            if op == "init":
+                if self.provider is None:
+                    self.provider = self._create_provider(args["config"])
+                await self.provider.initialize()
+                result = self.provider.config.model_dump(mode="json")
+                result["supports_embeddings"] = self.provider.supports_embeddings
+            elif op == "get_models":
+                models = await self.provider.get_models()
+                result = [m.model_dump(mode="json") for m in models]
+            elif op == "check_health":
+                result = await self.provider.check_health()
+            elif op == "preload_model":
+                result = await self.provider.preload_model(args["model_id"])
+            elif op == "embed":
+                result = await self.provider.embed(args["model_id"], args["texts"])
+            elif op == "stream_chat":
+                await self._stream(req_id, args)
+                return
+            elif op == "cancel":
+                task = self.streams.get(args.get("target"))
+                if task:
+                    task.cancel()
+                return
+            else:
+                raise ValueError(f"Unknown op: {op}")
+            self.send({"id": req_id, "type": "result", "data": result})
+        except Exception as e:
+            self.send({"id": req_id, "type": "error", "data": f"{type(e).__name__}: {e}"})
+        await self.writer.drain()
+
+    async def _stream(self, req_id: int, args: dict):
+        from core.providers.base_provider import bind_response_metadata
+        from core.providers.types import Message
+
+        messages = [Message(**m) for m in args.get("messages", [])]
+        metadata = {}
+        bind_response_metadata(metadata)  # Each request runs in its own task/context
+        try:
+            async for chunk in self.provider.stream_chat(args["model_id"], messages, **args.get("kwargs", {})):
+                self.send({"id": req_id, "type": "chunk", "data": chunk})
+                await self.writer.drain()  # Back-pressure: don't outrun the UI process
+            if metadata:
+                self.send({"id": req_id, "type": "meta", "data": metadata})
+            self.send({"id": req_id, "type": "end"})
+        except asyncio.CancelledError:
+            self.send({"id": req_id, "type": "end"})
+        except Exception as e:
+            self.send({"id": req_id, "type": "error", "data": f"{type(e).__name__}: {e}"})
+        finally:
+            self.streams.pop(req_id, None)
+        await self.writer.drain()
+
+    async def serve(self, port: int, token: str):
+        reader, self.writer = await asyncio.open_connection("127.0.0.1", port)
+        limit_socket_buffer(self.writer, socket.SO_SNDBUF)
+        self.writer.write(encode_frame({"token": token}))
+        await self.writer.drain()
+
+        while True:
+            request = await read_frame(reader)
+            if request is None or request.get("op") == "shutdown":
+                break
+            task = asyncio.create_task(self.handle(request))
+            if request.get("op") == "stream_chat":
+                self.streams[request["id"]] = task
+
+        # Orderly shutdown: stop streams, release client pools
+        for task in list(self.streams.values()):
+            task.cancel()
+        if self.provider is not None:
+            try:
+                await self.provider.shutdown()
+            except Exception:
+                pass
+        self.writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Y.A.T. plugin worker (internal)")
+    parser.add_argument("--plugin", required=True)
+    parser.add_argument("--plugins-dir", required=True)
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--token", required=True)
+    args = parser.parse_args()
+
+    print(f"[WORKER] {args.plugin} started (isolated)", file=sys.stderr)
+    asyncio.run(PluginWorker(args.plugin, args.plugins_dir).serve(args.port, args.token))
+
+
+if __name__ == "__main__":
+    main()
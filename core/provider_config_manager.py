@@ -1,12 +1,18 @@
 """
 Provider Configuration Manager
 Handles loading, saving, and managing provider configurations
+
+One shared instance per process (get_provider_config_manager()): the file is read
+once, changes are applied in memory, written atomically and announced as
+ProviderConfigEvent to subscribers (LLMManager, Sidebar, settings dialog).
 """
 import json
 import os
+import tempfile
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, List, Optional
+from dataclasses import dataclass, asdict, field
 
 
 @dataclass
@@ -33,10 +39,36 @@ class ProviderConfig:
     settings: List[Dict]
     status: str = "unknown"  # 'active', 'disabled', 'error', 'offline'
     error_message: Optional[str] = None
+    isolated: bool = False  # Run plugin in a worker subprocess (see core/remote_provider.py)
+
+
+@dataclass
+class ProviderConfigEvent:
+    """A change to one provider's configuration"""
+    kind: str  # 'enabled', 'disabled', 'config', 'status', 'api_key' (set/changed/removed, value not included)
+    provider_id: str
+    provider: ProviderConfig
+    changes: Dict[str, Any] = field(default_factory=dict)  # 'config': changed keys, 'status': {'old', 'new'}
+
+
+ProviderConfigListener = Callable[[ProviderConfigEvent], None]
 
 
 from .paths import get_data_path
 
+_shared_manager: Optional["ProviderConfigManager"] = None
+_shared_lock = threading.Lock()
+
+
+def get_provider_config_manager() -> "ProviderConfigManager":
+    """Process-wide ProviderConfigManager (provider_config.json is read once)"""
+    global _shared_manager
+    with _shared_lock:
+        if _shared_manager is None:
+            _shared_manager = ProviderConfigManager()
+        return _shared_manager
+
+
 class ProviderConfigManager:
     """Manages provider configurations"""
     
@@ -44,7 +76,41 @@ class ProviderConfigManager:
         path_str = config_file or get_data_path("provider_config.json")
         self.config_file = Path(path_str)
         self.providers: Dict[str, ProviderConfig] = {}
+        self._listeners: List[ProviderConfigListener] = []
         self.load_config()
+
+    # --- Change notifications --------------------------------------------------
+
+    def subscribe(self, listener: ProviderConfigListener):
+        """Call `listener(event)` after every change (enable/disable, config values, status)"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener: ProviderConfigListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, kind: str, provider: ProviderConfig, changes: Optional[Dict[str, Any]] = None):
+        event = ProviderConfigEvent(kind=kind, provider_id=provider.id, provider=provider, changes=changes or {})
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"[WARN] Provider config listener failed ({kind} {provider.id}): {e}")
+
+    def _update_status(self, provider: ProviderConfig):
+        """Re-check the status and announce it if it changed"""
+        old, new = provider.status, self._check_provider_status(provider)
+        if old != new:
+            provider.status = new
+            self._notify('status', provider, {'old': old, 'new': new})
+
+    def refresh_status(self, provider_id: Optional[str] = None):
+        """Re-check status after environment changes (e.g. an API key was set); all providers if no id"""
+        ids = [provider_id] if provider_id else list(self.providers)
+        for pid in ids:
+            if pid in self.providers:
+                self._update_status(self.providers[pid])
     
     def load_config(self):
         """Load provider configurations from JSON file"""
@@ -78,8 +144,7 @@ class ProviderConfigManager:
                 modified = True
         
         if modified:
-            with open(self.config_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            self._write_json(data)
                 
         for provider_data in data.get('providers', []):
             provider = ProviderConfig(**provider_data)
@@ -99,14 +164,26 @@ class ProviderConfigManager:
                     'color': p.color,
                     'enabled': p.enabled,
                     'config': p.config,
-                    'settings': p.settings
+                    'settings': p.settings,
+                    **({'isolated': True} if p.isolated else {})
                 }
                 for p in self.providers.values()
             ]
         }
-        
-        with open(self.config_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        self._write_json(data)
+
+    def _write_json(self, data: Dict):
+        """Atomic write (temp file + os.replace): a crash never leaves half a config behind"""
+        self.config_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".provider_config.", suffix=".tmp", dir=str(self.config_file.parent))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.config_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
     
     def _check_provider_status(self, provider: ProviderConfig) -> str:
         """Check provider status based on configuration"""
@@ -117,7 +194,6 @@ class ProviderConfigManager:
         if provider.type == "cloud":
             api_key_env = provider.config.get('api_key_env')
             has_key = bool(os.getenv(api_key_env)) if api_key_env else False
-            print(f"[DEBUG] Status Check {provider.id}: EnvVar={api_key_env}, HasKey={has_key}")
             
             if api_key_env and not has_key:
                 return "error"
@@ -198,7 +274,8 @@ class ProviderConfigManager:
                     "color": "#000000",
                     "enabled": True,
                     "config": {
-                        "base_url": "http://localhost:11434"
+                        "base_url": "http://localhost:11434",
+                        "keep_alive": "30m"
                     },
                     "settings": [
                         {
@@ -206,6 +283,18 @@ class ProviderConfigManager:
                             "label": "Base URL",
                             "type": "text",
                             "default": "http://localhost:11434",
+                        },
+                        {
+                            "key": "keep_alive",
+                            "label": "Keep Model Loaded",
+                            "type": "text",
+                            "default": "30m",
+                        },
+                        {
+                            "key": "num_ctx",
+                            "label": "Context Size (num_ctx)",
+                            "type": "number",
+                            "default": "",
                         }
                     ]
                 },
@@ -274,12 +363,8 @@ class ProviderConfigManager:
     
     def _create_default_config(self):
         """Create default provider config file with standard providers"""
-        default_data = self._get_default_providers_data()
-        # Ensure directory exists (just in case)
-        self.config_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(self.config_file, 'w') as f:
-            json.dump(default_data, f, indent=2)
+        self._write_json(self._get_default_providers_data())
+
     def get_provider(self, provider_id: str) -> Optional[ProviderConfig]:
         """Get provider configuration by ID"""
         return self.providers.get(provider_id)
@@ -294,24 +379,41 @@ class ProviderConfigManager:
     
     def enable_provider(self, provider_id: str):
         """Enable a provider"""
-        if provider_id in self.providers:
-            self.providers[provider_id].enabled = True
-            self.providers[provider_id].status = self._check_provider_status(self.providers[provider_id])
+        provider = self.providers.get(provider_id)
+        if provider and not provider.enabled:
+            provider.enabled = True
+            provider.status = self._check_provider_status(provider)
             self.save_config()
+            self._notify('enabled', provider)
     
     def disable_provider(self, provider_id: str):
         """Disable a provider"""
-        if provider_id in self.providers:
-            self.providers[provider_id].enabled = False
-            self.providers[provider_id].status = "disabled"
+        provider = self.providers.get(provider_id)
+        if provider and provider.enabled:
+            provider.enabled = False
+            provider.status = "disabled"
             self.save_config()
+            self._notify('disabled', provider)
     
     def update_provider_config(self, provider_id: str, config_updates: Dict):
-        """Update provider configuration"""
-        if provider_id in self.providers:
-            self.providers[provider_id].config.update(config_updates)
-            self.providers[provider_id].status = self._check_provider_status(self.providers[provider_id])
+        """Update provider configuration (only actually changed values are written and announced)"""
+        provider = self.providers.get(provider_id)
+        if not provider:
+            return
+        changes = {k: v for k, v in config_updates.items() if provider.config.get(k) != v}
+        if changes:
+            provider.config.update(changes)
             self.save_config()
+            self._notify('config', provider, changes)
+        self._update_status(provider)
+    
+    def api_key_changed(self, provider_id: str):
+        """Announce a new or removed API key (keys live in the environment / .env, never in the config file)"""
+        provider = self.providers.get(provider_id)
+        if not provider:
+            return
+        self._notify('api_key', provider)
+        self._update_status(provider)
     
     def get_provider_setting_value(self, provider_id: str, setting_key: str) -> Optional[str]:
         """Get a specific setting value for a provider"""
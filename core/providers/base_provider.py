@@ -1,11 +1,40 @@
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator, List, Any
+from contextvars import ContextVar, Token
+from typing import AsyncGenerator, List, Any, Dict, Optional
 from .types import Message, ModelInfo, ProviderConfig
 
+# Metadata of the response currently being streamed (usage, cache stats, timings).
+# LLMManager binds the assistant message's metadata dict for the duration of a stream,
+# providers fill it via self.report_metadata() without changing their stream_chat signature.
+_response_metadata: ContextVar[Optional[Dict[str, Any]]] = ContextVar("response_metadata", default=None)
+
+
+def bind_response_metadata(target: Optional[Dict[str, Any]]) -> Token:
+    """Route report_metadata() calls of the current context into `target`"""
+    return _response_metadata.set(target)
+
+
+def unbind_response_metadata(token: Token) -> None:
+    try:
+        _response_metadata.reset(token)
+    except ValueError:
+        pass  # Generator finalized from another context (e.g. garbage collected) - nothing to undo
+
+
+class EmbeddingsNotSupportedError(NotImplementedError):
+    """Raised by embed() of providers without an embeddings API"""
+
+
 class BaseLLMProvider(ABC):
     def __init__(self, config: ProviderConfig):
         self.config = config
 
+    def report_metadata(self, **values: Any) -> None:
+        """Attach values (e.g. token usage) to the metadata of the message being generated."""
+        target = _response_metadata.get()
+        if target is not None:
+            target.update(values)
+
     @abstractmethod
     async def initialize(self) -> None:
         """Initialize the provider (e.g. validate clients)."""
@@ -30,3 +59,28 @@ class BaseLLMProvider(ABC):
     async def check_health(self) -> bool:
         """Check if the provider is reachable and configured correctly."""
         pass
+
+    async def preload_model(self, model_id: str) -> None:
+        """Optional: warm up a model (e.g. load it into memory) before the first request."""
+        pass
+
+    @property
+    def supports_embeddings(self) -> bool:
+        """True if the provider implements embed()"""
+        return type(self).embed is not BaseLLMProvider.embed
+
+    async def embed(self, model_id: str, texts: List[str]) -> List[List[float]]:
+        """Optional: embedding vectors for `texts` (one per text). Providers without an embeddings API raise."""
+        raise EmbeddingsNotSupportedError(f"{self.config.name} does not support embeddings")
+
+    async def shutdown(self) -> None:
+        """Release client pools (called when the instance is retired, e.g. hot-reload)."""
+        client = getattr(self, "client", None)
+        if client is None:
+            return
+        close = getattr(client, "close", None) or getattr(client, "aclose", None)
+        if close is None:
+            return
+        result = close()
+        if hasattr(result, "__await__"):
+            await result
@@ -0,0 +1,39 @@
+import asyncio
+from typing import List
+from .base_provider import BaseLLMProvider
+from .types import Message, ModelInfo, ProviderConfig
+
+DEFAULT_MODELS = 4
+
+
+class SimulatedProvider(BaseLLMProvider):
+    """
+    Offline provider for benchmarks and load tests (never registered in normal use).
+    Streams `tokens` chunks tagged with provider/model, `token_ms` apart - so a reply
+    shows which model produced it and the timing is deterministic.
+    """
+
+    def __init__(self, provider_id: str = "simulated", tokens: int = 50, token_ms: float = 10.0,
+                 models: int = DEFAULT_MODELS):
+        super().__init__(ProviderConfig(name=provider_id, status="active"))
+        self.provider_id = provider_id
+        self.tokens = tokens
+        self.token_delay = token_ms / 1000
+        self.model_count = models
+
+    async def initialize(self) -> None:
+        pass
+
+    async def get_models(self) -> List[ModelInfo]:
+        return [ModelInfo(id=f"m{i}", name=f"m{i}", provider=self.provider_id) for i in range(self.model_count)]
+
+    async def stream_chat(self, model_id: str, messages: List[Message], **kwargs):
+        tag = f"{self.provider_id}/{model_id}"
+        tokens = int(kwargs.get("tokens", self.tokens))
+        delay = float(kwargs.get("token_ms", self.token_delay * 1000)) / 1000
+        for _ in range(tokens):
+            await asyncio.sleep(delay)
+            yield f"{tag} "
+
+    async def check_health(self) -> bool:
+        return True
@@ -1,6 +1,6 @@
 from enum import Enum
 from typing import List, Optional, Any, Dict
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field
 from datetime import datetime
 
 class Role(str, Enum):
@@ -24,10 +24,16 @@ class ModelInfo(BaseModel):
     name: str
     provider: str
     capabilities: List[ModelCapability] = [ModelCapability.CHAT]
-    context_window: Optional[int] = None
+    # Plugins historically pass `context_length=` - accept both spellings
+    context_window: Optional[int] = Field(default=None, validation_alias=AliasChoices("context_window", "context_length"))
     max_tokens: Optional[int] = None
     provider_id: Optional[str] = None
 
+    @property
+    def is_chat_model(self) -> bool:
+        """Selectable as chat model (embedding-only models are not)"""
+        return ModelCapability.CHAT in self.capabilities
+
 class ProviderConfig(BaseModel):
     name: str
     api_key: Optional[str] = None
@@ -35,3 +41,4 @@ class ProviderConfig(BaseModel):
     enabled: bool = True
     init_error: Optional[str] = None  # Speichert Fehler wie "API Key missing"
     status: Optional[str] = "unknown"  # Runtime validation state
+    options: Dict[str, Any] = Field(default_factory=dict)  # Provider-specific settings from provider_config.json
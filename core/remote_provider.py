@@ -0,0 +1,295 @@
+"""
+Remote Provider (Plugin Isolation Mode)
+Proxy that runs a plugin inside a supervised worker subprocess.
+
+The UI event loop only does socket I/O - blocking SDK calls or crashes inside
+the plugin can no longer freeze or take down the app. A dead worker is
+restarted (with backoff) on the next request and re-initialized with the
+last known config.
+"""
+import asyncio
+import itertools
+import os
+import secrets
+import socket
+import subprocess
+import sys
+from typing import AsyncIterator, Dict, List, Optional
+from core.paths import resolve_resource_path
+from core.plugin_worker import encode_frame, limit_socket_buffer, read_frame
+from core.providers.base_provider import BaseLLMProvider, EmbeddingsNotSupportedError
+from core.providers.types import Message, ModelInfo, ProviderConfig
+
+
+class WorkerCrashed(RuntimeError):
+    """The worker process died while a request was running"""
+
+
+class RemoteProvider(BaseLLMProvider):
+    """Base proxy - use RemoteProvider.for_plugin() to bind it to a plugin file"""
+
+    plugin_name: str = ""
+    plugins_dir: str = ""
+
+    CONNECT_TIMEOUT = 15.0
+    REQUEST_TIMEOUT = 120.0
+    MAX_BACKOFF = 30.0
+    STREAM_QUEUE_FRAMES = 64  # Chunks buffered per stream before the socket is no longer read
+
+    @classmethod
+    def for_plugin(cls, plugin_name: str, plugins_dir: str):
+        """Create a proxy class bound to one plugin (instantiable like the real class)"""
+        class_name = "Remote" + "".join(part.title() for part in plugin_name.split("_"))
+        return type(class_name, (cls,), {
+            "plugin_name": plugin_name,
+            "plugins_dir": str(plugins_dir),
+            "__doc__": f"Isolated worker proxy for plugin '{plugin_name}'",
+        })
+
+    def __init__(self, config: ProviderConfig):
+        super().__init__(config)
+        self.process: Optional[subprocess.Popen] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Queue] = {}
+        self._ids = itertools.count(1)
+        self._start_lock = asyncio.Lock()
+        self._restarts = 0
+        self._initialized = False
+        self._supports_embeddings = True  # Unknown until the worker answered "init"
+
+    # --- Supervision ---------------------------------------------------------
+
+    @property
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None and self._writer is not None
+
+    async def _ensure_worker(self):
+        if self.is_running:
+            return
+        async with self._start_lock:
+            if self.is_running:
+                return
+            await self._teardown()
+
+            if self._restarts:
+                delay = min(2 ** (self._restarts - 1), self.MAX_BACKOFF)
+                print(f"[WORKER] Restarting '{self.plugin_name}' in {delay:.0f}s (restart #{self._restarts})")
+                await asyncio.sleep(delay)
+
+            self._restarts += 1  # Before spawning: a worker that never connects backs off as well
+            await self._spawn()
+
+            # Re-apply the last config after a crash so the worker is usable again
+            if self._initialized:
+                await self._call("init", config=self.config.model_dump(mode="json"))
+
+    async def _spawn(self):
+        token = secrets.token_hex(16)
+        connected = asyncio.get_running_loop().create_future()
+
+        async def on_connect(reader, writer):
+            try:
+                hello = await asyncio.wait_for(read_frame(reader), self.CONNECT_TIMEOUT)
+            except Exception:
+                hello = None
+            if connected.done() or not hello or hello.get("token") != token:
+                writer.close()  # Unknown client on our port
+                return
+            limit_socket_buffer(writer, socket.SO_RCVBUF)
+            connected.set_result((reader, writer))
+
+        self._server = await asyncio.start_server(on_connect, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+
+        # Popen instead of asyncio subprocesses: works with every event loop policy
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "core.plugin_worker",
+             "--plugin", self.plugin_name,
+             "--plugins-dir", self.plugins_dir,
+             "--port", str(port),
+             "--token", token],
+            cwd=resolve_resource_path(""),
+            env=dict(os.environ),
+        )
+
+        try:
+            self._reader, self._writer = await asyncio.wait_for(connected, self.CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            await self._teardown()
+            raise WorkerCrashed(f"Worker for '{self.plugin_name}' did not connect")
+
+        self._dispatch_task = asyncio.create_task(self._dispatch())
+        print(f"[WORKER] '{self.plugin_name}' running in PID {self.process.pid}")
+
+    async def _dispatch(self):
+        """
+        Route response frames to the waiting request queues. Stream queues are bounded:
+        while one is full the socket is not read, so the worker's drain() blocks and
+        generation pauses until the consumer catches up (back-pressure).
+        """
+        try:
+            while True:
+                frame = await read_frame(self._reader)
+                if frame is None:
+                    break
+                queue = self._pending.get(frame.get("id"))
+                if queue is not None:
+                    await queue.put(frame)
+        except (ConnectionError, ValueError) as e:
+            print(f"[WORKER] Connection to '{self.plugin_name}' broken: {e}")
+        finally:
+            # Worker gone: fail everything that is still waiting
+            crash = {"type": "crashed", "data": f"Plugin worker '{self.plugin_name}' crashed"}
+            for queue in self._pending.values():
+                if queue.full():
+                    queue.get_nowait()  # The stream fails anyway - make room for the crash frame
+                queue.put_nowait(crash)
+            self._writer = None
+
+    async def _teardown(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                await asyncio.to_thread(self.process.wait, 5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+    # --- Request plumbing ----------------------------------------------------
+
+    def _send(self, req_id: int, op: str, **args):
+        if self._writer is None:
+            raise WorkerCrashed(f"Plugin worker '{self.plugin_name}' is not running")
+        self._writer.write(encode_frame({"id": req_id, "op": op, "args": args}))
+
+    async def _call(self, op: str, **args):
+        req_id = next(self._ids)
+        queue: asyncio.Queue = asyncio.Queue()
+        self._pending[req_id] = queue
+        try:
+            self._send(req_id, op, **args)
+            frame = await asyncio.wait_for(queue.get(), self.REQUEST_TIMEOUT)
+        finally:
+            self._pending.pop(req_id, None)
+
+        if frame["type"] == "crashed":
+            raise WorkerCrashed(frame["data"])
+        if frame["type"] == "error":
+            raise RuntimeError(frame["data"])
+        self._restarts = 0  # Healthy round-trip resets the backoff
+        return frame.get("data")
+
+    # --- BaseLLMProvider API -------------------------------------------------
+
+    async def initialize(self) -> None:
+        self.config.init_error = None
+        try:
+            await self._ensure_worker()
+            data = await self._call("init", config=self.config.model_dump(mode="json"))
+            self._initialized = True
+            # Mirror state that the plugin set on its side (init_error, status, ...)
+            self.config.init_error = data.get("init_error")
+            self.config.status = data.get("status", self.config.status)
+            self._supports_embeddings = data.get("supports_embeddings", True)
+        except Exception as e:
+            self.config.init_error = f"Worker failed: {e}"
+            print(f"[ERR] Isolated plugin '{self.plugin_name}' failed to initialize: {e}")
+
+    async def get_models(self) -> List[ModelInfo]:
+        await self._ensure_worker()
+        return [ModelInfo(**m) for m in await self._call("get_models")]
+
+    async def get_available_models(self) -> List[ModelInfo]:
+        return await self.get_models()
+
+    async def check_health(self) -> bool:
+        try:
+            await self._ensure_worker()
+            return bool(await self._call("check_health"))
+        except Exception:
+            return False
+
+    async def preload_model(self, model_id: str) -> None:
+        await self._ensure_worker()
+        await self._call("preload_model", model_id=model_id)
+
+    @property
+    def supports_embeddings(self) -> bool:
+        return self._supports_embeddings
+
+    async def embed(self, model_id: str, texts: List[str]) -> List[List[float]]:
+        await self._ensure_worker()
+        try:
+            return await self._call("embed", model_id=model_id, texts=texts)
+        except RuntimeError as e:
+            # Errors cross the socket as "<type>: <message>" - keep this one distinguishable
+            prefix = f"{EmbeddingsNotSupportedError.__name__}: "
+            if not isinstance(e, WorkerCrashed) and str(e).startswith(prefix):
+                raise EmbeddingsNotSupportedError(str(e)[len(prefix):]) from None
+            raise
+
+    async def stream_chat(self, model_id: str, messages: List[Message], **kwargs) -> AsyncIterator[str]:
+        await self._ensure_worker()
+
+        req_id = next(self._ids)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.STREAM_QUEUE_FRAMES)
+        self._pending[req_id] = queue
+        finished = False
+        try:
+            self._send(
+                req_id, "stream_chat",
+                model_id=model_id,
+                messages=[m.model_dump(mode="json") for m in messages],
+                kwargs=kwargs,
+            )
+            while True:
+                frame = await asyncio.wait_for(queue.get(), self.REQUEST_TIMEOUT)
+                kind = frame["type"]
+                if kind == "chunk":
+                    yield frame["data"]
+                elif kind == "meta":
+                    self.report_metadata(**frame["data"])
+                elif kind == "end":
+                    finished = True
+                    break
+                elif kind == "crashed":
+                    finished = True
+                    raise WorkerCrashed(frame["data"])
+                else:
+                    finished = True
+                    raise RuntimeError(frame["data"])
+        finally:
+            self._pending.pop(req_id, None)
+            while not queue.empty():
+                queue.get_nowait()  # Releases _dispatch if it is waiting to put into this (abandoned) queue
+            if not finished and self._writer is not None:
+                # Consumer stopped early -> stop generating on the worker side too
+                try:
+                    self._send(next(self._ids), "cancel", target=req_id)
+                except Exception:
+                    pass
+
+    async def shutdown(self) -> None:
+        if self._writer is not None:
+            try:
+                self._send(next(self._ids), "shutdown")
+                await self._writer.drain()
+            except Exception:
+                pass
+        if self.process is not None:
+            try:
+                await asyncio.to_thread(self.process.wait, 5)
+            except subprocess.TimeoutExpired:
+                pass
+        await self._teardown()
+        if self._dispatch_task is not None:
+            self._dispatch_task.cancel()
@@ -0,0 +1,204 @@
+"""
+Semantic Response Cache
+Finds earlier prompts that MEAN the same as the current one (embedding similarity)
+and either serves their answer directly or attaches it as a suggestion.
+
+Scope: single-turn requests only (system prompts + one user message) - a follow-up
+question depends on the conversation, so the same words don't imply the same answer.
+Entries are scoped by provider, model and system prompts.
+
+Storage (~/.yat):
+    semantic_cache.db               prompts, answers, LRU bookkeeping
+    semantic_cache.vec/.ids/.json   float16 vector index (see core/vector_index.py)
+
+Settings (user_settings.json, all optional):
+    semantic_cache_enabled             bool   Turn the feature on (default: off)
+    semantic_cache_embedder            str    "local" or "provider_id|model_id" (default: local)
+    semantic_cache_serve_threshold     float  Similarity to answer from cache (default: 0.95)
+    semantic_cache_suggest_threshold   float  Similarity to suggest the old answer (default: 0.85)
+    semantic_cache_max_entries         int    Bound for entries/vectors (default: 2000)
+"""
+import hashlib
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from core.embeddings import Embedder
+from core.paths import get_worker_data_path
+from core.sqlite_utils import connect
+from core.providers.types import Message, Role
+from core.vector_index import VectorIndex
+
+DEFAULT_SERVE_THRESHOLD = 0.95
+DEFAULT_SUGGEST_THRESHOLD = 0.85
+DEFAULT_MAX_ENTRIES = 2000
+SEARCH_CANDIDATES = 8  # Top-k before scope filtering
+
+
+@dataclass
+class SemanticMatch:
+    entry_id: int
+    score: float
+    prompt: str
+    content: str
+    created_at: float
+    hit_count: int
+    serve: bool  # True: similar enough to answer from cache, False: suggestion only
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        embedder: Embedder,
+        serve_threshold: float = DEFAULT_SERVE_THRESHOLD,
+        suggest_threshold: float = DEFAULT_SUGGEST_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        db_path: Optional[str] = None,
+        index_path: Optional[str] = None
+    ):
+        self.embedder = embedder
+        self.serve_threshold = serve_threshold
+        self.suggest_threshold = min(suggest_threshold, serve_threshold)
+        self.max_entries = max_entries
+        self.db_path = db_path or get_worker_data_path("semantic_cache.db")
+        self.index = VectorIndex(index_path or get_worker_data_path("semantic_cache"), name=embedder.name, dtype="float16")
+        self.stats = {"lookups": 0, "served": 0, "suggested": 0, "misses": 0, "skipped": 0,
+                      "embed_ms": 0.0, "search_ms": 0.0}
+        self.init_database()
+
+    def init_database(self):
+        conn = connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scope TEXT,
+                embedder TEXT,
+                prompt TEXT,
+                content TEXT,
+                created_at REAL,
+                last_used REAL,
+                hit_count INTEGER DEFAULT 0
+            )
+        """)
+        # Rows from another embedder have no vectors in the (rebuilt) index
+        conn.execute("DELETE FROM semantic_cache WHERE embedder != ?", (self.embedder.name,))
+        conn.commit()
+        known = {row[0] for row in conn.execute("SELECT id FROM semantic_cache")}
+        conn.close()
+
+        # Drop vectors whose row is gone and rows whose vector is gone (e.g. crash between writes)
+        self.index.remove([i for i in self.index.ids() if i not in known])
+        orphans = [i for i in known if i not in self.index]
+        if orphans:
+            self._delete_rows(orphans)
+
+    # --- Helpers ---------------------------------------------------------------
+
+    @staticmethod
+    def _prompt_and_scope(provider_id: str, model_id: str, messages: List[Message]):
+        """(prompt, scope) for cacheable single-turn requests, else (None, None)"""
+        conversation = [m for m in messages if m.role != Role.SYSTEM]
+        if len(conversation) != 1 or conversation[0].role != Role.USER:
+            return None, None
+        system = "\n".join(m.content for m in messages if m.role == Role.SYSTEM)
+        scope = hashlib.sha256(f"{provider_id}\n{model_id}\n{system}".encode("utf-8")).hexdigest()
+        return conversation[0].content.strip(), scope
+
+    def _delete_rows(self, ids: List[int]):
+        conn = connect(self.db_path)
+        conn.executemany("DELETE FROM semantic_cache WHERE id = ?", [(i,) for i in ids])
+        conn.commit()
+        conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Keep at most max_entries (least recently used go first)"""
+        rows = conn.execute("""
+            SELECT id FROM semantic_cache
+            ORDER BY last_used DESC
+            LIMIT -1 OFFSET ?
+        """, (self.max_entries,)).fetchall()
+        if rows:
+            ids = [row[0] for row in rows]
+            conn.executemany("DELETE FROM semantic_cache WHERE id = ?", [(i,) for i in ids])
+            self.index.remove(ids)
+
+    # --- API -------------------------------------------------------------------
+
+    async def lookup(self, provider_id: str, model_id: str, messages: List[Message]) -> Optional[SemanticMatch]:
+        """Best match above the suggest threshold (and within scope), or None"""
+        prompt, scope = self._prompt_and_scope(provider_id, model_id, messages)
+        if prompt is None:
+            self.stats["skipped"] += 1
+            return None
+        self.stats["lookups"] += 1
+
+        started = time.perf_counter()
+        query = (await self.embedder.embed([prompt]))[0]
+        searched = time.perf_counter()
+        candidates = self.index.search(query, k=SEARCH_CANDIDATES, threshold=self.suggest_threshold)
+        self.stats["embed_ms"] += (searched - started) * 1000
+        self.stats["search_ms"] += (time.perf_counter() - searched) * 1000
+
+        match = None
+        if candidates:
+            scores = dict(candidates)
+            conn = connect(self.db_path)
+            placeholders = ",".join("?" * len(scores))
+            rows = conn.execute(f"""
+                SELECT id, prompt, content, created_at, hit_count
+                FROM semantic_cache
+                WHERE scope = ? AND id IN ({placeholders})
+            """, (scope, *scores)).fetchall()
+            if rows:
+                best = max(rows, key=lambda row: scores[row[0]])
+                match = SemanticMatch(
+                    entry_id=best[0], score=scores[best[0]], prompt=best[1], content=best[2],
+                    created_at=best[3], hit_count=best[4] + 1,
+                    serve=scores[best[0]] >= self.serve_threshold
+                )
+                conn.execute("""
+                    UPDATE semantic_cache
+                    SET last_used = ?, hit_count = hit_count + 1
+                    WHERE id = ?
+                """, (time.time(), match.entry_id))
+                conn.commit()
+            conn.close()
+
+        if match is None:
+            self.stats["misses"] += 1
+        elif match.serve:
+            self.stats["served"] += 1
+        else:
+            self.stats["suggested"] += 1
+        return match
+
+    async def store(self, provider_id: str, model_id: str, messages: List[Message], content: str):
+        """Remember a complete answer for a single-turn request"""
+        prompt, scope = self._prompt_and_scope(provider_id, model_id, messages)
+        if prompt is None or not content:
+            return
+        vector = (await self.embedder.embed([prompt]))[0]
+
+        now = time.time()
+        conn = connect(self.db_path)
+        cursor = conn.execute("""
+            INSERT INTO semantic_cache (scope, embedder, prompt, content, created_at, last_used, hit_count)
+            VALUES (?, ?, ?, ?, ?, ?, 0)
+        """, (scope, self.embedder.name, prompt, content, now, now))
+        self.index.add([cursor.lastrowid], vector)
+        self._evict(conn)
+        conn.commit()
+        conn.close()
+        self.index.flush()
+
+    def get_stats(self) -> Dict:
+        """Hit-rate metrics since start plus index size"""
+        lookups = self.stats["lookups"]
+        return {
+            **{key: round(value, 1) if isinstance(value, float) else value for key, value in self.stats.items()},
+            "hit_rate": round(self.stats["served"] / lookups, 3) if lookups else None,
+            "suggest_rate": round(self.stats["suggested"] / lookups, 3) if lookups else None,
+            "avg_lookup_ms": round((self.stats["embed_ms"] + self.stats["search_ms"]) / lookups, 2) if lookups else None,
+            "entries": len(self.index),
+            "index_bytes": self.index.nbytes,
+        }
@@ -0,0 +1,147 @@
+"""
+Chat Sessions
+Per-client state for the web mode: every browser tab gets its own ChatSession
+(active model, open conversation, history, prompt queue), while the provider
+instances, caches and indexes in LLMManager are shared by all sessions.
+
+- SessionLLM is the LLMManager as one session sees it: same providers, but its
+  own active_provider_id/active_model_id. Switching the model in one tab never
+  changes it for another one.
+- SessionManager bounds the number of concurrent sessions (max_sessions) and
+  cancels a session's background tasks when its client is gone. Sessions whose
+  client lost its connection (detached, may still reconnect) are given up first
+  when the limit is reached, so a reloaded page is never turned away.
+
+Settings (user_settings.json, all optional):
+    max_sessions    int    Concurrent browser sessions, 0 = unlimited (default: 20)
+"""
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional
+from .llm_manager import LLMManager
+from .providers.types import Message, ModelInfo
+
+DEFAULT_MAX_SESSIONS = 20
+
+
+class SessionLimitError(RuntimeError):
+    """Raised by SessionManager.open() when max_sessions are already open"""
+
+
+class SessionLLM:
+    """
+    View on the shared LLMManager with a session-local model selection.
+    Everything not overridden here (providers, caches, swap_provider, ...) is the shared manager's.
+    """
+
+    def __init__(self, manager: LLMManager):
+        self.manager = manager
+        # New sessions start with the startup default (restored from user_settings.json)
+        self.active_provider_id: Optional[str] = manager.active_provider_id
+        self.active_model_id: Optional[str] = manager.active_model_id
+
+    def __getattr__(self, name):
+        return getattr(self.manager, name)
+
+    async def get_available_models(self) -> List[ModelInfo]:
+        return await self.manager.get_available_models(self.active_provider_id)
+
+    def get_token_counter(self, provider_id: Optional[str] = None):
+        return self.manager.get_token_counter(provider_id or self.active_provider_id)
+
+    def count_tokens(self, message: Message, provider_id: Optional[str] = None) -> int:
+        return self.manager.count_tokens(message, provider_id or self.active_provider_id)
+
+    def stream_chat(self, message_history: List[Message], provider_id: str = None, model_id: str = None, **kwargs):
+        return self.manager.stream_chat(
+            message_history,
+            provider_id or self.active_provider_id,
+            model_id or self.active_model_id,
+            **kwargs
+        )
+
+
+class ChatSession:
+    """State of one client: model selection, open conversation and its prompt queue"""
+
+    def __init__(self, session_id: str, manager: LLMManager):
+        self.id = session_id
+        self.llm = SessionLLM(manager)
+        self.created_at = time.time()
+
+        self.conversation_id: Optional[str] = None
+        self.message_history: List[Message] = []
+        self.summary: Optional[Dict] = None  # Rolling summary (see core/summarizer.py)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.detached_at: Optional[float] = None  # Client disconnected (see SessionManager.detach)
+        self._tasks: set = set()
+
+    def reset(self):
+        """Start a new chat"""
+        self.conversation_id = None
+        self.message_history = []
+        self.summary = None
+
+    def start_task(self, coro) -> asyncio.Task:
+        """Background task owned by this session (cancelled on close)"""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+
+
+class SessionManager:
+    def __init__(self, llm_manager: LLMManager, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.llm_manager = llm_manager
+        self.max_sessions = max_sessions
+        self.sessions: Dict[str, ChatSession] = {}
+        self.peak_sessions = 0
+        self.evicted_sessions = 0  # Detached sessions closed early to make room
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def open(self, session_id: Optional[str] = None) -> ChatSession:
+        """New session; at max_sessions the longest detached one is closed, SessionLimitError if there is none"""
+        if self.max_sessions and len(self.sessions) >= self.max_sessions:
+            detached = [s for s in self.sessions.values() if s.detached_at is not None]
+            if not detached:
+                raise SessionLimitError(f"Too many open sessions ({len(self.sessions)}/{self.max_sessions})")
+            self.close(min(detached, key=lambda s: s.detached_at).id)
+            self.evicted_sessions += 1
+        session = ChatSession(session_id or str(uuid.uuid4()), self.llm_manager)
+        self.sessions[session.id] = session
+        self.peak_sessions = max(self.peak_sessions, len(self.sessions))
+        return session
+
+    def detach(self, session_id: str):
+        """Client disconnected: the session stays until closed, but may be given up for a new one"""
+        session = self.sessions.get(session_id)
+        if session is not None and session.detached_at is None:
+            session.detached_at = time.time()
+
+    def attach(self, session_id: str):
+        """Client (re)connected"""
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.detached_at = None
+
+    def close(self, session_id: str):
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+
+    def get_stats(self) -> Dict:
+        return {
+            "sessions": len(self.sessions),
+            "peak_sessions": self.peak_sessions,
+            "detached_sessions": sum(1 for s in self.sessions.values() if s.detached_at is not None),
+            "evicted_sessions": self.evicted_sessions,
+            "max_sessions": self.max_sessions,
+            "active_streams": self.llm_manager.active_stream_count,
+        }
@@ -0,0 +1,29 @@
+"""
+SQLite Connections
+One place that opens all of Y.A.T.'s SQLite files, set up for several processes
+writing at once (multi-worker web mode, see core/cluster.py):
+
+- WAL journal: readers never block the writer and vice versa
+- busy timeout: a writer waits for the lock instead of failing with "database is locked"
+- synchronous=NORMAL: safe with WAL, avoids an fsync per commit
+"""
+import sqlite3
+import threading
+
+BUSY_TIMEOUT_S = 10.0
+
+_wal_paths: set = set()  # journal_mode is stored in the file, setting it once per process is enough
+_wal_lock = threading.Lock()
+
+
+def connect(db_path: str, timeout: float = BUSY_TIMEOUT_S) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=timeout)
+    if db_path not in _wal_paths:
+        with _wal_lock:
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                _wal_paths.add(db_path)
+            except sqlite3.OperationalError as e:
+                print(f"[WARN] WAL not available for {db_path}: {e}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,154 @@
+"""
+Rolling Conversation Summarizer
+Folds older turns into a persisted summary so the prompt stays near-constant in size.
+
+Settings (user_settings.json, all optional):
+    summarize_enabled       bool   Turn the feature on (default: off)
+    summary_model           str    "provider_id|model_id" of a cheap model (default: the chat model)
+    summary_target_tokens   int    Prompt size to aim for per turn (default: 4000)
+"""
+from typing import Dict, List, Optional
+from core.llm_manager import LLMManager
+from core.providers.types import Message, Role
+from core.token_budget import input_budget
+from core.user_config import UserConfig
+
+DEFAULT_TARGET_TOKENS = 4000
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a chat between a user and an AI assistant. "
+    "Merge the previous summary (if any) with the new transcript excerpt into ONE updated summary. "
+    "Keep facts, decisions, open questions, names, numbers and code identifiers. "
+    "Drop pleasantries. Write compact bullet points, no preamble."
+)
+
+
+class ConversationSummarizer:
+    def __init__(self, llm_manager: LLMManager, storage):
+        self.llm_manager = llm_manager
+        self.storage = storage  # storage.base.ChatStorage
+        self._running: set = set()  # Conversation IDs with a summary job in flight
+
+    # --- Settings --------------------------------------------------------------
+
+    @property
+    def enabled(self) -> bool:
+        return bool(UserConfig.get('summarize_enabled', False))
+
+    @property
+    def target_tokens(self) -> int:
+        try:
+            return int(UserConfig.get('summary_target_tokens', DEFAULT_TARGET_TOKENS))
+        except (TypeError, ValueError):
+            return DEFAULT_TARGET_TOKENS
+
+    def _summary_model(self):
+        """(provider_id, model_id) used for summarizing - falls back to the chat model"""
+        value = UserConfig.get('summary_model')
+        if value and '|' in value:
+            pid, mid = value.split('|', 1)
+            if pid in self.llm_manager.providers:
+                return pid, mid
+        return self.llm_manager.active_provider_id, self.llm_manager.active_model_id
+
+    # --- Prompt composition ----------------------------------------------------
+
+    @staticmethod
+    def compose(history: List[Message], summary: Optional[Dict]) -> List[Message]:
+        """System messages + summary + all turns the summary does not cover yet"""
+        system_msgs = [m for m in history if m.role == Role.SYSTEM]
+        conversation = [m for m in history if m.role != Role.SYSTEM]
+        if not summary or not summary.get("content"):
+            return system_msgs + conversation
+
+        summary_msg = Message(
+            role=Role.SYSTEM,
+            content=f"Summary of the earlier conversation:\n{summary['content']}",
+            metadata={"summary": True}
+        )
+        return system_msgs + [summary_msg] + conversation[summary.get("covered_messages", 0):]
+
+    # --- Folding ---------------------------------------------------------------
+
+    def _messages_to_fold(self, conversation: List[Message], covered: int) -> int:
+        """
+        How many of the uncovered messages to fold now (0 = nothing to do).
+        We fold once the uncovered tail exceeds the target, and fold until only
+        about half the target remains - that way summaries run every few turns, not every turn.
+        """
+        counter = self.llm_manager.get_token_counter()
+        tail = conversation[covered:]
+        tail_tokens = [counter.count_message(m) for m in tail]
+        if sum(tail_tokens) <= self.target_tokens:
+            return 0
+
+        keep_budget = self.target_tokens // 2
+        kept, fold = 0, len(tail)
+        for tokens in reversed(tail_tokens):
+            if kept + tokens > keep_budget or fold <= 2:
+                break
+            kept += tokens
+            fold -= 1
+
+        # Never split a user question from its answer
+        while fold > 0 and tail[fold - 1].role == Role.USER:
+            fold -= 1
+        return fold
+
+    async def maybe_summarize(self, conversation_id: str, history: List[Message], summary: Optional[Dict]) -> Optional[Dict]:
+        """Fold older turns into the summary if the budget is exceeded. Returns the new summary or None."""
+        if not self.enabled or not conversation_id or conversation_id in self._running:
+            return None
+
+        conversation = [m for m in history if m.role != Role.SYSTEM]
+        covered = (summary or {}).get("covered_messages", 0)
+        fold = self._messages_to_fold(conversation, covered)
+        if fold <= 0:
+            return None
+
+        pid, mid = self._summary_model()
+        if not pid or not mid:
+            return None
+
+        # Don't overflow the summarizer itself: cap the excerpt to its input budget
+        counter = self.llm_manager.get_token_counter(pid)
+        excerpt_budget = int(input_budget(self.llm_manager.get_model_info(pid, mid)) * 0.8)
+        excerpt, used = [], counter.count_text((summary or {}).get("content", ""))
+        for msg in conversation[covered:covered + fold]:
+            used += counter.count_message(msg)
+            if excerpt and used > excerpt_budget:
+                break
+            excerpt.append(msg)
+
+        self._running.add(conversation_id)
+        try:
+            transcript = "\n\n".join(f"{m.role.value.upper()}: {m.content}" for m in excerpt)
+            prompt = [
+                Message(role=Role.SYSTEM, content=SUMMARY_INSTRUCTIONS),
+                Message(role=Role.USER, content=(
+                    f"PREVIOUS SUMMARY:\n{(summary or {}).get('content') or '(none)'}\n\n"
+                    f"NEW TRANSCRIPT EXCERPT:\n{transcript}"
+                )),
+            ]
+
+            content = ""
+            async for chunk in self.llm_manager.stream_chat(prompt, provider_id=pid, model_id=mid,
+                                                             use_cache=False, use_retrieval=False):
+                content += chunk
+            content = content.strip()
+            if not content or content.startswith("Error:"):
+                print(f"[SUMMARY] Failed for {conversation_id}: {content[:200]}")
+                return None
+
+            new_summary = {
+                "content": content,
+                "covered_messages": covered + len(excerpt),
+                "token_count": counter.count_text(content),
+                "model": f"{pid}|{mid}",
+            }
+            await self.storage.save_summary(conversation_id, **new_summary)
+            print(f"[SUMMARY] {conversation_id}: folded {len(excerpt)} message(s), "
+                  f"summary ~{new_summary['token_count']} tokens")
+            return new_summary
+        finally:
+            self._running.discard(conversation_id)
@@ -0,0 +1,108 @@
+"""
+Token Budgeting
+Counts tokens per message (cached in message metadata) and builds the request
+context from a sliding window that fits into the model's context window.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from core.providers.types import Message, ModelInfo, Role
+
+DEFAULT_CONTEXT_WINDOW = 8192     # Used when a provider doesn't report one
+DEFAULT_OUTPUT_RESERVE = 2000     # Matches the max_tokens default of the plugins
+MESSAGE_OVERHEAD_TOKENS = 4       # Role markers / separators per message
+SAFETY_MARGIN = 0.05              # Estimators are not exact - keep some headroom
+
+# Average characters per token when no real tokenizer is available
+CHARS_PER_TOKEN = {
+    "anthropic": 3.5,
+    "google": 4.0,
+    "ollama": 3.8,
+}
+
+
+class TokenCounter:
+    """Counts tokens for one provider family; uses tiktoken if installed, else estimates"""
+
+    def __init__(self, provider_id: str = ""):
+        self.provider_id = provider_id
+        self._encoding = None
+        self.name = f"estimate:{self.chars_per_token}"
+
+        # OpenAI-compatible APIs: an exact BPE count is cheap if tiktoken is available
+        if provider_id in ("openai", "groq", "deepseek", "mistral"):
+            try:
+                import tiktoken
+                self._encoding = tiktoken.get_encoding("o200k_base" if provider_id == "openai" else "cl100k_base")
+                self.name = f"tiktoken:{self._encoding.name}"
+            except Exception:
+                self._encoding = None  # Optional dependency - fall back to the estimate
+
+    @property
+    def chars_per_token(self) -> float:
+        return CHARS_PER_TOKEN.get(self.provider_id, 4.0)
+
+    def count_text(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return int(len(text) / self.chars_per_token) + 1
+
+    def count_message(self, message: Message) -> int:
+        """Token count of a message, cached in message.metadata['tokens']"""
+        cached = message.metadata.get("tokens")
+        if (isinstance(cached, dict) and cached.get("counter") == self.name
+                and cached.get("chars") == len(message.content)):
+            return cached["count"]
+
+        count = self.count_text(message.content) + MESSAGE_OVERHEAD_TOKENS
+        message.metadata["tokens"] = {"counter": self.name, "count": count, "chars": len(message.content)}
+        return count
+
+
+@dataclass
+class ContextWindow:
+    """Result of fitting a history into a token budget"""
+    messages: List[Message]
+    input_tokens: int
+    budget: int
+    dropped: int = 0
+    stats: Dict = field(default_factory=dict)
+
+
+def input_budget(model: Optional[ModelInfo]) -> int:
+    """Tokens available for the prompt: context window minus reserved output and margin"""
+    context_window = (model.context_window if model else None) or DEFAULT_CONTEXT_WINDOW
+    output_reserve = (model.max_tokens if model else None) or DEFAULT_OUTPUT_RESERVE
+    output_reserve = min(output_reserve, context_window // 2)
+    return int((context_window - output_reserve) * (1 - SAFETY_MARGIN))
+
+
+def fit_context(messages: List[Message], counter: TokenCounter, budget: int) -> ContextWindow:
+    """
+    Sliding window: keep every system message plus as many of the NEWEST turns as
+    fit into `budget`. The newest message is always kept (nothing useful to send without it).
+    """
+    system_msgs = [m for m in messages if m.role == Role.SYSTEM]
+    conversation = [m for m in messages if m.role != Role.SYSTEM]
+
+    used = sum(counter.count_message(m) for m in system_msgs)
+    kept: List[Message] = []
+    for msg in reversed(conversation):
+        tokens = counter.count_message(msg)
+        if kept and used + tokens > budget:
+            break
+        kept.append(msg)
+        used += tokens
+    kept.reverse()
+
+    # A window must not start with an assistant turn (several APIs reject that)
+    while len(kept) > 1 and kept[0].role == Role.ASSISTANT:
+        used -= counter.count_message(kept.pop(0))
+
+    return ContextWindow(
+        messages=system_msgs + kept,
+        input_tokens=used,
+        budget=budget,
+        dropped=len(conversation) - len(kept),
+    )
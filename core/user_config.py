@@ -1,13 +1,34 @@
+import atexit
 import json
 import os
-from typing import Any, Dict
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
 from .paths import get_data_path
 
 SETTINGS_FILE = get_data_path("user_settings.json")
 
+FLUSH_DELAY = 0.5      # Seconds to coalesce saves before writing
+CHECK_INTERVAL = 1.0   # Seconds between mtime checks for external edits
+
+
 class UserConfig:
+    """
+    Settings store: loaded once and kept in memory.
+    - get() serves from memory; external edits are picked up via an mtime check
+    - save() updates memory immediately, the file is written debounced in the background
+    - writes are atomic (temp file + os.replace), so readers never see half a file
+    """
+    _settings: Optional[Dict[str, Any]] = None
+    _mtime: Optional[float] = None
+    _last_check = 0.0
+    _pending: Dict[str, Any] = {}   # Saved but not yet written
+    _timer: Optional[threading.Timer] = None
+    _lock = threading.RLock()
+
     @staticmethod
-    def load() -> Dict[str, Any]:
+    def _read_file() -> Dict[str, Any]:
         if not os.path.exists(SETTINGS_FILE):
             return {}
         try:
@@ -18,16 +39,83 @@ class UserConfig:
             return {}
 
     @staticmethod
-    def save(key: str, value: Any) -> None:
-        settings = UserConfig.load()
-        settings[key] = value
+    def _file_mtime() -> Optional[float]:
         try:
-            with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-                json.dump(settings, f, indent=2)
-        except Exception as e:
-            print(f"Error saving settings: {e}")
+            return os.stat(SETTINGS_FILE).st_mtime
+        except OSError:
+            return None
+
+    @classmethod
+    def _ensure_loaded(cls) -> Dict[str, Any]:
+        with cls._lock:
+            now = time.monotonic()
+            if cls._settings is not None and now - cls._last_check < CHECK_INTERVAL:
+                return cls._settings
+            cls._last_check = now
+
+            mtime = cls._file_mtime()
+            if cls._settings is None or mtime != cls._mtime:
+                # (Re)load; unsaved local changes win over the file
+                settings = cls._read_file()
+                settings.update(cls._pending)
+                cls._settings, cls._mtime = settings, mtime
+            return cls._settings
+
+    @staticmethod
+    def load() -> Dict[str, Any]:
+        return dict(UserConfig._ensure_loaded())
+
+    @staticmethod
+    def save(key: str, value: Any) -> None:
+        cls = UserConfig
+        with cls._lock:
+            cls._ensure_loaded()[key] = value
+            cls._pending[key] = value
+            if cls._timer is not None:
+                cls._timer.cancel()
+            cls._timer = threading.Timer(FLUSH_DELAY, cls.flush)
+            cls._timer.daemon = True
+            cls._timer.start()
 
     @staticmethod
     def get(key: str, default: Any = None) -> Any:
-        settings = UserConfig.load()
-        return settings.get(key, default)
+        return UserConfig._ensure_loaded().get(key, default)
+
+    @staticmethod
+    def flush() -> None:
+        """Write pending changes now (merged onto the current file, atomically)"""
+        cls = UserConfig
+        with cls._lock:
+            if cls._timer is not None:
+                cls._timer.cancel()
+                cls._timer = None
+            if not cls._pending:
+                return
+
+            # Merge onto what's on disk: another process may have written other keys meanwhile
+            settings = cls._read_file() if cls._file_mtime() != cls._mtime else dict(cls._settings or {})
+            settings.update(cls._pending)
+
+            try:
+                directory = os.path.dirname(SETTINGS_FILE)
+                fd, tmp_path = tempfile.mkstemp(prefix=".user_settings.", suffix=".tmp", dir=directory)
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        json.dump(settings, f, indent=2)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, SETTINGS_FILE)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+            except Exception as e:
+                print(f"Error saving settings: {e}")
+                return
+
+            cls._settings, cls._pending = settings, {}
+            cls._mtime = cls._file_mtime()
+
+
+# Don't lose debounced writes on exit
+atexit.register(UserConfig.flush)
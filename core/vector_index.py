@@ -0,0 +1,220 @@
+"""
+Vector Index
+Flat, memory-mapped NumPy matrix of normalized vectors with exact top-k cosine search.
+
+Files (next to the other data in ~/.yat):
+    <base>.vec    rows x dim matrix (float32 | float16 | int8), memory-mapped
+    <base>.ids    int64 id per row (-1 = free slot), memory-mapped
+    <base>.json   dim, dtype, capacity and the embedder name
+
+Only the pages touched by a search are resident, so memory stays bounded by the
+OS page cache rather than by the index size. int8 stores components scaled by 127
+(vectors are unit length, so every component is within [-1, 1]).
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+INT8_SCALE = 127.0
+INITIAL_CAPACITY = 1024
+SEARCH_BLOCK_ROWS = 16384  # Rows converted to float32 at a time during a search
+
+
+class VectorIndex:
+    def __init__(self, base_path: str, name: str = "", dtype: str = "float16"):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        self.base_path = base_path
+        self.name = name
+        self.dtype = dtype
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._ids: Optional[np.memmap] = None
+        self._slots: Dict[int, int] = {}   # id -> row
+        self._free: List[int] = []         # Rows freed by remove(), reused first
+        self._size = 0                     # High-water mark (rows ever used)
+        self._load()
+
+    # --- Files ---------------------------------------------------------------
+
+    @property
+    def _vec_path(self) -> str:
+        return self.base_path + ".vec"
+
+    @property
+    def _ids_path(self) -> str:
+        return self.base_path + ".ids"
+
+    @property
+    def _meta_path(self) -> str:
+        return self.base_path + ".json"
+
+    def _load(self):
+        if not os.path.exists(self._meta_path):
+            return
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("name") != self.name or meta.get("dtype") != self.dtype:
+                print(f"[INDEX] {os.path.basename(self.base_path)}: embedder/dtype changed - rebuilding")
+                self.reset()
+                return
+            self.dim, self.capacity = meta["dim"], meta["capacity"]
+            self._map()
+        except Exception as e:
+            print(f"[WARN] Vector index {self.base_path} unreadable ({e}) - starting empty")
+            self.reset()
+            return
+
+        ids = np.asarray(self._ids)
+        used = np.flatnonzero(ids >= 0)
+        self._size = int(used[-1]) + 1 if len(used) else 0
+        self._slots = {int(ids[row]): int(row) for row in used}
+        self._free = [int(row) for row in np.flatnonzero(ids[:self._size] < 0)]
+
+    def _map(self):
+        self._vectors = np.memmap(self._vec_path, dtype=DTYPES[self.dtype], mode="r+", shape=(self.capacity, self.dim))
+        self._ids = np.memmap(self._ids_path, dtype=np.int64, mode="r+", shape=(self.capacity,))
+
+    def _write_meta(self):
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            json.dump({"name": self.name, "dim": self.dim, "dtype": self.dtype, "capacity": self.capacity}, f)
+
+    def _grow(self, min_capacity: int):
+        """Double the capacity (files are extended in place, then re-mapped)"""
+        new_capacity = max(INITIAL_CAPACITY, self.capacity)
+        while new_capacity < min_capacity:
+            new_capacity *= 2
+        itemsize = np.dtype(DTYPES[self.dtype]).itemsize
+
+        self.flush()
+        self._vectors = self._ids = None
+        with open(self._vec_path, "ab") as f:
+            f.truncate(new_capacity * self.dim * itemsize)
+        with open(self._ids_path, "ab") as f:
+            f.truncate(new_capacity * 8)
+
+        old_capacity, self.capacity = self.capacity, new_capacity
+        self._map()
+        self._ids[old_capacity:] = -1
+        self._write_meta()
+
+    def reset(self):
+        """Drop all vectors (e.g. after switching the embedding model)"""
+        self._vectors = self._ids = None
+        for path in (self._vec_path, self._ids_path, self._meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.dim, self.capacity, self._size = None, 0, 0
+        self._slots, self._free = {}, []
+
+    def flush(self):
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._ids.flush()
+
+    # --- Mutation ------------------------------------------------------------
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.dtype == "int8":
+            return np.clip(np.rint(vectors * INT8_SCALE), -127, 127).astype(np.int8)
+        return vectors.astype(DTYPES[self.dtype])
+
+    def add(self, ids: Iterable[int], vectors: np.ndarray):
+        """Insert or replace vectors (rows of `vectors` must be L2-normalized)"""
+        ids = [int(i) for i in ids]
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if not ids:
+            return
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Vector dim {vectors.shape[1]} != index dim {self.dim}")
+
+        rows = []
+        for item_id in ids:
+            row = self._slots.get(item_id)
+            if row is None:
+                row = self._free.pop() if self._free else self._size
+                if row == self._size:
+                    self._size += 1
+                self._slots[item_id] = row
+            rows.append(row)
+
+        if self._size > self.capacity:
+            self._grow(self._size)
+        rows = np.asarray(rows)
+        self._vectors[rows] = self._encode(vectors)
+        self._ids[rows] = ids
+
+    def remove(self, ids: Iterable[int]):
+        for item_id in ids:
+            row = self._slots.pop(int(item_id), None)
+            if row is not None:
+                self._ids[row] = -1
+                self._free.append(row)
+
+    def __contains__(self, item_id: int) -> bool:
+        return int(item_id) in self._slots
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def ids(self) -> List[int]:
+        return list(self._slots)
+
+    def get(self, ids: Iterable[int]) -> np.ndarray:
+        """Stored vectors (as float32) for the ids that are in the index"""
+        rows = [self._slots[int(i)] for i in ids if int(i) in self._slots]
+        if not rows:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        vectors = self._vectors[np.asarray(rows)].astype(np.float32)
+        return vectors / INT8_SCALE if self.dtype == "int8" else vectors
+
+    @property
+    def nbytes(self) -> int:
+        """Size on disk of the vector matrix and id column"""
+        if self.dim is None:
+            return 0
+        return self.capacity * (self.dim * np.dtype(DTYPES[self.dtype]).itemsize + 8)
+
+    # --- Search --------------------------------------------------------------
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        threshold: Optional[float] = None,
+        exclude: Optional[Iterable[int]] = None
+    ) -> List[Tuple[int, float]]:
+        """Exact top-k by cosine similarity -> [(id, score)], best first"""
+        if not self._slots or self.dim is None:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        if self.dtype == "int8":
+            query = query / INT8_SCALE
+
+        # Blocked matmul: only one block is ever converted to float32
+        scores = np.empty(self._size, dtype=np.float32)
+        for start in range(0, self._size, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, self._size)
+            np.dot(self._vectors[start:end].astype(np.float32), query, out=scores[start:end])
+
+        ids = np.asarray(self._ids[:self._size])
+        scores[ids < 0] = -np.inf
+        if exclude is not None:
+            for item_id in exclude:
+                row = self._slots.get(int(item_id))
+                if row is not None:
+                    scores[row] = -np.inf
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = [(int(ids[row]), float(scores[row])) for row in top if scores[row] > -np.inf]
+        if threshold is not None:
+            results = [(item_id, score) for item_id, score in results if score >= threshold]
+        return results
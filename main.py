@@ -3,8 +3,9 @@ Y.A.T. (Yet Another Talk) - NiceGUI Application
 Unified launcher supporting both Desktop (native window) and Web (browser) modes.
 
 Usage:
-    python main.py          # Desktop mode (default, native window via PyWebView)
-    python main.py --web    # Web mode (opens in browser)
+    python main.py                      # Desktop mode (default, native window via PyWebView)
+    python main.py --web                # Web mode (opens in browser)
+    python main.py --web --workers 4    # Web mode with 4 server processes (see core/cluster.py)
 """
 import asyncio
 import argparse
@@ -49,28 +50,109 @@ except Exception as e:
 
 # Global LLM Manager (initialized on startup)
 llm_manager = None
+plugin_watcher = None
+message_index = None  # Embedding index over chat messages (semantic search / related chats)
+session_manager = None  # Per-client sessions (own model selection + history) over the shared providers
+chat_storage = None  # Chat history backend shared by all pages (storage/base.py)
+db_maintenance = None  # Retention/archive, vacuum and ANALYZE at idle times (storage/maintenance.py)
+background_tasks: set = set()  # Strong refs to fire-and-forget startup tasks, asyncio only keeps weak ones
+
+# Seconds a disconnected tab keeps its session, for websocket reconnects of the same page (flaky
+# networks). A reload is a new client with a new session; the old one is only kept until then.
+SESSION_RECONNECT_GRACE = 10.0
+
+def run_in_background(coro):
+    """Start a startup task without awaiting it (kept alive until it is done)"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
 
 # Serve logo directory from resolved path
 app.add_static_files('/logo', resolve_path('logo'))
 
 
+def build_provider_config(plugin_name, provider_config):
+    """Transfer config details from Manager (Dataclass) to Plugin (Pydantic)"""
+    if not provider_config:
+        # Use default config if not in provider_config.json
+        return ProviderConfig(name=plugin_name)
+    
+    return ProviderConfig(
+        name=provider_config.name,
+        status=provider_config.status,
+        base_url=provider_config.config.get('base_url'),
+        api_key=os.getenv(provider_config.config.get('api_key_env', '')) if provider_config.type == 'cloud' else None,
+        options=dict(provider_config.config)
+    )
+
+
+async def hot_swap_plugin(plugin_name, provider_class):
+    """Build + initialize a reloaded plugin off to the side, then swap it in atomically"""
+    from core.provider_config_manager import get_provider_config_manager
+    
+    provider_id = plugin_name.replace('_plugin', '')
+    provider_config = get_provider_config_manager().get_provider(provider_id)
+    
+    if provider_config and not provider_config.enabled:
+        print(f"  [-] Reload skipped: {provider_id} (disabled in config)")
+        return
+    
+    new_instance = provider_class(build_provider_config(plugin_name, provider_config))
+    await new_instance.initialize()
+    
+    # Never replace a working instance with one that failed to initialize
+    old_instance = llm_manager.providers.get(provider_id)
+    if new_instance.config.init_error and old_instance and not old_instance.config.init_error:
+        await new_instance.shutdown()
+        raise RuntimeError(new_instance.config.init_error)
+    
+    # Keep the runtime-verified state of the old instance (models already validated)
+    if old_instance and old_instance.config.status == 'active' and not new_instance.config.init_error:
+        new_instance.config.status = 'active'
+    
+    await llm_manager.swap_provider(provider_id, new_instance)
+    print(f"  [+] Hot-swapped: {provider_id}")
+
+
 async def initialize_providers():
     """Initialize all providers via plugin auto-discovery"""
-    global llm_manager
+    global llm_manager, plugin_watcher, message_index, session_manager, chat_storage, db_maintenance
     
     if llm_manager is not None:
         return  # Already initialized
     
     from core.plugin_loader import PluginLoader
-    from core.provider_config_manager import ProviderConfigManager
+    from core.provider_config_manager import get_provider_config_manager
     
     llm_manager = LLMManager()
     
-    # Load provider configurations
-    config_manager = ProviderConfigManager()
+    # Opt-in exact-match response cache (repeated templates / regression prompts)
+    from core.user_config import UserConfig
+    if UserConfig.get('response_cache_enabled', False):
+        from storage.response_cache import ResponseCache, DEFAULT_MAX_ENTRIES, DEFAULT_TTL_SECONDS
+        llm_manager.response_cache = ResponseCache(
+            max_entries=int(UserConfig.get('response_cache_max_entries', DEFAULT_MAX_ENTRIES)),
+            ttl_seconds=float(UserConfig.get('response_cache_ttl_hours', DEFAULT_TTL_SECONDS / 3600)) * 3600,
+            replay_chars_per_s=float(UserConfig.get('response_cache_replay_cps', 0))
+        )
+        print(f"[OK] Response cache enabled: {llm_manager.response_cache.get_stats()['entries']} entries")
+    
+    # Provider rate limits, shared by all worker processes: {"openai": 60} = 60 requests/minute
+    rate_limits = UserConfig.get('rate_limits', {})
+    if rate_limits:
+        from storage.rate_limiter import SharedRateLimiter
+        llm_manager.rate_limiter = SharedRateLimiter(rate_limits)
+        print(f"[OK] Rate limits: {llm_manager.rate_limiter.limits}")
+    
+    # Load provider configurations (shared instance, changes are pushed to the manager)
+    config_manager = get_provider_config_manager()
+    config_manager.subscribe(llm_manager.on_provider_config_change)
     
     # Auto-discover and load plugins
-    plugin_loader = PluginLoader(plugins_dir=resolve_path("plugins"))
+    # Providers flagged "isolated": true in provider_config.json run in worker subprocesses
+    isolated_plugins = {f"{p.id}_plugin" for p in config_manager.get_all_providers() if p.isolated}
+    plugin_loader = PluginLoader(plugins_dir=resolve_path("plugins"), isolated_plugins=isolated_plugins)
     plugins = plugin_loader.load_all_plugins()
     
     print(f"\n[PLUGIN] Loaded {len(plugins)} plugin(s)")
@@ -86,17 +168,7 @@ async def initialize_providers():
             print(f"  [-] Skipped: {provider_id} (disabled in config)")
             continue
         
-        if not provider_config:
-            # Use default config if not in provider_config.json
-            provider_config_obj = ProviderConfig(name=plugin_name)
-        else:
-            # Transfer config details from Manager (Dataclass) to Plugin (Pydantic)
-            provider_config_obj = ProviderConfig(
-                name=provider_config.name,
-                status=provider_config.status,
-                base_url=provider_config.config.get('base_url'),
-                api_key=os.getenv(provider_config.config.get('api_key_env', '')) if provider_config.type == 'cloud' else None
-            )
+        provider_config_obj = build_provider_config(plugin_name, provider_config)
         
         # Create and initialize provider instance
         try:
@@ -110,9 +182,124 @@ async def initialize_providers():
         except Exception as e:
             print(f"  [X] Failed to register {plugin_name}: {e}")
     
+    # Opt-in semantic cache (needs the providers registered for provider-side embeddings)
+    if UserConfig.get('semantic_cache_enabled', False):
+        try:
+            from core.embeddings import create_embedder
+            from core.semantic_cache import SemanticCache, DEFAULT_SERVE_THRESHOLD, DEFAULT_SUGGEST_THRESHOLD, DEFAULT_MAX_ENTRIES
+            llm_manager.semantic_cache = SemanticCache(
+                create_embedder(llm_manager, UserConfig.get('semantic_cache_embedder', 'local')),
+                serve_threshold=float(UserConfig.get('semantic_cache_serve_threshold', DEFAULT_SERVE_THRESHOLD)),
+                suggest_threshold=float(UserConfig.get('semantic_cache_suggest_threshold', DEFAULT_SUGGEST_THRESHOLD)),
+                max_entries=int(UserConfig.get('semantic_cache_max_entries', DEFAULT_MAX_ENTRIES))
+            )
+            print(f"[OK] Semantic cache enabled: {llm_manager.semantic_cache.get_stats()['entries']} entries "
+                  f"({llm_manager.semantic_cache.embedder.name})")
+        except Exception as e:
+            print(f"[ERR] Semantic cache disabled: {e}")
+    
+    # Chat history backend ("sqlite" by default, "memory" or "module:Class")
+    from storage.base import create_chat_storage
+    from storage.sqlite_storage import SQLiteChatStorage
+    from storage.write_buffer import DEFAULT_FLUSH_MS, DEFAULT_MAX_PENDING
+    from storage.compression import DEFAULT_THRESHOLD
+    backend = UserConfig.get('storage_backend', 'sqlite')
+    sqlite_options = {
+        'write_behind': bool(UserConfig.get('storage_write_behind', True)),
+        'flush_ms': float(UserConfig.get('storage_flush_ms', DEFAULT_FLUSH_MS)),
+        'max_pending': int(UserConfig.get('storage_max_pending', DEFAULT_MAX_PENDING)),
+        'compress_threshold': int(UserConfig.get('compression_threshold', DEFAULT_THRESHOLD)),
+    }
+    try:
+        chat_storage = create_chat_storage(backend, sqlite_options)
+    except Exception as e:
+        print(f"[ERR] Storage backend '{backend}' failed, using sqlite: {e}")
+        chat_storage = create_chat_storage('sqlite', sqlite_options)
+    print(f"[OK] Chat storage: {type(chat_storage).__name__}")
+    try:
+        recovered = await chat_storage.recover_drafts()
+        if recovered:
+            print(f"[OK] Recovered {len(recovered)} interrupted repl{'y' if len(recovered) == 1 else 'ies'}")
+    except Exception as e:
+        print(f"[WARN] Draft recovery failed: {e}")
+    if isinstance(chat_storage, SQLiteChatStorage):
+        worker_id = os.environ.get("YAT_WORKER_ID")
+        # First compression dictionary once there is enough history (background, off the event loop).
+        # One trainer in multi-worker mode; the others load it when they first meet its dict_id.
+        async def train_dictionary():
+            try:
+                dict_id = await asyncio.to_thread(chat_storage.db.ensure_dictionary)
+                if dict_id is not None:
+                    print(f"[OK] Message compression dictionary #{dict_id}")
+            except Exception as e:
+                print(f"[WARN] Compression dictionary failed: {e}")
+        if worker_id in (None, "0"):
+            run_in_background(train_dictionary())
+        
+        # Multi-worker mode: every worker publishes its running streams, so maintenance
+        # in worker 0 only runs while no worker is streaming
+        if UserConfig.get('maintenance_enabled', True) and worker_id is not None:
+            from storage.stream_activity import StreamActivity
+            try:
+                llm_manager.stream_activity = StreamActivity(worker_id)
+                llm_manager.stream_activity.start()
+            except Exception as e:
+                print(f"[ERR] Stream activity disabled: {e}")
+        
+        # Database maintenance while no reply is streaming (one process only in multi-worker mode)
+        if UserConfig.get('maintenance_enabled', True) and worker_id in (None, "0"):
+            from storage.maintenance import (
+                DatabaseMaintenance, DEFAULT_INTERVAL_MINUTES, DEFAULT_IDLE_SECONDS, idle_without_streams
+            )
+            try:
+                db_maintenance = DatabaseMaintenance(
+                    chat_storage.db,
+                    archive_path=get_data_path("chat_archive.db"),
+                    retention_days=float(UserConfig.get('retention_days', 0)),
+                    max_conversations=int(UserConfig.get('retention_max_conversations', 0)),
+                    max_mb=float(UserConfig.get('retention_max_mb', 0)),
+                    action=UserConfig.get('retention_action', 'archive'),
+                    interval_minutes=float(UserConfig.get('maintenance_interval_minutes', DEFAULT_INTERVAL_MINUTES)),
+                    idle_seconds=float(UserConfig.get('maintenance_idle_seconds', DEFAULT_IDLE_SECONDS)),
+                    is_idle=idle_without_streams(llm_manager),
+                    # A full VACUUM locks the file for every worker - single process only
+                    allow_full_vacuum=worker_id is None
+                )
+                db_maintenance.start()
+            except Exception as e:
+                print(f"[ERR] DB maintenance disabled: {e}")
+    
+    # Semantic search over past chats (index is built incrementally + backfilled in the background)
+    if UserConfig.get('semantic_search_enabled', True) and isinstance(chat_storage, SQLiteChatStorage):
+        try:
+            from core.embeddings import create_embedder
+            from core.message_index import MessageIndex
+            message_index = MessageIndex(
+                chat_storage.db,
+                create_embedder(llm_manager, UserConfig.get('semantic_search_embedder', 'local'))
+            )
+            chat_storage.db.message_index = message_index
+            message_index.start_backfill()
+        except Exception as e:
+            print(f"[ERR] Semantic search disabled: {e}")
+    
+    # RAG: ground answers in docs/ (+ extra folders), index is built in the background
+    if UserConfig.get('rag_enabled', False):
+        try:
+            from core.embeddings import create_embedder
+            from core.doc_retriever import DocumentRetriever, DEFAULT_TOP_K, DEFAULT_MIN_SCORE
+            llm_manager.retriever = DocumentRetriever(
+                create_embedder(llm_manager, UserConfig.get('rag_embedder', 'local')),
+                paths=UserConfig.get('rag_paths', []),
+                top_k=int(UserConfig.get('rag_top_k', DEFAULT_TOP_K)),
+                min_score=float(UserConfig.get('rag_min_score', DEFAULT_MIN_SCORE))
+            )
+            llm_manager.retriever.schedule_refresh(force=True)
+        except Exception as e:
+            print(f"[ERR] Document retrieval disabled: {e}")
+    
     # Set intelligent defaults
     # Set intelligent defaults
-    from core.user_config import UserConfig
     enabled_providers = config_manager.get_enabled_providers()
     
     # Strict Config Adherence Logic
@@ -156,7 +343,7 @@ async def initialize_providers():
             
             # Try to fetch models to validate target_model_id
             try:
-                models = await provider_instance.get_available_models()
+                models = [m for m in await provider_instance.get_available_models() if m.is_chat_model]
                 if not models:
                     raise ValueError("No models available (check credentials)")
                     
@@ -165,6 +352,7 @@ async def initialize_providers():
                 else:
                     llm_manager.active_model_id = models[0].id
                 print(f"[OK] Active Model: {llm_manager.active_model_id}")
+                llm_manager.schedule_preload(active_provider_id, llm_manager.active_model_id)
                 
                 # Clear error if success AND Upgrade status to active (Verified)
                 provider_instance.config.init_error = None
@@ -180,9 +368,33 @@ async def initialize_providers():
                 provider_instance.config.init_error = error_msg
                 # Status remains "configured" (or "error" if we wanted to be strict, but init_error handles the UI red flag)
     
+    # Hot-reload: swap edited plugins without restarting (not in frozen builds)
+    if not getattr(sys, 'frozen', False):
+        from core.plugin_watcher import PluginWatcher
+        plugin_watcher = PluginWatcher(plugin_loader, hot_swap_plugin)
+        plugin_watcher.start()
+    
+    # Sessions start with the model restored above; each client then selects its own
+    from core.session import SessionManager, DEFAULT_MAX_SESSIONS
+    session_manager = SessionManager(llm_manager, max_sessions=int(UserConfig.get('max_sessions', DEFAULT_MAX_SESSIONS)))
+    
     print("[OK] Plugin-based providers initialized successfully\n")
 
 
+async def shutdown_storage():
+    """Commit buffered chat writes before the process exits"""
+    if db_maintenance is not None:
+        await db_maintenance.stop()
+    if llm_manager is not None and llm_manager.stream_activity is not None:
+        await llm_manager.stream_activity.stop()
+    if chat_storage is not None:
+        await chat_storage.close()
+        print("[OK] Chat storage flushed")
+
+
+app.on_shutdown(shutdown_storage)
+
+
 @ui.page('/', title='Y.A.T.')
 async def main_page():
     """Main application page"""
@@ -212,23 +424,83 @@ async def main_page():
     # Ensure providers are initialized
     await initialize_providers()
     
+    # One session per client: shared providers, own model selection/history/queue
+    from core.session import SessionLimitError
+    try:
+        session = session_manager.open()
+    except SessionLimitError as e:
+        print(f"[WARN] Rejected client: {e}")
+        with ui.column().classes('w-full h-screen items-center justify-center').style('background-color: var(--bg-primary);'):
+            ui.icon('hourglass_empty', size='xl').classes('text-gray-500')
+            ui.label('Y.A.T. is busy - too many open sessions. Please try again later.').classes('text-gray-400')
+        return
+    
+    client = ui.context.client
+    
+    # Detached sessions are closed after the grace period, or right away when a new page needs
+    # the slot (SessionManager.open) - so a reload at max_sessions is never rejected
+    async def release_session():
+        session_manager.detach(session.id)
+        await asyncio.sleep(SESSION_RECONNECT_GRACE)
+        if not client.has_socket_connection:
+            session_manager.close(session.id)
+    
+    client.on_connect(lambda: session_manager.attach(session.id))
+    client.on_disconnect(release_session)
+    
     # Create and build layout
-    app_layout = AppLayout(llm_manager)
+    app_layout = AppLayout(session, chat_storage, message_index=message_index)
     app_layout.build()
     
     # Initialize async components
     await app_layout.initialize_async()
 
 
-def start_web_mode():
+# Load-test endpoint (tools/load_test.py): only registered with YAT_LOADTEST=1, never in normal use
+if os.environ.get('YAT_LOADTEST') == '1':
+    from fastapi.responses import StreamingResponse
+
+    @app.get('/_loadtest/chat')
+    async def loadtest_chat(tokens: int = 200, token_ms: float = 5.0, persist: int = 1):
+        """One streamed chat through the real pipeline: LLMManager, markdown rendering per chunk, chat storage"""
+        import uuid
+        import markdown2
+        from core.providers.simulated import SimulatedProvider
+        from core.providers.types import Message, Role
+
+        await initialize_providers()
+        if 'loadtest' not in llm_manager.providers:
+            llm_manager.register_provider('loadtest', SimulatedProvider('loadtest'))
+
+        async def stream():
+            db = chat_storage if persist else None
+            conversation_id = str(uuid.uuid4())
+            user_msg = Message(role=Role.USER, content=f"load test {conversation_id}")
+            if db:
+                await db.create_conversation(conversation_id, title='Load test', provider_id='loadtest', model_id='m0')
+                await db.save_message(conversation_id, user_msg)
+            content = ''
+            async for chunk in llm_manager.stream_chat([user_msg], 'loadtest', 'm0', use_cache=False, use_retrieval=False,
+                                                       params={'tokens': tokens, 'token_ms': token_ms}):
+                content += chunk
+                markdown2.markdown(content, extras=['fenced-code-blocks', 'tables'])  # What ChatView does per chunk
+                yield chunk.encode()
+            if db:
+                await db.save_message(conversation_id, Message(role=Role.ASSISTANT, content=content))
+
+        return StreamingResponse(stream(), media_type='text/plain')
+
+
+def start_web_mode(port=8080, show=True, host=None):
     """Start in Web/Browser mode"""
-    print("[*] Starting Y.A.T. (Web Mode)...")
+    print(f"[*] Starting Y.A.T. (Web Mode, port {port})...")
     ui.run(
         title='Y.A.T.',
         dark=True,
         reload=False,
-        show=True,  # Auto-open browser
-        port=8080,
+        show=show,  # Auto-open browser
+        host=host,
+        port=port,
         binding_refresh_interval=0.1,
     )
 
@@ -291,11 +563,25 @@ if __name__ in {"__main__", "__mp_main__"}:
         action='store_true',
         help='Run in web mode (browser) instead of desktop mode (default)'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Web mode: number of server processes behind a sticky proxy (default: 1)'
+    )
+    parser.add_argument('--port', type=int, default=8080, help='Web mode: port (default: 8080)')
+    parser.add_argument('--host', default=None, help='Web mode: interface to listen on (default: NiceGUI default)')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)  # Started by core/cluster.py
     
     args = parser.parse_args()
     
     # Launch appropriate mode
-    if args.web:
-        start_web_mode()
+    if args.web and args.worker:
+        start_web_mode(port=args.port, show=False, host='127.0.0.1')  # Only reachable through the proxy
+    elif args.web and args.workers > 1:
+        from core.cluster import run_cluster
+        run_cluster(args.workers, port=args.port, host=args.host or '127.0.0.1', script=os.path.abspath(__file__))
+    elif args.web:
+        start_web_mode(port=args.port, host=args.host)
     else:
         start_desktop_mode()
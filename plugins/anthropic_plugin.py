@@ -11,6 +11,11 @@ from core.providers.types import Message, ProviderConfig, ModelInfo, Role
 class AnthropicProvider(BaseLLMProvider):
     """Anthropic Claude API Provider"""
     
+    # Prompt caching: prefixes below ~1024 tokens are not cacheable, and writing a
+    # cache entry costs extra - only place breakpoints when the prefix is worth it.
+    # (Rough estimate: 4 chars per token)
+    MIN_CACHE_CHARS = 4096
+    
     def __init__(self, config: ProviderConfig):
         super().__init__(config)
         self.client = None
@@ -103,7 +108,7 @@ class AnthropicProvider(BaseLLMProvider):
             else:
                 anthropic_messages.append({
                     "role": msg.role.value,
-                    "content": msg.content
+                    "content": [{"type": "text", "text": msg.content}]
                 })
         
         # Create streaming request
@@ -111,13 +116,58 @@ class AnthropicProvider(BaseLLMProvider):
             "model": model_id,
             "messages": anthropic_messages,
             "temperature": temperature,
-            "max_tokens": max_tokens,
-            "stream": True
+            "max_tokens": max_tokens
         }
         
         if system_message:
-            kwargs["system"] = system_message
+            kwargs["system"] = [{"type": "text", "text": system_message}]
+        
+        self._place_cache_breakpoints(kwargs)
         
         async with self.client.messages.stream(**kwargs) as stream:
             async for text in stream.text_stream:
                 yield text
+            
+            final_message = await stream.get_final_message()
+            self._report_usage(final_message.usage)
+    
+    def _place_cache_breakpoints(self, kwargs: dict):
+        """
+        Mark the stable prefix of the request as cacheable (max. 4 breakpoints per request).
+        
+        - System prompt: identical on every turn
+        - Previous user turn: the prefix that was written to the cache last turn -> read hit now
+        - Newest user turn: writes the prefix that the NEXT turn will read
+        """
+        ephemeral = {"type": "ephemeral"}
+        system_blocks = kwargs.get("system") or []
+        messages = kwargs["messages"]
+        
+        prefix_chars = sum(len(b["text"]) for b in system_blocks)
+        if system_blocks and prefix_chars >= self.MIN_CACHE_CHARS:
+            system_blocks[-1]["cache_control"] = ephemeral
+        
+        user_indices = [i for i, m in enumerate(messages) if m["role"] == "user"]
+        prefix_chars += sum(len(b["text"]) for m in messages for b in m["content"])
+        if prefix_chars < self.MIN_CACHE_CHARS:
+            return
+        
+        for i in user_indices[-2:]:
+            messages[i]["content"][-1]["cache_control"] = ephemeral
+    
+    def _report_usage(self, usage):
+        """Record token usage incl. prompt cache hits/misses in the message metadata"""
+        if usage is None:
+            return
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        uncached = getattr(usage, "input_tokens", 0) or 0
+        total_input = cache_read + cache_write + uncached
+        
+        self.report_metadata(usage={
+            "input_tokens": uncached,
+            "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+            "cache_read_input_tokens": cache_read,
+            "cache_creation_input_tokens": cache_write,
+            "cache_hit_ratio": round(cache_read / total_input, 3) if total_input else 0.0,
+        })
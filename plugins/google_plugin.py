@@ -3,20 +3,57 @@ Google Gemini Provider Plugin
 Provides integration with Google's Gemini API
 """
 import os
+import asyncio
 import logging
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
 from typing import AsyncIterator
 import google.generativeai as genai
+from google.generativeai.client import get_default_model_client
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
 from core.providers.base_provider import BaseLLMProvider
 from core.providers.types import Message, ProviderConfig, ModelInfo, Role
 
+# genai.configure() is process-wide state, shared by ALL provider instances - including the old
+# one a hot-reload keeps draining, which runs on a separate copy of this module's globals. So the
+# state lives on the SDK module:
+# - configure_lock: serializes genai.configure() across threads
+# - client_lock: held while an instance configures its key and binds a model or client to it,
+#   never across a request (a bound model/client keeps its key when another instance reconfigures)
+# - api_key: the key the SDK is configured with (skip no-op reconfigures)
+_SDK = genai.__dict__.setdefault("_yat_state", SimpleNamespace(
+    configure_lock=threading.Lock(), client_lock=asyncio.Lock(), api_key=None
+))
+
+
+def _configure_genai(api_key: str):
+    """Configure the SDK only if the key actually changed (called from worker threads)"""
+    with _SDK.configure_lock:
+        if _SDK.api_key != api_key:
+            genai.configure(api_key=api_key)
+            _SDK.api_key = api_key
+
+
 class GoogleProvider(BaseLLMProvider):
     """Google Gemini API Provider"""
     
+    MODEL_CACHE_SIZE = 16
+    
+    # Safety settings (block few)
+    SAFETY_SETTINGS = {
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+    }
+    
     def __init__(self, config: ProviderConfig):
         super().__init__(config)
         self.api_key = None
+        # LRU cache: (model_id, system_instruction, temperature, max_tokens) -> GenerativeModel
+        self._model_cache: "OrderedDict[tuple, genai.GenerativeModel]" = OrderedDict()
     
     async def initialize(self):
         """Initialize Google GenAI client"""
@@ -27,12 +64,15 @@ class GoogleProvider(BaseLLMProvider):
         if self.api_key:
             self.api_key = self.api_key.strip()
         
-        try:
-            genai.configure(api_key=self.api_key)
-            print(f"[OK] Google Provider initialized")
-        except Exception as e:
-            self.config.init_error = f"Failed to initialize: {str(e)}"
-            print(f"[ERR] Google initialization failed: {e}")
+        async with _SDK.client_lock:
+            # Models are bound to the client config they were created with
+            self._model_cache.clear()
+            try:
+                await asyncio.to_thread(_configure_genai, self.api_key)
+                print(f"[OK] Google Provider initialized")
+            except Exception as e:
+                self.config.init_error = f"Failed to initialize: {str(e)}"
+                print(f"[ERR] Google initialization failed: {e}")
     
     async def check_health(self) -> bool:
         """Check if provider is healthy"""
@@ -49,9 +89,13 @@ class GoogleProvider(BaseLLMProvider):
             
         try:
             print("  [WAIT] Fetching Google models from API...")
+            # Bind a model service client to our key under the lock (no network), then drain the
+            # blocking, paginated genai.list_models() with that client in a worker thread - outside it
+            async with _SDK.client_lock:
+                client = await asyncio.to_thread(self._model_client)
+            raw_models = await asyncio.to_thread(lambda: list(genai.list_models(client=client)))
             models = []
-            # genai.list_models() returns an iterator
-            for m in genai.list_models():
+            for m in raw_models:
                 if 'generateContent' in m.supported_generation_methods:
                     # Clean up model name (remove 'models/' prefix)
                     mid = m.name.replace('models/', '')
@@ -71,6 +115,36 @@ class GoogleProvider(BaseLLMProvider):
             print(f"  [ERR] Google model fetch failed: {e}")
             raise e  # Propagate error to make status RED
     
+    def _model_client(self):
+        """Runs in a thread: make sure our key is configured, return the SDK's model client for it"""
+        _configure_genai(self.api_key)
+        return get_default_model_client()
+    
+    def _get_model(self, model_id: str, system_instruction, temperature: float, max_tokens: int):
+        """Return a cached GenerativeModel (LRU) - building one per request is wasteful"""
+        key = (model_id, system_instruction, temperature, max_tokens)
+        model = self._model_cache.get(key)
+        if model is not None:
+            self._model_cache.move_to_end(key)
+            return model
+        
+        # Configure model
+        generation_config = genai.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+        )
+        
+        model = genai.GenerativeModel(
+            model_name=model_id,
+            generation_config=generation_config,
+            safety_settings=self.SAFETY_SETTINGS,
+            system_instruction=system_instruction
+        )
+        self._model_cache[key] = model
+        if len(self._model_cache) > self.MODEL_CACHE_SIZE:
+            self._model_cache.popitem(last=False)
+        return model
+    
     async def stream_chat(
         self,
         model_id: str,
@@ -82,20 +156,6 @@ class GoogleProvider(BaseLLMProvider):
         if not self.api_key:
             raise RuntimeError("Provider not initialized")
         
-        # Configure model
-        generation_config = genai.GenerationConfig(
-            temperature=temperature,
-            max_output_tokens=max_tokens,
-        )
-        
-        # Safety settings (block few)
-        safety_settings = {
-            HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-            HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-            HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-            HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-        }
-        
         # Extract system instruction if present
         system_instruction = None
         gemini_messages = []
@@ -110,19 +170,18 @@ class GoogleProvider(BaseLLMProvider):
                     "parts": [{"text": msg.content}]
                 })
         
-        # Initialize model
-        model = genai.GenerativeModel(
-            model_name=model_id,
-            generation_config=generation_config,
-            safety_settings=safety_settings,
-            system_instruction=system_instruction
-        )
+        async with _SDK.client_lock:
+            # Another provider instance (e.g. after hot-reload) may have reconfigured the SDK
+            if _SDK.api_key != self.api_key:
+                await asyncio.to_thread(_configure_genai, self.api_key)
+            
+            model = self._get_model(model_id, system_instruction, temperature, max_tokens)
+            request = model.generate_content_async(gemini_messages, stream=True)
         
-        # Generate stream
-        response = await model.generate_content_async(
-            gemini_messages,
-            stream=True
-        )
+        # The request runs outside the lock. generate_content_async() binds the model to the
+        # SDK client synchronously before its first await, and leaving the lock doesn't yield,
+        # so no other instance can reconfigure in between.
+        response = await request
         
         async for chunk in response:
             if chunk.text:
@@ -1,59 +1,87 @@
 """
 Ollama Provider Plugin (Local)
+Talks to the native Ollama API (/api/chat, /api/tags, /api/ps) instead of the
+OpenAI compatibility shim, so we control keep_alive, num_ctx and preloading.
 """
-import os
+import json
 from typing import AsyncIterator
-from openai import AsyncOpenAI
+import httpx
 
 from core.providers.base_provider import BaseLLMProvider
-from core.providers.types import Message, ProviderConfig, ModelInfo, Role
+from core.providers.types import Message, ProviderConfig, ModelInfo, ModelCapability, Role
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+DEFAULT_KEEP_ALIVE = "30m"  # How long Ollama keeps the model in (V)RAM after the last request
+
 
 class OllamaProvider(BaseLLMProvider):
     def __init__(self, config: ProviderConfig):
         super().__init__(config)
         self.client = None
-        self.base_url = "http://localhost:11434/v1"
+        self.base_url = DEFAULT_BASE_URL
 
     async def initialize(self):
         # Reset state
         self.config.init_error = None
-        
+
         # Close old client
         if self.client:
-           try: await self.client.close()
+           try: await self.client.aclose()
            except: pass
 
-        # Override Base URL from config if set
+        # Override Base URL from config if set (older configs point at the /v1 shim)
         if self.config.base_url:
-            self.base_url = self.config.base_url + "/v1" # Ensure /v1
-            # Strip double /v1 if user added it
-            if self.base_url.endswith("/v1/v1"):
+            self.base_url = self.config.base_url.rstrip("/")
+            if self.base_url.endswith("/v1"):
                 self.base_url = self.base_url[:-3]
 
         try:
-            self.client = AsyncOpenAI(
+            # No read timeout: a cold model load or a long generation can take minutes
+            self.client = httpx.AsyncClient(
                 base_url=self.base_url,
-                api_key="ollama" # not required but needed by client
+                timeout=httpx.Timeout(10.0, read=None)
             )
-            print(f"[OK] Ollama initialized at {self.base_url}")
+            print(f"[OK] Ollama initialized at {self.base_url} (native API)")
         except Exception as e:
             self.config.init_error = str(e)
 
+    @property
+    def keep_alive(self) -> str:
+        return str(self.config.options.get("keep_alive") or DEFAULT_KEEP_ALIVE)
+
+    @property
+    def num_ctx(self):
+        value = self.config.options.get("num_ctx")
+        try:
+            return int(value) if value else None
+        except (TypeError, ValueError):
+            return None
+
     async def check_health(self) -> bool:
-        return self.client is not None
+        if not self.client: return False
+        try:
+            response = await self.client.get("/api/version")
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
 
     async def get_models(self) -> list[ModelInfo]:
         if not self.client: return []
         try:
             print(f"  [WAIT] Fetching Ollama models from {self.base_url}...")
-            response = await self.client.models.list()
+            response = await self.client.get("/api/tags")
+            response.raise_for_status()
             models = []
-            for m in response.data:
+            for m in response.json().get("models", []):
+                details = m.get("details") or {}
+                size = f" {details['parameter_size']}" if details.get("parameter_size") else ""
+                is_embedding = "embed" in m["name"] or "bert" in (details.get("family") or "")
                 models.append(ModelInfo(
-                    id=m.id,
-                    name=m.id.title(),
+                    id=m["name"],
+                    name=m["name"].title() + size,
                     provider="Ollama",
-                    context_length=4096, # Default guess
+                    capabilities=[ModelCapability.EMBEDDING] if is_embedding else [ModelCapability.CHAT],
+                    context_length=self.num_ctx or 4096, # Default guess (Ollama's own default)
                     supports_streaming=True
                 ))
             return models
@@ -61,25 +89,106 @@ class OllamaProvider(BaseLLMProvider):
             print(f"  [ERR] Ollama fetch failed: {e}")
             raise e
 
+    async def get_loaded_models(self) -> list[dict]:
+        """Models currently resident in memory (/api/ps) incl. VRAM usage and expiry"""
+        if not self.client: return []
+        response = await self.client.get("/api/ps")
+        response.raise_for_status()
+        return response.json().get("models", [])
+
+    async def preload_model(self, model_id: str) -> None:
+        """Load the model into memory now, so the first prompt doesn't pay the load time"""
+        if not self.client or not model_id:
+            return
+        already_loaded = any(m.get("name") == model_id for m in await self.get_loaded_models())
+
+        # An empty chat request loads the model (and refreshes keep_alive if already loaded)
+        payload = {"model": model_id, "messages": [], "keep_alive": self.keep_alive}
+        if self.num_ctx:
+            payload["options"] = {"num_ctx": self.num_ctx}
+        response = await self.client.post("/api/chat", json=payload)
+        response.raise_for_status()
+
+        if already_loaded:
+            print(f"  [OK] Ollama model already resident: {model_id} (keep_alive refreshed)")
+        else:
+            load_ms = response.json().get("load_duration", 0) / 1e6
+            print(f"  [OK] Ollama model warm: {model_id} (load {load_ms:.0f} ms, keep_alive {self.keep_alive})")
+
+    async def embed(self, model_id: str, texts: list[str]) -> list[list[float]]:
+        """Embedding vectors via /api/embed (e.g. nomic-embed-text), batched in one request"""
+        if not self.client: raise RuntimeError("Ollama not initialized")
+        response = await self.client.post("/api/embed", json={
+            "model": model_id,
+            "input": texts,
+            "keep_alive": self.keep_alive,
+        })
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    async def shutdown(self) -> None:
+        if self.client:
+            await self.client.aclose()
+
     async def stream_chat(self, model_id: str, messages: list[Message], temperature=0.7, max_tokens=2000) -> AsyncIterator[str]:
         if not self.client: raise RuntimeError("Ollama not initialized")
-        
-        system_msg = None
-        formatted_msgs = []
-        for m in messages:
-            if m.role == Role.SYSTEM:
-                system_msg = m.content # Some models prefer system via API, but messages works too
-                formatted_msgs.append({"role": "system", "content": m.content})
-            else:
-                 formatted_msgs.append({"role": m.role.value, "content": m.content})
-
-        stream = await self.client.chat.completions.create(
-            model=model_id,
-            messages=formatted_msgs,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=True
-        )
-        async for chunk in stream:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+
+        formatted_msgs = [
+            {"role": "system" if m.role == Role.SYSTEM else m.role.value, "content": m.content}
+            for m in messages
+        ]
+
+        options = {"temperature": temperature, "num_predict": max_tokens}
+        if self.num_ctx:
+            options["num_ctx"] = self.num_ctx
+
+        payload = {
+            "model": model_id,
+            "messages": formatted_msgs,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": options,
+        }
+
+        # Response is NDJSON: one object per line, the last one has done=true + timings
+        async with self.client.stream("POST", "/api/chat", json=payload) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                try:
+                    error = json.loads(body).get("error", body.decode(errors="replace"))
+                except ValueError:
+                    error = body.decode(errors="replace")
+                raise RuntimeError(f"Ollama error {response.status_code}: {error}")
+
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(f"Ollama error: {data['error']}")
+                content = (data.get("message") or {}).get("content")
+                if content:
+                    yield content
+                if data.get("done"):
+                    self._report_stats(data)
+
+    def _report_stats(self, data: dict):
+        """Local runtime stats (Ollama reports durations in nanoseconds)"""
+        def ms(key):
+            return round(data.get(key, 0) / 1e6, 1)
+
+        eval_count = data.get("eval_count", 0)
+        eval_seconds = data.get("eval_duration", 0) / 1e9
+        prompt_count = data.get("prompt_eval_count", 0)
+        prompt_seconds = data.get("prompt_eval_duration", 0) / 1e9
+
+        self.report_metadata(ollama={
+            "load_ms": ms("load_duration"),
+            "total_ms": ms("total_duration"),
+            "prompt_eval_count": prompt_count,
+            "prompt_eval_ms": ms("prompt_eval_duration"),
+            "eval_count": eval_count,
+            "eval_ms": ms("eval_duration"),
+            "prompt_tokens_per_s": round(prompt_count / prompt_seconds, 1) if prompt_seconds else None,
+            "tokens_per_s": round(eval_count / eval_seconds, 1) if eval_seconds else None,
+        })
@@ -176,3 +176,10 @@ class OpenAIProvider(BaseLLMProvider):
                     yield chunk.choices[0].delta.content
         except Exception as e:
             yield f"Error: {e}"
+
+    async def embed(self, model_id: str, texts: list[str]) -> list[list[float]]:
+        """Embedding vectors via /v1/embeddings (e.g. text-embedding-3-small)"""
+        if not self.client:
+            raise RuntimeError("Provider not initialized")
+        response = await self.client.embeddings.create(model=model_id, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
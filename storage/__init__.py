@@ -1,4 +1,12 @@
 # Storage package
+from .base import ChatStorage, create_chat_storage
 from .chat_db import ChatDatabase
+from .memory_storage import MemoryChatStorage
+from .sqlite_storage import SQLiteChatStorage
+from .response_cache import ResponseCache
+from .rate_limiter import SharedRateLimiter
 
-__all__ = ['ChatDatabase']
+__all__ = [
+    'ChatStorage', 'create_chat_storage', 'ChatDatabase', 'SQLiteChatStorage', 'MemoryChatStorage',
+    'ResponseCache', 'SharedRateLimiter'
+]
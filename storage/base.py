@@ -0,0 +1,187 @@
+import base64
+import json
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from core.providers.types import Message
+
+INTERRUPTED_MARKER = "\n\n[Interrupted]"  # Angehängt an Antworten, die nicht zu Ende gestreamt wurden
+PREVIEW_CHARS = 100  # Länge der Vorschau (erste User-Nachricht) in der Konversationsliste
+
+# list_conversations(sort=...): Name -> (Feld, absteigend)
+CONVERSATION_SORTS = {
+    "updated": ("updated_at", True),
+    "created": ("created_at", True),
+    "title": ("title", False),
+    "messages": ("message_count", True),
+    "tokens": ("token_count", True),
+}
+
+
+def encode_cursor(value: Any, conversation_id: str) -> str:
+    """Position nach dem letzten Eintrag einer Seite (undurchsichtig für Aufrufer)"""
+    return base64.urlsafe_b64encode(json.dumps([value, conversation_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        value, conversation_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return value, conversation_id
+    except Exception:
+        raise ValueError("Invalid conversation cursor")
+
+
+def message_tokens(metadata: Dict) -> int:
+    """Gecachte Token-Zahl einer Nachricht (core/token_budget.py), 0 wenn nie gezählt"""
+    tokens = metadata.get("tokens") if isinstance(metadata, dict) else None
+    if isinstance(tokens, dict):
+        return int(tokens.get("count") or 0)
+    return tokens if isinstance(tokens, int) else 0
+
+
+class ChatStorage(ABC):
+    """
+    Asynchrone Schnittstelle für die Chat-History.
+
+    Jedes Backend (SQLite, In-Memory, eigene) implementiert diese Methoden und muss
+    tools/storage_conformance.py bestehen. Verbindliches Verhalten:
+    - get_conversations: neueste zuerst (updated_at), save_message aktualisiert updated_at
+    - Konversations-Dicts enthalten Zähler, die beim Schreiben gepflegt werden: message_count,
+      preview (erste User-Nachricht, PREVIEW_CHARS), last_message_at, char_count, token_count
+    - list_conversations: stabile Cursor-Seiten (kein Eintrag doppelt oder ausgelassen)
+    - load_messages: älteste zuerst, Rolle/Inhalt/Zeitstempel/Metadaten unverändert
+    - delete_conversation: entfernt Nachrichten und Zusammenfassung mit
+    - search_messages: Teilstring-Suche ohne Groß-/Kleinschreibung (ASCII), neueste Treffer zuerst
+    - Drafts (optional): finalize_draft ersetzt den Draft durch die Nachricht, recover_drafts
+      speichert übrig gebliebene mit metadata["interrupted"] und INTERRUPTED_MARKER am Ende
+    """
+
+    # --- Konversationen --------------------------------------------------------
+
+    @abstractmethod
+    async def create_conversation(
+        self,
+        conversation_id: str,
+        title: str = "New Conversation",
+        provider_id: str = "",
+        model_id: str = ""
+    ) -> str:
+        """Erstelle neue Konversation"""
+
+    @abstractmethod
+    async def get_conversations(self, limit: int = 50) -> List[Dict]:
+        """Liste der Konversationen (neueste zuerst): id, title, provider_id, model_id, created_at, updated_at"""
+
+    @abstractmethod
+    async def list_conversations(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        provider_id: Optional[str] = None,
+        model_id: Optional[str] = None,
+        sort: str = "updated"
+    ) -> Dict:
+        """
+        Eine Seite der Konversationsliste in EINER Abfrage (inkl. Vorschau und Zählern).
+        sort: siehe CONVERSATION_SORTS. Gibt {"conversations": [...], "next_cursor": str | None} zurück.
+        """
+
+    @abstractmethod
+    async def update_conversation_title(self, conversation_id: str, new_title: str):
+        """Update Konversations-Titel"""
+
+    @abstractmethod
+    async def delete_conversation(self, conversation_id: str):
+        """Lösche Konversation inkl. aller Messages und Zusammenfassung"""
+
+    # --- Nachrichten -----------------------------------------------------------
+
+    @abstractmethod
+    async def save_message(self, conversation_id: str, message: Message) -> int:
+        """Speichere einzelne Nachricht, gibt die Message-ID zurück"""
+
+    @abstractmethod
+    async def load_messages(self, conversation_id: str) -> List[Message]:
+        """Lade alle Nachrichten einer Konversation (älteste zuerst)"""
+
+    # --- Zusammenfassungen -----------------------------------------------------
+
+    @abstractmethod
+    async def save_summary(
+        self,
+        conversation_id: str,
+        content: str,
+        covered_messages: int,
+        token_count: int = 0,
+        model: str = ""
+    ):
+        """Speichere/ersetze die Zusammenfassung einer Konversation"""
+
+    @abstractmethod
+    async def load_summary(self, conversation_id: str) -> Optional[Dict]:
+        """Lade die Zusammenfassung einer Konversation (falls vorhanden)"""
+
+    # --- Zwischenstände laufender Antworten (storage/checkpoint.py) -------------
+    # Optional: ohne eigene Implementierung wird nur die fertige Antwort gespeichert.
+
+    async def save_draft(self, draft_id: str, conversation_id: str, message: Message):
+        """Zwischenstand einer laufenden Antwort sichern (Upsert per draft_id)"""
+
+    async def finalize_draft(self, draft_id: str, conversation_id: str, message: Message) -> int:
+        """Fertige Antwort speichern und ihren Draft verwerfen (atomar), gibt die Message-ID zurück"""
+        return await self.save_message(conversation_id, message)
+
+    async def recover_drafts(self) -> List[Dict]:
+        """Beim Start: verwaiste Drafts als unterbrochene Nachrichten speichern (message_id, content)"""
+        return []
+
+    # --- Suche & Export --------------------------------------------------------
+
+    @abstractmethod
+    async def search_messages(self, query: str, limit: int = 20) -> List[Dict]:
+        """Volltext-Suche: message_id, conversation_id, title, role, content, timestamp"""
+
+    async def export_conversations(self, conversation_ids: Optional[List[str]] = None) -> AsyncIterator[Dict]:
+        """Eine Konversation nach der anderen: {"conversation": {...}, "messages": [{...}], "summary": ...}"""
+        conversations = await self.get_conversations(limit=-1)
+        if conversation_ids is not None:
+            wanted = set(conversation_ids)
+            conversations = [c for c in conversations if c["id"] in wanted]
+        for conversation in conversations:
+            messages = await self.load_messages(conversation["id"])
+            yield {
+                "conversation": conversation,
+                "messages": [{
+                    "role": m.role.value,
+                    "content": m.content,
+                    "timestamp": m.timestamp.isoformat(),
+                    "metadata": m.metadata,
+                } for m in messages],
+                "summary": await self.load_summary(conversation["id"]),
+            }
+
+    async def close(self):
+        """Ressourcen freigeben (optional)"""
+
+
+def create_chat_storage(spec: Optional[str] = None, sqlite_options: Optional[Dict] = None) -> ChatStorage:
+    """
+    Backend aus user_settings.json ("storage_backend"):
+        "sqlite" (Standard)     ~/.yat/chat_history.db (sqlite_options: write_behind, flush_ms, max_pending, compress_threshold)
+        "memory"                nur im Speicher (Tests, Benchmarks)
+        "paket.modul:Klasse"    eigene ChatStorage-Implementierung (ohne Argumente konstruierbar)
+    """
+    if not spec or spec == "sqlite":
+        from .sqlite_storage import SQLiteChatStorage
+        return SQLiteChatStorage(**(sqlite_options or {}))
+    if spec == "memory":
+        from .memory_storage import MemoryChatStorage
+        return MemoryChatStorage()
+    if ":" in spec:
+        import importlib
+        module_name, class_name = spec.split(":", 1)
+        storage_class = getattr(importlib.import_module(module_name), class_name)
+        storage = storage_class()
+        if not isinstance(storage, ChatStorage):
+            raise TypeError(f"{spec} is not a ChatStorage")
+        return storage
+    raise ValueError(f"Unknown storage backend '{spec}'")
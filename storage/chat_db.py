@@ -1,23 +1,41 @@
-import sqlite3
+import itertools
 import json
+import time
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import Dict, Iterator, List, Optional
 from pathlib import Path
 from core.providers.types import Message, Role
 from core.paths import get_data_path
+from core.sqlite_utils import connect
+from .base import INTERRUPTED_MARKER, PREVIEW_CHARS, CONVERSATION_SORTS, encode_cursor, decode_cursor, message_tokens
+from .compression import MessageCodec, DEFAULT_THRESHOLD, FORMAT_PLAIN, train_dictionary
+
 
 class ChatDatabase:
     """SQLite-basierte Chat-History-Speicherung"""
     
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, compress_threshold: int = DEFAULT_THRESHOLD):
         self.db_path = db_path or get_data_path("chat_history.db")
+        self.message_index = None  # Optional core.message_index.MessageIndex (semantic search)
+        self.codec = MessageCodec(threshold=compress_threshold)  # storage/compression.py, 0 = aus
+        self.codec.reload = self.load_dictionaries  # Von anderen Prozessen trainierte Wörterbücher
+        self._stats_backfill = False
         self.init_database()
+        self.load_dictionaries()
+        if self._stats_backfill:
+            self.rebuild_conversation_stats()
     
     def init_database(self):
         """Erstelle Datenbank-Schema falls nicht vorhanden"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect(self.db_path)
         cursor = conn.cursor()
         
+        # Neue Datei: freie Seiten später schrittweise zurückgeben (storage/maintenance.py).
+        # Der Modus muss vor der ersten Tabelle stehen, connect() hat die Datei schon angelegt -> VACUUM
+        if not cursor.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+        
         # Conversations-Tabelle
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS conversations (
@@ -43,9 +61,167 @@ class ChatDatabase:
             )
         """)
         
+        # Rolling summaries (one per conversation, covers the first N messages)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS conversation_summaries (
+                conversation_id TEXT PRIMARY KEY,
+                content TEXT,
+                covered_messages INTEGER,
+                token_count INTEGER,
+                model TEXT,
+                updated_at TEXT,
+                FOREIGN KEY (conversation_id) REFERENCES conversations(id)
+            )
+        """)
+        
+        # Migration: Zähler pro Konversation, beim Schreiben gepflegt (Liste ohne N+1-Abfragen)
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(conversations)").fetchall()}
+        for column, definition in CONVERSATION_STATS_COLUMNS.items():
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE conversations ADD COLUMN {column} {definition}")
+                self._stats_backfill = True
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages(conversation_id, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations(updated_at, id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversations_model ON conversations(provider_id, model_id, updated_at)")
+        
+        # Migration: Kompressions-Format pro Nachricht (storage/compression.py)
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(messages)").fetchall()}
+        if "format" not in columns:
+            cursor.execute("ALTER TABLE messages ADD COLUMN format INTEGER DEFAULT 0")
+        if "dict_id" not in columns:
+            cursor.execute("ALTER TABLE messages ADD COLUMN dict_id INTEGER")
+        
+        # Trainierte zlib-Wörterbücher (werden nie gelöscht, alte Nachrichten brauchen sie)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS compression_dicts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                data BLOB,
+                samples INTEGER,
+                created_at TEXT
+            )
+        """)
+        
+        # Zwischenstände laufender Antworten (Crash-Schutz, siehe storage/checkpoint.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS message_drafts (
+                id TEXT PRIMARY KEY,
+                owner TEXT,
+                conversation_id TEXT,
+                role TEXT,
+                content TEXT,
+                timestamp TEXT,
+                metadata TEXT,
+                updated_at REAL
+            )
+        """)
+        
         conn.commit()
         conn.close()
     
+    def _connect(self):
+        """Verbindung mit SQL-Funktion yat_text(content, format, dict_id) zum Entpacken"""
+        conn = connect(self.db_path)
+        conn.create_function("yat_text", 3, self.codec.decode, deterministic=True)
+        return conn
+    
+    def load_dictionaries(self):
+        """Alle Wörterbücher laden, das neueste wird für neue Nachrichten verwendet"""
+        conn = connect(self.db_path)
+        rows = conn.execute("SELECT id, data FROM compression_dicts ORDER BY id ASC").fetchall()
+        conn.close()
+        for dict_id, data in rows:
+            self.codec.add_dictionary(dict_id, data, active=True)
+    
+    def train_dictionary(self, max_samples: int = 2000, min_samples: int = 50, only_if_missing: bool = False) -> Optional[int]:
+        """
+        Neues Wörterbuch aus den neuesten großen Nachrichten trainieren.
+        Gibt die ID zurück (None: zu wenige Beispiele, oder mit only_if_missing:
+        ein anderer Prozess hat inzwischen eins angelegt - das wird dann übernommen).
+        """
+        conn = self._connect()
+        try:
+            samples = [row[0] for row in conn.execute("""
+                SELECT yat_text(content, format, dict_id) FROM messages
+                WHERE format != 0 OR length(content) >= ?
+                ORDER BY id DESC
+                LIMIT ?
+            """, (max(1, self.codec.threshold // 2), max_samples)).fetchall()]
+            if len(samples) < min_samples:
+                return None
+            data = train_dictionary(samples)
+            if not data:
+                return None
+            # Prüfen und Einfügen in einer Schreibtransaktion (mehrere Worker starten gleichzeitig)
+            conn.execute("BEGIN IMMEDIATE")
+            if only_if_missing:
+                existing = conn.execute("SELECT id, data FROM compression_dicts ORDER BY id DESC LIMIT 1").fetchone()
+                if existing is not None:
+                    conn.rollback()
+                    self.codec.add_dictionary(existing[0], existing[1], active=True)
+                    return None
+            cursor = conn.execute("""
+                INSERT INTO compression_dicts (data, samples, created_at) VALUES (?, ?, ?)
+            """, (data, len(samples), datetime.now().isoformat()))
+            conn.commit()
+            dict_id = cursor.lastrowid
+        finally:
+            conn.close()
+        self.codec.add_dictionary(dict_id, data, active=True)
+        return dict_id
+    
+    def ensure_dictionary(self, min_samples: int = 50) -> Optional[int]:
+        """Beim Start: trainieren, falls es noch kein Wörterbuch gibt und genug Beispiele (ID des neuen)"""
+        if self.codec.active_dict_id is not None or not self.codec.threshold:
+            return None
+        return self.train_dictionary(min_samples=min_samples, only_if_missing=True)
+    
+    def compress_existing(self, batch_size: int = 500, recompress: bool = False) -> Dict:
+        """
+        Migration: vorhandene Nachrichten mit dem aktuellen Format neu speichern.
+        Ohne recompress nur bisher unkomprimierte Zeilen. Gibt Zähler + Bytes zurück.
+        """
+        stats = {"rows": 0, "compressed": 0, "bytes_before": 0, "bytes_after": 0}
+        if not self.codec.threshold:
+            return stats
+        after_id = 0
+        while True:
+            conn = self._connect()
+            try:
+                rows = conn.execute(f"""
+                    SELECT id, content, metadata, format, dict_id FROM messages
+                    WHERE id > ? {"" if recompress else "AND format = 0"}
+                    ORDER BY id ASC
+                    LIMIT ?
+                """, (after_id, batch_size)).fetchall()
+                if not rows:
+                    return stats
+                updates = []
+                for message_id, content, metadata, fmt, dict_id in rows:
+                    text = self.codec.decode(content, fmt, dict_id) or ""
+                    meta = self.codec.decode(metadata, fmt, dict_id) or ""
+                    new_content, new_meta, new_fmt, new_dict = self.codec.encode_row(text, meta)
+                    stats["rows"] += 1
+                    stats["bytes_before"] += _stored_size(content) + _stored_size(metadata)
+                    stats["bytes_after"] += _stored_size(new_content) + _stored_size(new_meta)
+                    if new_fmt != fmt or new_dict != dict_id:
+                        stats["compressed"] += new_fmt != FORMAT_PLAIN
+                        updates.append((new_content, new_meta, new_fmt, new_dict, message_id))
+                conn.executemany("UPDATE messages SET content = ?, metadata = ?, format = ?, dict_id = ? WHERE id = ?", updates)
+                conn.commit()
+                after_id = rows[-1][0]
+            finally:
+                conn.close()
+    
+    def _decode_message(self, role, content, timestamp_str, metadata, fmt, dict_id) -> Message:
+        metadata_str = self.codec.decode(metadata, fmt, dict_id)
+        return Message(
+            role=Role(role),
+            content=self.codec.decode(content, fmt, dict_id),
+            timestamp=datetime.fromisoformat(timestamp_str),
+            metadata=json.loads(metadata_str) if metadata_str else {}
+        )
+    
     def create_conversation(
         self, 
         conversation_id: str,
@@ -54,7 +230,7 @@ class ChatDatabase:
         model_id: str = ""
     ) -> str:
         """Erstelle neue Konversation"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect(self.db_path)
         cursor = conn.cursor()
         
         now = datetime.now().isoformat()
@@ -69,98 +245,415 @@ class ChatDatabase:
         
         return conversation_id
     
-    def save_message(self, conversation_id: str, message: Message):
-        """Speichere einzelne Nachricht"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def insert_message(self, conversation_id: str, message: Message) -> int:
+        """Schreibe Nachricht ohne Embedding-Index (für Aufrufer außerhalb der Event-Loop)"""
+        return self.write_batch([("message", (conversation_id, message))])[0]
+    
+    def write_batch(self, ops: List[tuple]) -> List:
+        """
+        Mehrere Schreibvorgänge in EINER Transaktion (storage/write_buffer.py).
         
-        cursor.execute("""
-            INSERT INTO messages (conversation_id, role, content, timestamp, metadata)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            conversation_id,
-            message.role.value,
-            message.content,
-            message.timestamp.isoformat(),
-            json.dumps(message.metadata)
-        ))
-        
-        # Update conversation timestamp
-        cursor.execute("""
+        ops in Reihenfolge: ("conversation", (id, title, provider_id, model_id))
+                            ("message", (conversation_id, Message))
+                            ("draft", (draft_id, owner, conversation_id, Message))     Zwischenstand (Upsert)
+                            ("finalize", (draft_id, conversation_id, Message))         Nachricht + Draft löschen
+        Gibt pro Op das Ergebnis zurück (Konversations-ID, Message-ID bzw. None).
+        """
+        conn = connect(self.db_path)
+        try:
+            # Schreibsperre sofort holen: AUTOINCREMENT-IDs eines Blocks sind dann lückenlos
+            conn.execute("BEGIN IMMEDIATE")
+            now = datetime.now().isoformat()
+            results = []
+            for kind, group in itertools.groupby(ops, key=lambda op: op[0]):
+                rows = [args for _, args in group]
+                if kind == "conversation":
+                    conn.executemany("""
+                        INSERT INTO conversations (id, title, provider_id, model_id, created_at, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    """, [(cid, title, pid, mid, now, now) for cid, title, pid, mid in rows])
+                    results.extend(row[0] for row in rows)
+                elif kind == "message":
+                    results.extend(self._insert_messages(conn, rows, now))
+                elif kind == "draft":
+                    conn.executemany("""
+                        INSERT OR REPLACE INTO message_drafts
+                            (id, owner, conversation_id, role, content, timestamp, metadata, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, [(
+                        draft_id,
+                        owner,
+                        conversation_id,
+                        message.role.value,
+                        message.content,
+                        message.timestamp.isoformat(),
+                        json.dumps(message.metadata),
+                        time.time()
+                    ) for draft_id, owner, conversation_id, message in rows])
+                    results.extend([None] * len(rows))
+                elif kind == "finalize":
+                    results.extend(self._insert_messages(conn, [(cid, message) for _, cid, message in rows], now))
+                    conn.executemany("DELETE FROM message_drafts WHERE id = ?", [(row[0],) for row in rows])
+                else:
+                    raise ValueError(f"Unknown write op '{kind}'")
+            conn.commit()
+            return results
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def _insert_messages(self, conn, rows: List[tuple], now: Optional[str]) -> List[int]:
+        """
+        (conversation_id, Message)-Zeilen einfügen (große Inhalte komprimiert), gibt die Message-IDs zurück.
+        now=None lässt updated_at der Konversationen unverändert (Import).
+        """
+        values = []
+        for conversation_id, message in rows:
+            content, metadata, fmt, dict_id = self.codec.encode_row(message.content, json.dumps(message.metadata))
+            values.append((conversation_id, message.role.value, content, message.timestamp.isoformat(), metadata, fmt, dict_id))
+        conn.executemany("""
+            INSERT INTO messages (conversation_id, role, content, timestamp, metadata, format, dict_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, values)
+        last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        
+        # Zeitstempel + Zähler der Konversation (einmal pro Konversation statt pro Nachricht)
+        stats = {}
+        for conversation_id, message in sorted(rows, key=lambda row: row[1].timestamp):
+            entry = stats.setdefault(conversation_id, {"count": 0, "chars": 0, "tokens": 0, "last": "", "preview": None})
+            entry["count"] += 1
+            entry["chars"] += len(message.content)
+            entry["tokens"] += message_tokens(message.metadata)
+            entry["last"] = max(entry["last"], message.timestamp.isoformat())
+            if entry["preview"] is None and message.role == Role.USER:
+                entry["preview"] = message.content[:PREVIEW_CHARS]
+        conn.executemany("""
             UPDATE conversations 
-            SET updated_at = ? 
+            SET updated_at = COALESCE(?, updated_at),
+                message_count = message_count + ?,
+                char_count = char_count + ?,
+                token_count = token_count + ?,
+                last_message_at = MAX(COALESCE(last_message_at, ''), ?),
+                preview = COALESCE(preview, ?)
             WHERE id = ?
-        """, (datetime.now().isoformat(), conversation_id))
-        
+        """, [(now, e["count"], e["chars"], e["tokens"], e["last"], e["preview"], cid) for cid, e in stats.items()])
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+    
+    def iter_export(self, conversation_ids: Optional[List[str]] = None, batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        Alle Konversationen als Records ("conversation", "summary", "message") für
+        storage/transfer.py, in konstantem Speicher: zwei Cursor (Konversationen nach
+        id, Nachrichten nach conversation_id über den Index) werden zusammengeführt,
+        gelesen wird in Blöcken von batch_size aus EINEM Lese-Snapshot.
+        """
+        conversation_filter, message_filter, params = "", "", []
+        if conversation_ids is not None:
+            marks = ",".join("?" * len(conversation_ids))
+            conversation_filter = f"WHERE c.id IN ({marks})"
+            message_filter = f"AND conversation_id IN ({marks})"
+            params = list(conversation_ids)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")  # Snapshot: parallele Schreiber verändern den Export nicht
+            conversations = conn.execute(f"""
+                SELECT c.id, c.title, c.provider_id, c.model_id, c.created_at, c.updated_at,
+                       s.content, s.covered_messages, s.token_count, s.model, s.updated_at
+                FROM conversations c
+                LEFT JOIN conversation_summaries s ON s.conversation_id = c.id
+                {conversation_filter}
+                ORDER BY c.id
+            """, params)
+            messages = _iter_rows(conn.execute(f"""
+                SELECT conversation_id, role, content, timestamp, metadata, format, dict_id
+                FROM messages
+                WHERE conversation_id IS NOT NULL {message_filter}
+                ORDER BY conversation_id, timestamp
+            """, params), batch_size)
+            
+            pending = next(messages, None)
+            for row in _iter_rows(conversations, batch_size):
+                conversation_id = row[0]
+                yield {"type": "conversation", **dict(zip(
+                    ["id", "title", "provider_id", "model_id", "created_at", "updated_at"], row[:6]
+                ))}
+                if row[6] is not None:
+                    yield {
+                        "type": "summary",
+                        "conversation_id": conversation_id,
+                        "content": row[6],
+                        "covered_messages": row[7],
+                        "token_count": row[8],
+                        "model": row[9],
+                        "updated_at": row[10]
+                    }
+                # Nachrichten ohne Konversation (Altlasten) überspringen
+                while pending is not None and pending[0] < conversation_id:
+                    pending = next(messages, None)
+                while pending is not None and pending[0] == conversation_id:
+                    _, role, content, timestamp, metadata, fmt, dict_id = pending
+                    metadata = self.codec.decode(metadata, fmt, dict_id)
+                    yield {
+                        "type": "message",
+                        "conversation_id": conversation_id,
+                        "role": role,
+                        "content": self.codec.decode(content, fmt, dict_id),
+                        "timestamp": timestamp,
+                        "metadata": json.loads(metadata) if metadata else {}
+                    }
+                    pending = next(messages, None)
+        finally:
+            conn.rollback()
+            conn.close()
+    
+    def import_batch(self, conversations: List[Dict], summaries: List[Dict], messages: List[tuple]) -> Dict:
+        """
+        Ein Import-Block in EINER Transaktion (storage/transfer.py). Vorhandene
+        Konversationen und Zusammenfassungen (gleiche id) bleiben unverändert,
+        Nachrichten gelten als vorhanden bei gleicher Konversation, Rolle,
+        Zeitstempel und Inhalt. messages: (conversation_id, Message).
+        """
+        stats = {"conversations": 0, "summaries": 0, "messages": 0, "duplicates": 0, "orphaned": 0}
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO conversations (id, title, provider_id, model_id, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(c["id"], c.get("title"), c.get("provider_id", ""), c.get("model_id", ""),
+                   c.get("created_at"), c.get("updated_at")) for c in conversations])
+            stats["conversations"] = conn.total_changes - before
+            
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO conversation_summaries
+                    (conversation_id, content, covered_messages, token_count, model, updated_at)
+                SELECT ?, ?, ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM conversations WHERE id = ?)
+            """, [(s["conversation_id"], s["content"], s.get("covered_messages", 0), s.get("token_count", 0),
+                   s.get("model", ""), s.get("updated_at"), s["conversation_id"]) for s in summaries])
+            stats["summaries"] = conn.total_changes - before
+            
+            conversation_ids = list({conversation_id for conversation_id, _ in messages})
+            known, seen = set(), set()
+            for start in range(0, len(conversation_ids), 500):
+                chunk = conversation_ids[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                known.update(row[0] for row in conn.execute(f"SELECT id FROM conversations WHERE id IN ({marks})", chunk))
+                seen.update(conn.execute(f"""
+                    SELECT conversation_id, role, timestamp, yat_text(content, format, dict_id)
+                    FROM messages WHERE conversation_id IN ({marks})
+                """, chunk))
+            
+            rows = []
+            for conversation_id, message in messages:
+                if conversation_id not in known:
+                    stats["orphaned"] += 1
+                    continue
+                key = (conversation_id, message.role.value, message.timestamp.isoformat(), message.content)
+                if key in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(key)
+                rows.append((conversation_id, message))
+            if rows:
+                self._insert_messages(conn, rows, None)
+            stats["messages"] = len(rows)
+            conn.commit()
+            return stats
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def rebuild_conversation_stats(self, conversation_ids: Optional[List[str]] = None):
+        """Zähler aus den Nachrichten neu berechnen (Migration, nach Löschen einzelner Nachrichten)"""
+        where = ""
+        params: list = []
+        if conversation_ids is not None:
+            if not conversation_ids:
+                return
+            where = f"WHERE id IN ({','.join('?' * len(conversation_ids))})"
+            params = list(conversation_ids)
+        conn = self._connect()
+        conn.create_function("yat_tokens", 1, lambda metadata: message_tokens(json.loads(metadata) if metadata else {}),
+                             deterministic=True)
+        conn.execute(f"""
+            UPDATE conversations SET
+                message_count = (SELECT COUNT(*) FROM messages m WHERE m.conversation_id = conversations.id),
+                char_count = COALESCE((SELECT SUM(length(yat_text(m.content, m.format, m.dict_id)))
+                                       FROM messages m WHERE m.conversation_id = conversations.id), 0),
+                token_count = COALESCE((SELECT SUM(yat_tokens(yat_text(m.metadata, m.format, m.dict_id)))
+                                        FROM messages m WHERE m.conversation_id = conversations.id), 0),
+                last_message_at = (SELECT MAX(m.timestamp) FROM messages m WHERE m.conversation_id = conversations.id),
+                preview = (SELECT substr(yat_text(m.content, m.format, m.dict_id), 1, ?) FROM messages m
+                           WHERE m.conversation_id = conversations.id AND m.role = 'user'
+                           ORDER BY m.timestamp ASC LIMIT 1)
+            {where}
+        """, [PREVIEW_CHARS] + params)
         conn.commit()
         conn.close()
     
+    def recover_drafts(self, owner: str, stale_seconds: float) -> List[Dict]:
+        """
+        Abgebrochene Antworten retten: Drafts von `owner` (frühere Instanz dieses
+        Prozesses) und alle, die seit stale_seconds niemand mehr aktualisiert hat,
+        werden als Nachricht mit metadata["interrupted"] gespeichert.
+        Gibt (message_id, content) der geretteten Nachrichten zurück.
+        """
+        conn = connect(self.db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            drafts = conn.execute("""
+                SELECT d.id, d.conversation_id, d.role, d.content, d.timestamp, d.metadata
+                FROM message_drafts d
+                WHERE d.owner = ? OR d.updated_at < ?
+                ORDER BY d.timestamp ASC
+            """, (owner, time.time() - stale_seconds)).fetchall()
+            
+            rows = []
+            for draft_id, conversation_id, role, content, timestamp_str, metadata_str in drafts:
+                metadata = json.loads(metadata_str) if metadata_str else {}
+                metadata["interrupted"] = True
+                rows.append((conversation_id, Message(
+                    role=Role(role),
+                    content=(content or "") + INTERRUPTED_MARKER,
+                    timestamp=datetime.fromisoformat(timestamp_str),
+                    metadata=metadata
+                )))
+            
+            # Drafts zu gelöschten Konversationen verwerfen
+            conversation_ids = list({row[0] for row in rows})
+            existing = {row[0] for row in conn.execute(
+                f"SELECT id FROM conversations WHERE id IN ({','.join('?' * len(conversation_ids))})", conversation_ids
+            ).fetchall()} if rows else set()
+            rows = [row for row in rows if row[0] in existing]
+            ids = self._insert_messages(conn, rows, datetime.now().isoformat()) if rows else []
+            conn.executemany("DELETE FROM message_drafts WHERE id = ?", [(d[0],) for d in drafts])
+            conn.commit()
+            return [{"message_id": mid, "content": m.content} for mid, (_, m) in zip(ids, rows)]
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    def save_message(self, conversation_id: str, message: Message) -> int:
+        """Speichere einzelne Nachricht, gibt die Message-ID zurück"""
+        message_id = self.insert_message(conversation_id, message)
+        
+        # Embedding-Index inkrementell nachziehen (gebündelt im Hintergrund)
+        if self.message_index is not None:
+            self.message_index.enqueue(message_id, message.content)
+        return message_id
+    
     def load_messages(self, conversation_id: str) -> List[Message]:
         """Lade alle Nachrichten einer Konversation"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
-            SELECT role, content, timestamp, metadata
+            SELECT role, content, timestamp, metadata, format, dict_id
             FROM messages
             WHERE conversation_id = ?
             ORDER BY timestamp ASC
         """, (conversation_id,))
         
-        messages = []
-        for row in cursor.fetchall():
-            role, content, timestamp_str, metadata_str = row
-            
-            messages.append(Message(
-                role=Role(role),
-                content=content,
-                timestamp=datetime.fromisoformat(timestamp_str),
-                metadata=json.loads(metadata_str) if metadata_str else {}
-            ))
+        # Entpackt wird erst hier, für den Chat, der gerade angezeigt wird
+        messages = [self._decode_message(*row) for row in cursor.fetchall()]
         
         conn.close()
         return messages
     
     def get_conversations(self, limit: int = 50) -> List[Dict]:
         """Lade Liste aller Konversationen (neueste zuerst)"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT id, title, provider_id, model_id, created_at, updated_at
+        cursor.execute(f"""
+            SELECT {CONVERSATION_COLUMNS}
             FROM conversations
             ORDER BY updated_at DESC
             LIMIT ?
         """, (limit,))
         
-        conversations = []
-        for row in cursor.fetchall():
-            conversations.append({
-                "id": row[0],
-                "title": row[1],
-                "provider_id": row[2],
-                "model_id": row[3],
-                "created_at": row[4],
-                "updated_at": row[5]
-            })
+        conversations = [_conversation_row(row) for row in cursor.fetchall()]
         
         conn.close()
         return conversations
     
-    def delete_conversation(self, conversation_id: str):
-        """Lösche Konversation inkl. aller Messages"""
-        conn = sqlite3.connect(self.db_path)
+    def list_conversations(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        provider_id: Optional[str] = None,
+        model_id: Optional[str] = None,
+        sort: str = "updated"
+    ) -> Dict:
+        """Eine Seite der Konversationsliste (Keyset-Pagination, siehe ChatStorage.list_conversations)"""
+        if sort not in CONVERSATION_SORTS:
+            raise ValueError(f"Unknown sort '{sort}'")
+        column, descending = CONVERSATION_SORTS[sort]
+        
+        conditions, params = [], []
+        if provider_id is not None:
+            conditions.append("provider_id = ?")
+            params.append(provider_id)
+        if model_id is not None:
+            conditions.append("model_id = ?")
+            params.append(model_id)
+        if cursor:
+            value, last_id = decode_cursor(cursor)
+            conditions.append(f"({column}, id) {'<' if descending else '>'} (?, ?)")
+            params += [value, last_id]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "DESC" if descending else "ASC"
+        
+        conn = connect(self.db_path)
+        rows = conn.execute(f"""
+            SELECT {CONVERSATION_COLUMNS}
+            FROM conversations
+            {where}
+            ORDER BY {column} {order}, id {order}
+            LIMIT ?
+        """, params + [limit + 1]).fetchall()
+        conn.close()
+        
+        conversations = [_conversation_row(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit and conversations:
+            last = conversations[-1]
+            next_cursor = encode_cursor(last[column], last["id"])
+        return {"conversations": conversations, "next_cursor": next_cursor}
+    
+    def purge_conversation(self, conversation_id: str) -> List[int]:
+        """Lösche Konversation inkl. aller Messages, gibt die gelöschten Message-IDs zurück"""
+        conn = connect(self.db_path)
         cursor = conn.cursor()
         
+        cursor.execute("SELECT id FROM messages WHERE conversation_id = ?", (conversation_id,))
+        message_ids = [row[0] for row in cursor.fetchall()]
+        
         cursor.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+        cursor.execute("DELETE FROM conversation_summaries WHERE conversation_id = ?", (conversation_id,))
+        cursor.execute("DELETE FROM message_drafts WHERE conversation_id = ?", (conversation_id,))
         cursor.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,))
         
         conn.commit()
         conn.close()
+        return message_ids
+    
+    def delete_conversation(self, conversation_id: str):
+        """Lösche Konversation inkl. aller Messages"""
+        message_ids = self.purge_conversation(conversation_id)
+        if self.message_index is not None:
+            self.message_index.remove(message_ids)
     
     def update_conversation_title(self, conversation_id: str, new_title: str):
         """Update Konversations-Titel"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -172,25 +665,215 @@ class ChatDatabase:
         conn.commit()
         conn.close()
     
-    def get_conversation_preview(self, conversation_id: str) -> Optional[str]:
-        """Hole ersten User-Message als Preview"""
-        conn = sqlite3.connect(self.db_path)
+    def save_summary(
+        self,
+        conversation_id: str,
+        content: str,
+        covered_messages: int,
+        token_count: int = 0,
+        model: str = ""
+    ):
+        """Speichere/ersetze die Zusammenfassung einer Konversation"""
+        conn = connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute("""
-            SELECT content FROM messages
-            WHERE conversation_id = ? AND role = 'user'
-            ORDER BY timestamp ASC
-            LIMIT 1
+            INSERT OR REPLACE INTO conversation_summaries
+                (conversation_id, content, covered_messages, token_count, model, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (conversation_id, content, covered_messages, token_count, model, datetime.now().isoformat()))
+        
+        conn.commit()
+        conn.close()
+    
+    def load_summary(self, conversation_id: str) -> Optional[Dict]:
+        """Lade die Zusammenfassung einer Konversation (falls vorhanden)"""
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT content, covered_messages, token_count, model, updated_at
+            FROM conversation_summaries
+            WHERE conversation_id = ?
         """, (conversation_id,))
         
         row = cursor.fetchone()
         conn.close()
         
-        if row:
+        if not row:
+            return None
+        return {
+            "content": row[0],
+            "covered_messages": row[1],
+            "token_count": row[2],
+            "model": row[3],
+            "updated_at": row[4]
+        }
+    
+    def get_message_ids(self, conversation_id: str, limit: Optional[int] = None) -> List[int]:
+        """IDs der Nachrichten einer Konversation (mit limit: die neuesten)"""
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT id FROM messages
+            WHERE conversation_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+        """, (conversation_id, limit if limit else -1))
+        
+        ids = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return ids
+    
+    def get_messages_after(self, after_id: int, limit: int = 256) -> List[tuple]:
+        """(id, content) ab einer Message-ID - für gebündeltes Nachindizieren"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT id, yat_text(content, format, dict_id) FROM messages
+            WHERE id > ?
+            ORDER BY id ASC
+            LIMIT ?
+        """, (after_id, limit))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    
+    def get_all_message_ids(self) -> List[int]:
+        """Alle Message-IDs - für den Abgleich des Embedding-Index (auch mit anderen Prozessen)"""
+        conn = connect(self.db_path)
+        ids = [row[0] for row in conn.execute("SELECT id FROM messages")]
+        conn.close()
+        return ids
+    
+    def get_message_texts(self, message_ids: List[int]) -> List[tuple]:
+        """(id, content) zu einer Liste von IDs (aufsteigend)"""
+        if not message_ids:
+            return []
+        conn = self._connect()
+        placeholders = ",".join("?" * len(message_ids))
+        rows = conn.execute(f"""
+            SELECT id, yat_text(content, format, dict_id) FROM messages
+            WHERE id IN ({placeholders})
+            ORDER BY id ASC
+        """, list(message_ids)).fetchall()
+        conn.close()
+        return rows
+    
+    def get_message_refs(self, message_ids: List[int]) -> Dict[int, Dict]:
+        """Nachrichten inkl. Konversations-Titel zu einer Liste von IDs"""
+        if not message_ids:
+            return {}
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        placeholders = ",".join("?" * len(message_ids))
+        cursor.execute(f"""
+            SELECT m.id, m.conversation_id, c.title, m.role, yat_text(m.content, m.format, m.dict_id), m.timestamp
+            FROM messages m
+            JOIN conversations c ON c.id = m.conversation_id
+            WHERE m.id IN ({placeholders})
+        """, list(message_ids))
+        
+        refs = {}
+        for row in cursor.fetchall():
+            refs[row[0]] = {
+                "message_id": row[0],
+                "conversation_id": row[1],
+                "title": row[2],
+                "role": row[3],
+                "content": row[4],
+                "timestamp": row[5]
+            }
+        
+        conn.close()
+        return refs
+    
+    def search_messages(self, query: str, limit: int = 20) -> List[Dict]:
+        """Teilstring-Suche über alle Nachrichten (neueste zuerst)"""
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        # Unkomprimierte Zeilen direkt per LIKE, komprimierte werden dafür entpackt
+        cursor.execute("""
+            SELECT m.id, m.conversation_id, c.title, m.role, yat_text(m.content, m.format, m.dict_id), m.timestamp
+            FROM messages m
+            JOIN conversations c ON c.id = m.conversation_id
+            WHERE CASE WHEN typeof(m.content) = 'blob'
+                       THEN yat_text(m.content, m.format, m.dict_id) LIKE ? ESCAPE '\\'
+                       ELSE m.content LIKE ? ESCAPE '\\' END
+            ORDER BY m.timestamp DESC, m.id DESC
+            LIMIT ?
+        """, (pattern, pattern, limit))
+        
+        results = [{
+            "message_id": row[0],
+            "conversation_id": row[1],
+            "title": row[2],
+            "role": row[3],
+            "content": row[4],
+            "timestamp": row[5]
+        } for row in cursor.fetchall()]
+        
+        conn.close()
+        return results
+    
+    async def semantic_search(self, query: str, k: int = 10) -> List[Dict]:
+        """Bedeutungs-Suche über alle Nachrichten (leer ohne Embedding-Index)"""
+        if self.message_index is None:
+            return []
+        return await self.message_index.search(query, k)
+    
+    async def get_related_conversations(self, conversation_id: str, k: int = 5) -> List[Dict]:
+        """Inhaltlich ähnliche Konversationen (leer ohne Embedding-Index)"""
+        if self.message_index is None:
+            return []
+        return await self.message_index.related_conversations(conversation_id, k)
+    
+    def get_conversation_preview(self, conversation_id: str) -> Optional[str]:
+        """Hole ersten User-Message als Preview"""
+        conn = connect(self.db_path)
+        row = conn.execute("SELECT preview FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        conn.close()
+        
+        if row and row[0]:
             # Erste 50 Zeichen
             preview = row[0][:50]
             if len(row[0]) > 50:
                 preview += "..."
             return preview
         return None
+
+
+CONVERSATION_STATS_COLUMNS = {
+    "message_count": "INTEGER DEFAULT 0",
+    "preview": "TEXT",
+    "last_message_at": "TEXT",
+    "char_count": "INTEGER DEFAULT 0",
+    "token_count": "INTEGER DEFAULT 0",
+}
+CONVERSATION_FIELDS = ["id", "title", "provider_id", "model_id", "created_at", "updated_at"] + list(CONVERSATION_STATS_COLUMNS)
+CONVERSATION_COLUMNS = ", ".join(CONVERSATION_FIELDS)
+
+
+def _conversation_row(row) -> Dict:
+    return dict(zip(CONVERSATION_FIELDS, row))
+
+
+def _iter_rows(cursor, batch_size: int) -> Iterator[tuple]:
+    """Zeilen eines Cursors blockweise holen (fetchmany) statt fetchall()"""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def _stored_size(value) -> int:
+    if value is None:
+        return 0
+    return len(value) if isinstance(value, bytes) else len(value.encode("utf-8"))
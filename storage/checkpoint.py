@@ -0,0 +1,87 @@
+import asyncio
+import time
+import uuid
+from typing import Dict, Optional
+from core.providers.types import Message
+from .base import ChatStorage, INTERRUPTED_MARKER
+
+DEFAULT_CHECKPOINT_MS = 1000      # Spätestens so oft wird der Zwischenstand gesichert ...
+DEFAULT_CHECKPOINT_CHARS = 4096   # ... oder sobald so viele neue Zeichen da sind
+
+
+class ReplyCheckpoint:
+    """
+    Crash-Schutz für eine gestreamte Antwort.
+
+    update() wird pro Chunk aufgerufen und kostet dabei fast nichts: nur wenn
+    interval_ms vergangen oder every_chars neue Zeichen angekommen sind, wird der
+    bisherige Text als Draft gesichert (ein Upsert, im Hintergrund, nie zwei
+    gleichzeitig). finish() ersetzt den Draft atomar durch die fertige Nachricht.
+    Stürzt der Prozess vorher ab, macht ChatStorage.recover_drafts() beim nächsten
+    Start eine als unterbrochen markierte Nachricht daraus.
+    """
+
+    def __init__(
+        self,
+        storage: ChatStorage,
+        conversation_id: str,
+        message: Message,
+        interval_ms: float = DEFAULT_CHECKPOINT_MS,
+        every_chars: int = DEFAULT_CHECKPOINT_CHARS
+    ):
+        self.storage = storage
+        self.conversation_id = conversation_id
+        self.message = message
+        self.interval_s = max(0.0, float(interval_ms)) / 1000
+        self.every_chars = max(0, int(every_chars))
+        self.draft_id = uuid.uuid4().hex
+
+        self._last_time = time.perf_counter()
+        self._last_chars = 0
+        self._inflight: Optional[asyncio.Task] = None
+
+        # Statistik (Schreib-Verstärkung = (Draft-Bytes + finale Bytes) / finale Bytes)
+        self.checkpoints = 0
+        self.draft_bytes = 0
+        self.final_bytes = 0
+
+    def update(self, content: str):
+        """Pro Chunk aufrufen (synchron, blockiert den Stream nie)"""
+        if self._inflight is not None and not self._inflight.done():
+            return
+        now = time.perf_counter()
+        if now - self._last_time < self.interval_s and len(content) - self._last_chars < self.every_chars:
+            return
+        self._last_time = now
+        self._last_chars = len(content)
+        snapshot = self.message.model_copy(update={"content": content}, deep=True)
+        self._inflight = asyncio.create_task(self._save(snapshot))
+
+    async def _save(self, snapshot: Message):
+        try:
+            await self.storage.save_draft(self.draft_id, self.conversation_id, snapshot)
+            self.checkpoints += 1
+            self.draft_bytes += len(snapshot.content.encode("utf-8"))
+        except Exception as e:
+            print(f"[WARN] Reply checkpoint failed: {e}")
+
+    async def finish(self, content: Optional[str] = None, interrupted: bool = False) -> int:
+        """Fertige (oder abgebrochene) Antwort speichern, gibt die Message-ID zurück"""
+        if self._inflight is not None:
+            await self._inflight  # Ein späterer Draft darf die fertige Nachricht nicht überholen
+        if content is not None:
+            self.message.content = content
+        if interrupted:
+            self.message.content += INTERRUPTED_MARKER
+            self.message.metadata["interrupted"] = True
+        self.final_bytes = len(self.message.content.encode("utf-8"))
+        return await self.storage.finalize_draft(self.draft_id, self.conversation_id, self.message)
+
+    def get_stats(self) -> Dict:
+        final = max(1, self.final_bytes)
+        return {
+            "checkpoints": self.checkpoints,
+            "draft_bytes": self.draft_bytes,
+            "final_bytes": self.final_bytes,
+            "write_amplification": round((self.draft_bytes + self.final_bytes) / final, 2),
+        }
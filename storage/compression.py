@@ -0,0 +1,107 @@
+import zlib
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+
+FORMAT_PLAIN = 0       # TEXT wie bisher
+FORMAT_ZLIB = 1        # BLOB, zlib
+FORMAT_ZLIB_DICT = 2   # BLOB, zlib mit vortrainiertem Wörterbuch (dict_id)
+
+DEFAULT_THRESHOLD = 1024       # Bytes; kleinere Inhalte bleiben TEXT
+DEFAULT_LEVEL = 6
+DICTIONARY_SIZE = 32 * 1024    # zlib sieht maximal 32 KB zurück - mehr bringt nichts
+MIN_SAVING = 0.9               # Nur speichern, wenn komprimiert < 90% der Originalgröße
+
+
+def train_dictionary(samples: Iterable[str], size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    Wörterbuch für zlib (zdict) aus Beispiel-Nachrichten: häufige Zeilen
+    (Code-Zeilen, Markdown-Gerüst, Floskeln) nach Nutzen = Häufigkeit x Länge.
+    Die wertvollsten stehen am Ende, dort findet zlib sie mit den kürzesten Distanzen.
+    """
+    counts = Counter()
+    for sample in samples:
+        for line in set(sample.splitlines(keepends=True)):
+            if 4 <= len(line) <= 200:
+                counts[line] += 1
+
+    picked, total = [], 0
+    for line, count in sorted(counts.items(), key=lambda item: item[1] * len(item[0]), reverse=True):
+        if count < 2:
+            break
+        encoded = line.encode("utf-8")
+        if total + len(encoded) > size:
+            continue
+        picked.append(encoded)
+        total += len(encoded)
+    return b"".join(reversed(picked))
+
+
+class MessageCodec:
+    """
+    Transparente Kompression großer Nachrichten-Inhalte (messages.content/metadata).
+
+    Ob ein Feld komprimiert ist, erkennt decode() am Typ (bytes statt str), das
+    Format der Zeile (format, dict_id) sagt wie. Kleine oder schlecht
+    komprimierbare Inhalte bleiben unverändert TEXT.
+    """
+
+    def __init__(self, threshold: int = DEFAULT_THRESHOLD, level: int = DEFAULT_LEVEL):
+        self.threshold = threshold  # 0 = nie komprimieren
+        self.level = level
+        self.dictionaries: Dict[int, bytes] = {}
+        self.active_dict_id: Optional[int] = None  # Wörterbuch für neue Nachrichten
+        # Lädt die Wörterbücher neu (ChatDatabase.load_dictionaries) - für dict_ids,
+        # die ein anderer Prozess (Worker, Tool) nach unserem Start trainiert hat
+        self.reload: Optional[Callable[[], None]] = None
+
+    def add_dictionary(self, dict_id: int, data: bytes, active: bool = False):
+        self.dictionaries[dict_id] = data
+        if active:
+            self.active_dict_id = dict_id
+
+    def _dictionary(self, dict_id: int) -> bytes:
+        data = self.dictionaries.get(dict_id)
+        if data is None and self.reload is not None:
+            self.reload()
+            data = self.dictionaries.get(dict_id)
+        if data is None:
+            raise ValueError(f"Unknown compression dictionary {dict_id}")
+        return data
+
+    def _compress(self, raw: bytes, dict_id: Optional[int]) -> bytes:
+        if dict_id is None:
+            return zlib.compress(raw, self.level)
+        compressor = zlib.compressobj(self.level, zdict=self._dictionary(dict_id))
+        return compressor.compress(raw) + compressor.flush()
+
+    def encode_row(self, content: str, metadata: str) -> Tuple[Union[str, bytes], Union[str, bytes], int, Optional[int]]:
+        """(content, metadata) -> (content, metadata, format, dict_id) für INSERT"""
+        if not self.threshold:
+            return content, metadata, FORMAT_PLAIN, None
+        dict_id = self.active_dict_id
+        fmt = FORMAT_ZLIB_DICT if dict_id is not None else FORMAT_ZLIB
+        compressed_any = False
+        fields = []
+        for value in (content, metadata):
+            raw = value.encode("utf-8")
+            if len(raw) >= self.threshold:
+                packed = self._compress(raw, dict_id)
+                if len(packed) < len(raw) * MIN_SAVING:
+                    fields.append(packed)
+                    compressed_any = True
+                    continue
+            fields.append(value)
+        if not compressed_any:
+            return content, metadata, FORMAT_PLAIN, None
+        return fields[0], fields[1], fmt, dict_id
+
+    def decode(self, value, fmt: Optional[int], dict_id: Optional[int] = None) -> Optional[str]:
+        """Ein Feld einer Zeile zurück in Text (str bleibt str)"""
+        if value is None or isinstance(value, str) or not fmt:
+            return value.decode("utf-8") if isinstance(value, bytes) else value
+        if fmt == FORMAT_ZLIB:
+            return zlib.decompress(value).decode("utf-8")
+        if fmt == FORMAT_ZLIB_DICT:
+            decompressor = zlib.decompressobj(zdict=self._dictionary(dict_id))
+            return (decompressor.decompress(value) + decompressor.flush()).decode("utf-8")
+        raise ValueError(f"Unknown message format {fmt}")
@@ -0,0 +1,433 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from core.sqlite_utils import connect
+from .chat_db import ChatDatabase, CONVERSATION_FIELDS
+
+DEFAULT_INTERVAL_MINUTES = 60   # Höchstens ein Wartungslauf pro Intervall ...
+DEFAULT_IDLE_SECONDS = 30       # ... und nur, wenn so lange keine Antwort gestreamt wurde
+FIRST_RUN_DELAY = 120           # Sekunden nach dem Start (Index-Backfill, Wörterbuch zuerst)
+POLL_SECONDS = 5
+ARCHIVE_BATCH = 20              # Konversationen pro Transaktion (Schreibsperre kurz halten)
+VACUUM_STEP_PAGES = 256         # Seiten pro incremental_vacuum-Schritt (1 MB bei 4-KB-Seiten)
+FULL_VACUUM_RATIO = 0.2         # Einmalige Umstellung auf auto_vacuum=INCREMENTAL per VACUUM ab 20% freier Seiten ...
+FULL_VACUUM_MAX_MB = 512        # ... und nur bis zu dieser Dateigröße (VACUUM sperrt die ganze Datei)
+SIZE_MIN_AGE_DAYS = 7           # Größen-Limit archiviert nie Chats, die in den letzten 7 Tagen benutzt wurden
+ANALYZE_LIMIT = 1000            # PRAGMA analysis_limit: ANALYZE liest höchstens so viele Zeilen pro Index
+
+AUTO_VACUUM_INCREMENTAL = 2
+MESSAGE_COLUMNS = "conversation_id, role, content, timestamp, metadata, format, dict_id"
+SUMMARY_COLUMNS = "conversation_id, content, covered_messages, token_count, model, updated_at"
+
+
+class DatabaseMaintenance:
+    """
+    Hintergrund-Wartung der Chat-Datenbank (storage/chat_db.py), nur bei Leerlauf.
+
+    Ein Lauf macht der Reihe nach:
+    - Retention: Chats älter als retention_days, jenseits der max_conversations
+      neuesten oder (älteste zuerst) bis die Datei unter max_mb liegt, werden ins
+      Archiv verschoben (action="archive", eigene Datei, per ATTACH in derselben
+      Transaktion kopiert und gelöscht) oder gelöscht (action="delete")
+    - Vacuum: freie Seiten schrittweise zurückgeben (auto_vacuum=INCREMENTAL);
+      ältere Dateien werden einmalig per VACUUM umgestellt (nicht mit
+      allow_full_vacuum=False, d.h. wenn andere Worker die Datei benutzen)
+    - Statistik: ANALYZE (begrenzt über analysis_limit), WAL-Checkpoint
+
+    Alles läuft in einem Worker-Thread in kleinen Transaktionen. run_now() prüft
+    währenddessen is_idle() - startet ein Stream, bricht der Lauf nach dem
+    aktuellen Schritt ab und setzt beim nächsten Leerlauf fort.
+    Das Archiv ist selbst eine Chat-Datenbank (tools/chat_export.py --db ...).
+    """
+
+    def __init__(
+        self,
+        db: ChatDatabase,
+        archive_path: Optional[str] = None,
+        retention_days: float = 0,
+        max_conversations: int = 0,
+        max_mb: float = 0,
+        action: str = "archive",
+        interval_minutes: float = DEFAULT_INTERVAL_MINUTES,
+        idle_seconds: float = DEFAULT_IDLE_SECONDS,
+        is_idle: Optional[Callable[[], bool]] = None,
+        poll_seconds: float = POLL_SECONDS,
+        allow_full_vacuum: bool = True
+    ):
+        if action not in ("archive", "delete"):
+            raise ValueError(f"Unknown retention action '{action}'")
+        self.db = db
+        self.archive_path = archive_path
+        self.retention_days = max(0.0, float(retention_days))      # 0 = aus
+        self.max_conversations = max(0, int(max_conversations))    # 0 = aus
+        self.max_mb = max(0.0, float(max_mb))                      # 0 = aus
+        self.action = action
+        self.interval = max(1.0, float(interval_minutes)) * 60
+        self.idle_seconds = max(0.0, float(idle_seconds))
+        self.is_idle = is_idle or (lambda: True)
+        self.poll_seconds = poll_seconds
+        self.allow_full_vacuum = allow_full_vacuum  # False bei mehreren Workern (VACUUM sperrt die Datei für alle)
+
+        self._task: Optional[asyncio.Task] = None
+        self._stop_requested = False
+        self._archive_ready = False
+        self.last_run = time.monotonic() - self.interval + FIRST_RUN_DELAY
+        self.last_report: Optional[Dict] = None
+        self.runs = 0
+        self.failed_runs = 0
+        self.interrupted_runs = 0
+
+    # --- Hilfen ----------------------------------------------------------------
+
+    def _should_continue(self) -> bool:
+        return not self._stop_requested
+
+    def _ensure_archive(self):
+        """Archiv-Datei mit dem gleichen Schema wie die Chat-Datenbank anlegen"""
+        if not self._archive_ready:
+            ChatDatabase(self.archive_path, compress_threshold=0)
+            self._archive_ready = True
+
+    def status(self) -> Dict:
+        """Größe, freie Seiten und Vacuum-Modus der Chat-Datenbank"""
+        conn = connect(self.db.db_path)
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        conversations = conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+        conn.close()
+        status = {
+            "size_mb": round(pages * page_size / 1024 / 1024, 2),
+            "used_mb": round((pages - free) * page_size / 1024 / 1024, 2),
+            "free_pages": free,
+            "free_ratio": round(free / pages, 3) if pages else 0,
+            "incremental_vacuum": auto_vacuum == AUTO_VACUUM_INCREMENTAL,
+            "conversations": conversations,
+        }
+        if self.archive_path and os.path.exists(self.archive_path):
+            conn = connect(self.archive_path)
+            status["archived_conversations"] = conn.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+            conn.close()
+        return status
+
+    # --- Retention -------------------------------------------------------------
+
+    def retention_candidates(self, limit: int = ARCHIVE_BATCH) -> List[tuple]:
+        """(id, updated_at) der nächsten Chats, die nach Alter oder Anzahl fällig sind (älteste zuerst)"""
+        conditions, params = [], []
+        if self.retention_days:
+            conditions.append("updated_at < ?")
+            params.append((datetime.now() - timedelta(days=self.retention_days)).isoformat())
+        if self.max_conversations:
+            conditions.append("""id NOT IN (
+                SELECT id FROM conversations ORDER BY updated_at DESC, id DESC LIMIT ?
+            )""")
+            params.append(self.max_conversations)
+        if not conditions:
+            return []
+        conn = connect(self.db.db_path)
+        rows = conn.execute(f"""
+            SELECT id, updated_at FROM conversations
+            WHERE {' OR '.join(conditions)}
+            ORDER BY updated_at ASC, id ASC
+            LIMIT ?
+        """, params + [limit]).fetchall()
+        conn.close()
+        return rows
+
+    def _oldest_for_size(self, limit: int = ARCHIVE_BATCH) -> List[tuple]:
+        cutoff = (datetime.now() - timedelta(days=SIZE_MIN_AGE_DAYS)).isoformat()
+        conn = connect(self.db.db_path)
+        rows = conn.execute("""
+            SELECT id, updated_at FROM conversations
+            WHERE updated_at < ?
+            ORDER BY updated_at ASC, id ASC
+            LIMIT ?
+        """, (cutoff, limit)).fetchall()
+        conn.close()
+        return rows
+
+    def _used_mb(self) -> float:
+        conn = connect(self.db.db_path)
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        used = conn.execute("PRAGMA page_count").fetchone()[0] - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.close()
+        return used * page_size / 1024 / 1024
+
+    def _move(self, conn, source: str, target: str, conversation_ids: List[str]) -> List[int]:
+        """Konversationen samt Nachrichten/Zusammenfassung von source nach target (Schemas "main"/"archive")"""
+        marks = ",".join("?" * len(conversation_ids))
+        fields = ", ".join(CONVERSATION_FIELDS)
+        # Erst im Ziel entfernen: ein abgebrochener früherer Lauf hinterlässt so keine Doppelten
+        conn.execute(f"DELETE FROM {target}.messages WHERE conversation_id IN ({marks})", conversation_ids)
+        conn.execute(f"DELETE FROM {target}.conversation_summaries WHERE conversation_id IN ({marks})", conversation_ids)
+        conn.execute(f"""
+            INSERT OR REPLACE INTO {target}.conversations ({fields})
+            SELECT {fields} FROM {source}.conversations WHERE id IN ({marks})
+        """, conversation_ids)
+        conn.execute(f"""
+            INSERT INTO {target}.messages ({MESSAGE_COLUMNS})
+            SELECT {MESSAGE_COLUMNS} FROM {source}.messages WHERE conversation_id IN ({marks}) ORDER BY id
+        """, conversation_ids)
+        conn.execute(f"""
+            INSERT INTO {target}.conversation_summaries ({SUMMARY_COLUMNS})
+            SELECT {SUMMARY_COLUMNS} FROM {source}.conversation_summaries WHERE conversation_id IN ({marks})
+        """, conversation_ids)
+        return _purge(conn, source, conversation_ids)
+
+    def archive_conversations(self, candidates: List[tuple]) -> Dict:
+        """
+        (id, updated_at)-Paare ins Archiv verschieben, in EINER Transaktion. Chats, die
+        seit der Auswahl benutzt wurden (updated_at anders) oder eine laufende
+        Antwort haben (Draft), bleiben. Gibt die verschobenen IDs und Message-IDs zurück.
+        """
+        self._ensure_archive()
+        conn = connect(self.db.db_path)
+        try:
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+            conn.execute("BEGIN IMMEDIATE")
+            ids = self._still_due(conn, candidates)
+            message_ids = []
+            if ids:
+                # Komprimierte Nachrichten brauchen ihr Wörterbuch (IDs bleiben gleich)
+                conn.execute("INSERT OR IGNORE INTO archive.compression_dicts SELECT * FROM main.compression_dicts")
+                message_ids = self._move(conn, "main", "archive", ids)
+            conn.commit()
+            return {"conversations": ids, "message_ids": message_ids}
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def delete_conversations(self, candidates: List[tuple]) -> Dict:
+        """Wie archive_conversations, aber ohne Kopie"""
+        conn = connect(self.db.db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            ids = self._still_due(conn, candidates)
+            message_ids = _purge(conn, "main", ids) if ids else []
+            conn.commit()
+            return {"conversations": ids, "message_ids": message_ids}
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _still_due(self, conn, candidates: List[tuple]) -> List[str]:
+        if not candidates:
+            return []
+        selected = dict(candidates)
+        marks = ",".join("?" * len(selected))
+        rows = conn.execute(f"""
+            SELECT c.id, c.updated_at FROM main.conversations c
+            WHERE c.id IN ({marks})
+              AND NOT EXISTS (SELECT 1 FROM main.message_drafts d WHERE d.conversation_id = c.id)
+        """, list(selected)).fetchall()
+        return [cid for cid, updated_at in rows if selected[cid] == updated_at]
+
+    def restore_conversations(self, conversation_ids: List[str]) -> Dict:
+        """
+        Archivierte Chats zurückholen. updated_at wird auf jetzt gesetzt, sonst wären sie beim
+        nächsten Lauf wieder fällig. Neue Message-IDs: der semantische Index holt sie beim nächsten Start nach.
+        """
+        if not self.archive_path or not os.path.exists(self.archive_path) or not conversation_ids:
+            return {"conversations": [], "message_ids": []}
+        conn = connect(self.db.db_path)
+        try:
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+            conn.execute("BEGIN IMMEDIATE")
+            marks = ",".join("?" * len(conversation_ids))
+            ids = [row[0] for row in conn.execute(
+                f"SELECT id FROM archive.conversations WHERE id IN ({marks})", conversation_ids
+            )]
+            if ids:
+                self._move(conn, "archive", "main", ids)
+                conn.execute(f"UPDATE main.conversations SET updated_at = ? WHERE id IN ({','.join('?' * len(ids))})",
+                             [datetime.now().isoformat()] + ids)
+            conn.commit()
+            return {"conversations": ids, "message_ids": []}
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def apply_retention(self) -> Dict:
+        """Fällige Chats blockweise archivieren/löschen, bis nichts mehr fällig ist oder ein Stream startet"""
+        remove = self.archive_conversations if self.action == "archive" else self.delete_conversations
+        moved, message_ids = [], []
+
+        def drain(select):
+            while self._should_continue():
+                candidates = select()
+                if not candidates:
+                    return
+                result = remove(candidates)
+                if not result["conversations"]:
+                    return  # Alle Kandidaten gerade in Benutzung
+                moved.extend(result["conversations"])
+                message_ids.extend(result["message_ids"])
+
+        drain(self.retention_candidates)
+        if self.max_mb and self._used_mb() > self.max_mb:
+            drain(lambda: self._oldest_for_size() if self._used_mb() > self.max_mb else [])
+        return {"conversations": moved, "message_ids": message_ids}
+
+    # --- Vacuum & Statistik ----------------------------------------------------
+
+    def vacuum(self) -> Dict:
+        """Freie Seiten an das Dateisystem zurückgeben, gibt die freigegebenen MB zurück"""
+        conn = connect(self.db.db_path)
+        try:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            pages = conn.execute("PRAGMA page_count").fetchone()[0]
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if not free:
+                return {"freed_mb": 0.0, "mode": None}
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+                # Modus lässt sich nur per VACUUM umstellen - einmalig, wenn es sich lohnt
+                if (not self.allow_full_vacuum or free / pages < FULL_VACUUM_RATIO
+                        or pages * page_size > FULL_VACUUM_MAX_MB * 1024 * 1024):
+                    return {"freed_mb": 0.0, "mode": None}
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                mode = "full"
+            else:
+                mode = "incremental"
+                while self._should_continue():
+                    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                    if not before:
+                        break
+                    # executescript führt das PRAGMA bis zum Ende aus (execute() gibt nur eine Seite frei)
+                    conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES});")
+                    if conn.execute("PRAGMA freelist_count").fetchone()[0] >= before:
+                        break
+            freed = pages - conn.execute("PRAGMA page_count").fetchone()[0]
+            return {"freed_mb": round(freed * page_size / 1024 / 1024, 2), "mode": mode}
+        finally:
+            conn.close()
+
+    def refresh_statistics(self):
+        """Planer-Statistik auffrischen (begrenztes ANALYZE) und das WAL zurücksetzen"""
+        conn = connect(self.db.db_path)
+        try:
+            conn.execute(f"PRAGMA analysis_limit = {ANALYZE_LIMIT}")
+            conn.execute("ANALYZE")
+            conn.commit()
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+
+    def run(self) -> Dict:
+        """Ein Wartungslauf (blockierend, für Worker-Thread oder Tool)"""
+        started = time.perf_counter()
+        report = {"conversations": [], "message_ids": [], "freed_mb": 0.0, "vacuum": None, "analyzed": False}
+        if self._should_continue():
+            report.update(self.apply_retention())
+        if self._should_continue():
+            vacuum = self.vacuum()
+            report["freed_mb"], report["vacuum"] = vacuum["freed_mb"], vacuum["mode"]
+        if self._should_continue():
+            self.refresh_statistics()
+            report["analyzed"] = True
+        report["interrupted"] = not self._should_continue()
+        report["duration_s"] = round(time.perf_counter() - started, 2)
+        return report
+
+    # --- Scheduler -------------------------------------------------------------
+
+    async def run_now(self) -> Dict:
+        """Wartungslauf im Worker-Thread; startet währenddessen ein Stream, wird nach dem aktuellen Schritt abgebrochen"""
+        self._stop_requested = False
+        task = asyncio.create_task(asyncio.to_thread(self.run))
+        while not task.done():
+            if not self.is_idle():
+                self._stop_requested = True
+            await asyncio.wait({task}, timeout=0.5)
+        report = await task
+        self._stop_requested = False
+
+        if report["message_ids"] and self.db.message_index is not None:
+            self.db.message_index.remove(report["message_ids"])
+        self.last_run = time.monotonic()
+        self.last_report = report
+        self.runs += 1
+        self.interrupted_runs += report["interrupted"]
+        return report
+
+    async def _loop(self):
+        idle_since = None
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                now = time.monotonic()
+                if not self.is_idle():
+                    idle_since = None
+                    continue
+                idle_since = idle_since or now
+                if now - idle_since < self.idle_seconds or now - self.last_run < self.interval:
+                    continue
+                report = await self.run_now()
+                if report["conversations"] or report["freed_mb"]:
+                    verb = "archived" if self.action == "archive" else "deleted"
+                    print(f"[OK] DB maintenance: {len(report['conversations'])} chats {verb}, "
+                          f"{report['freed_mb']:.1f} MB freed ({report['duration_s']:.1f}s)")
+            except Exception as e:
+                self.failed_runs += 1
+                self.last_run = time.monotonic()  # Nicht im Sekundentakt wiederholen
+                print(f"[WARN] DB maintenance failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stop_requested = True
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        report = self.last_report or {}
+        return {
+            "runs": self.runs,
+            "interrupted_runs": self.interrupted_runs,
+            "failed_runs": self.failed_runs,
+            "last_archived": len(report.get("conversations", [])),
+            "last_freed_mb": report.get("freed_mb", 0.0),
+            "last_vacuum": report.get("vacuum"),
+            "last_duration_s": report.get("duration_s"),
+            "action": self.action,
+        }
+
+
+def _purge(conn, schema: str, conversation_ids: List[str]) -> List[int]:
+    """Konversationen mit allem Zubehör in schema löschen, gibt die gelöschten Message-IDs zurück"""
+    marks = ",".join("?" * len(conversation_ids))
+    message_ids = [row[0] for row in conn.execute(
+        f"SELECT id FROM {schema}.messages WHERE conversation_id IN ({marks})", conversation_ids
+    )]
+    for table, column in (("messages", "conversation_id"), ("conversation_summaries", "conversation_id"),
+                          ("message_drafts", "conversation_id"), ("conversations", "id")):
+        conn.execute(f"DELETE FROM {schema}.{table} WHERE {column} IN ({marks})", conversation_ids)
+    return message_ids
+
+
+def idle_without_streams(llm_manager) -> Callable[[], bool]:
+    """
+    is_idle für DatabaseMaintenance: keine laufende Antwort in diesem Prozess und,
+    mit llm_manager.stream_activity (Multi-Worker), in keinem anderen Worker
+    """
+    def is_idle() -> bool:
+        activity = llm_manager.stream_activity
+        return llm_manager.active_stream_count == 0 and (activity is None or activity.idle())
+    return is_idle
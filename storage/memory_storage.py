@@ -0,0 +1,152 @@
+import itertools
+from datetime import datetime
+from typing import Dict, List, Optional
+from core.providers.types import Message, Role
+from .base import (
+    ChatStorage, INTERRUPTED_MARKER, PREVIEW_CHARS, CONVERSATION_SORTS, encode_cursor, decode_cursor, message_tokens
+)
+
+
+class MemoryChatStorage(ChatStorage):
+    """
+    ChatStorage nur im Arbeitsspeicher (Tests, Benchmarks, "storage_backend": "memory").
+
+    Verhält sich wie das SQLite-Backend (gleiche Sortierung, gleiche Dict-Felder,
+    Zeitstempel als ISO-Strings), verliert aber alles beim Beenden.
+    """
+
+    def __init__(self):
+        self._conversations: Dict[str, Dict] = {}
+        self._messages: Dict[str, List[tuple]] = {}  # conversation_id -> [(message_id, Message)]
+        self._summaries: Dict[str, Dict] = {}
+        self._drafts: Dict[str, tuple] = {}  # draft_id -> (conversation_id, Message)
+        self._ids = itertools.count(1)
+
+    async def create_conversation(self, conversation_id: str, title: str = "New Conversation",
+                                  provider_id: str = "", model_id: str = "") -> str:
+        if conversation_id in self._conversations:
+            raise ValueError(f"Conversation '{conversation_id}' already exists")
+        now = datetime.now().isoformat()
+        self._conversations[conversation_id] = {
+            "id": conversation_id,
+            "title": title,
+            "provider_id": provider_id,
+            "model_id": model_id,
+            "created_at": now,
+            "updated_at": now,
+            "message_count": 0,
+            "preview": None,
+            "last_message_at": None,
+            "char_count": 0,
+            "token_count": 0
+        }
+        self._messages[conversation_id] = []
+        return conversation_id
+
+    async def get_conversations(self, limit: int = 50) -> List[Dict]:
+        conversations = sorted(self._conversations.values(), key=lambda c: c["updated_at"], reverse=True)
+        if limit is not None and limit >= 0:
+            conversations = conversations[:limit]
+        return [dict(c) for c in conversations]
+
+    async def list_conversations(self, limit: int = 50, cursor: Optional[str] = None, provider_id: Optional[str] = None,
+                                 model_id: Optional[str] = None, sort: str = "updated") -> Dict:
+        if sort not in CONVERSATION_SORTS:
+            raise ValueError(f"Unknown sort '{sort}'")
+        field, descending = CONVERSATION_SORTS[sort]
+        conversations = [
+            c for c in self._conversations.values()
+            if (provider_id is None or c["provider_id"] == provider_id) and (model_id is None or c["model_id"] == model_id)
+        ]
+        conversations.sort(key=lambda c: (c[field], c["id"]), reverse=descending)
+        if cursor:
+            position = tuple(decode_cursor(cursor))
+            conversations = [
+                c for c in conversations
+                if ((c[field], c["id"]) < position if descending else (c[field], c["id"]) > position)
+            ]
+        page = [dict(c) for c in conversations[:limit]]
+        next_cursor = encode_cursor(page[-1][field], page[-1]["id"]) if len(conversations) > limit and page else None
+        return {"conversations": page, "next_cursor": next_cursor}
+
+    async def update_conversation_title(self, conversation_id: str, new_title: str):
+        conversation = self._conversations.get(conversation_id)
+        if conversation:
+            conversation["title"] = new_title
+            conversation["updated_at"] = datetime.now().isoformat()
+
+    async def delete_conversation(self, conversation_id: str):
+        self._conversations.pop(conversation_id, None)
+        self._messages.pop(conversation_id, None)
+        self._summaries.pop(conversation_id, None)
+        self._drafts = {k: v for k, v in self._drafts.items() if v[0] != conversation_id}
+
+    async def save_message(self, conversation_id: str, message: Message) -> int:
+        message_id = next(self._ids)
+        self._messages.setdefault(conversation_id, []).append((message_id, message.model_copy(deep=True)))
+        conversation = self._conversations.get(conversation_id)
+        if conversation:
+            conversation["updated_at"] = datetime.now().isoformat()
+            conversation["message_count"] += 1
+            conversation["char_count"] += len(message.content)
+            conversation["token_count"] += message_tokens(message.metadata)
+            conversation["last_message_at"] = max(conversation["last_message_at"] or "", message.timestamp.isoformat())
+            if conversation["preview"] is None and message.role == Role.USER:
+                conversation["preview"] = message.content[:PREVIEW_CHARS]
+        return message_id
+
+    async def load_messages(self, conversation_id: str) -> List[Message]:
+        rows = sorted(self._messages.get(conversation_id, []), key=lambda row: (row[1].timestamp, row[0]))
+        return [message.model_copy(deep=True) for _, message in rows]
+
+    async def save_summary(self, conversation_id: str, content: str, covered_messages: int,
+                           token_count: int = 0, model: str = ""):
+        self._summaries[conversation_id] = {
+            "content": content,
+            "covered_messages": covered_messages,
+            "token_count": token_count,
+            "model": model,
+            "updated_at": datetime.now().isoformat()
+        }
+
+    async def load_summary(self, conversation_id: str) -> Optional[Dict]:
+        summary = self._summaries.get(conversation_id)
+        return dict(summary) if summary else None
+
+    async def search_messages(self, query: str, limit: int = 20) -> List[Dict]:
+        needle = query.lower()
+        hits = []
+        for conversation_id, rows in self._messages.items():
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                continue
+            for message_id, message in rows:
+                if needle in message.content.lower():
+                    hits.append({
+                        "message_id": message_id,
+                        "conversation_id": conversation_id,
+                        "title": conversation["title"],
+                        "role": message.role.value,
+                        "content": message.content,
+                        "timestamp": message.timestamp.isoformat()
+                    })
+        hits.sort(key=lambda hit: (hit["timestamp"], hit["message_id"]), reverse=True)
+        return hits[:limit]
+
+    async def save_draft(self, draft_id: str, conversation_id: str, message: Message):
+        self._drafts[draft_id] = (conversation_id, message.model_copy(deep=True))
+
+    async def finalize_draft(self, draft_id: str, conversation_id: str, message: Message) -> int:
+        self._drafts.pop(draft_id, None)
+        return await self.save_message(conversation_id, message)
+
+    async def recover_drafts(self) -> List[Dict]:
+        recovered = []
+        drafts, self._drafts = self._drafts, {}
+        for conversation_id, message in sorted(drafts.values(), key=lambda d: d[1].timestamp):
+            if conversation_id not in self._conversations:
+                continue
+            message.content += INTERRUPTED_MARKER
+            message.metadata["interrupted"] = True
+            recovered.append({"message_id": await self.save_message(conversation_id, message), "content": message.content})
+        return recovered
@@ -0,0 +1,88 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from core.paths import get_data_path
+from core.sqlite_utils import connect
+
+MAX_WAIT_SECONDS = 120.0  # Danach wird die Anfrage trotzdem gesendet (Provider meldet ggf. 429)
+
+
+class SharedRateLimiter:
+    """
+    Token-Bucket pro Provider, gespeichert in SQLite.
+
+    Alle Prozesse (Worker im Multi-Worker-Web-Modus, siehe core/cluster.py) teilen
+    sich dieselbe Datei, d.h. das Limit gilt für die ganze Installation und nicht
+    pro Worker. Jede Reservierung ist eine kurze BEGIN IMMEDIATE-Transaktion.
+
+    limits: provider_id -> Anfragen pro Minute (Burst = 1/6 davon, mindestens 1)
+    """
+
+    def __init__(self, limits: Dict[str, float], db_path: Optional[str] = None):
+        self.limits = {pid: float(rpm) for pid, rpm in limits.items() if rpm and float(rpm) > 0}
+        self.db_path = db_path or get_data_path("rate_limits.db")
+        self.waited_ms = 0.0
+        self.init_database()
+
+    def init_database(self):
+        """Erstelle Bucket-Tabelle falls nicht vorhanden"""
+        conn = connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL,
+                updated_at REAL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def _reserve(self, key: str, per_minute: float) -> float:
+        """Ein Token nehmen. Gibt 0 zurück oder die Wartezeit bis zum nächsten Token."""
+        rate = per_minute / 60.0
+        burst = max(1.0, per_minute / 6.0)
+        now = time.time()
+
+        conn = connect(self.db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            wait = 0.0
+            if tokens >= 1.0:
+                tokens -= 1.0
+            else:
+                wait = (1.0 - tokens) / rate
+            conn.execute("""
+                INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at)
+                VALUES (?, ?, ?)
+            """, (key, tokens, now))
+            conn.commit()
+            return wait
+        finally:
+            conn.close()
+
+    async def acquire(self, provider_id: str) -> float:
+        """Warten bis eine Anfrage an provider_id erlaubt ist. Gibt die Wartezeit in ms zurück (0 = sofort)."""
+        per_minute = self.limits.get(provider_id)
+        if not per_minute:
+            return 0.0
+
+        started = time.perf_counter()
+        throttled = False
+        while True:
+            wait = await asyncio.to_thread(self._reserve, provider_id, per_minute)
+            waited = time.perf_counter() - started
+            if wait <= 0 or waited >= MAX_WAIT_SECONDS:
+                break
+            throttled = True
+            await asyncio.sleep(min(wait, MAX_WAIT_SECONDS - waited))
+
+        if not throttled:
+            return 0.0
+        waited_ms = round((time.perf_counter() - started) * 1000, 1)
+        self.waited_ms += waited_ms
+        return waited_ms
+
+    def get_stats(self) -> Dict:
+        return {"limits": dict(self.limits), "waited_ms": round(self.waited_ms, 1)}
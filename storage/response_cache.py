@@ -0,0 +1,164 @@
+import sqlite3
+import json
+import hashlib
+import time
+from typing import Any, Dict, List, Optional
+from core.providers.types import Message
+from core.paths import get_data_path
+from core.sqlite_utils import connect
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+class ResponseCache:
+    """
+    SQLite-basierter Exact-Match-Cache für komplette Antworten.
+
+    Schlüssel = Provider + Modell + normalisierte Nachrichten + Sampling-Parameter.
+    Größenbegrenzt (LRU über last_used) und mit TTL.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        replay_chars_per_s: float = 0
+    ):
+        self.db_path = db_path or get_data_path("response_cache.db")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.replay_chars_per_s = replay_chars_per_s  # 0 = sofort ausspielen
+        self.hits = 0
+        self.misses = 0
+        self.init_database()
+
+    def init_database(self):
+        """Erstelle Cache-Tabelle falls nicht vorhanden"""
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                provider_id TEXT,
+                model_id TEXT,
+                content TEXT,
+                metadata TEXT,
+                created_at REAL,
+                last_used REAL,
+                hit_count INTEGER DEFAULT 0
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_last_used ON response_cache(last_used)")
+
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def make_key(provider_id: str, model_id: str, messages: List[Message], params: Optional[Dict[str, Any]] = None) -> str:
+        """Stabiler Hash über alles, was die Antwort beeinflusst (Metadaten/Zeitstempel zählen nicht)"""
+        normalized = [
+            {"role": m.role.value, "content": m.content.replace("\r\n", "\n").strip()}
+            for m in messages
+        ]
+        payload = json.dumps(
+            {"provider": provider_id, "model": model_id, "messages": normalized, "params": params or {}},
+            sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Lade Eintrag (None bei Miss oder abgelaufener TTL) und markiere ihn als benutzt"""
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+
+        now = time.time()
+        cursor.execute("""
+            SELECT content, metadata, created_at, hit_count
+            FROM response_cache
+            WHERE key = ?
+        """, (key,))
+        row = cursor.fetchone()
+
+        result = None
+        if row and (not self.ttl_seconds or now - row[2] <= self.ttl_seconds):
+            cursor.execute("""
+                UPDATE response_cache
+                SET last_used = ?, hit_count = hit_count + 1
+                WHERE key = ?
+            """, (now, key))
+            result = {
+                "content": row[0],
+                "metadata": json.loads(row[1]) if row[1] else {},
+                "created_at": row[2],
+                "hit_count": row[3] + 1,
+            }
+        elif row:
+            cursor.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+
+        conn.commit()
+        conn.close()
+
+        if result:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return result
+
+    def put(self, key: str, provider_id: str, model_id: str, content: str, metadata: Optional[Dict] = None):
+        """Speichere Antwort und räume danach auf (TTL + LRU)"""
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+
+        now = time.time()
+        cursor.execute("""
+            INSERT OR REPLACE INTO response_cache
+                (key, provider_id, model_id, content, metadata, created_at, last_used, hit_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+        """, (key, provider_id, model_id, content, json.dumps(metadata or {}), now, now))
+
+        self._evict(cursor, now)
+
+        conn.commit()
+        conn.close()
+
+    def _evict(self, cursor: sqlite3.Cursor, now: float):
+        if self.ttl_seconds:
+            cursor.execute("DELETE FROM response_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        if self.max_entries:
+            # Alles jenseits der max_entries zuletzt benutzten Einträge fliegt raus
+            cursor.execute("""
+                DELETE FROM response_cache
+                WHERE key IN (
+                    SELECT key FROM response_cache
+                    ORDER BY last_used DESC
+                    LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    def clear(self):
+        """Lösche alle Einträge"""
+        conn = connect(self.db_path)
+        conn.execute("DELETE FROM response_cache")
+        conn.commit()
+        conn.close()
+        self.hits = self.misses = 0
+
+    def get_stats(self) -> Dict:
+        """Größe und Trefferquote (Trefferquote seit Programmstart)"""
+        conn = connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(content)), 0) FROM response_cache")
+        entries, size = cursor.fetchone()
+        conn.close()
+
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "content_bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
@@ -0,0 +1,127 @@
+import asyncio
+import os
+from typing import Dict, List, Optional
+from core.providers.types import Message
+from .base import ChatStorage
+from .chat_db import ChatDatabase
+from .compression import DEFAULT_THRESHOLD
+from .write_buffer import WriteBehindBuffer, DEFAULT_FLUSH_MS, DEFAULT_MAX_PENDING
+
+DRAFT_STALE_SECONDS = 120  # Drafts anderer Worker gelten erst danach als verwaist
+
+
+class SQLiteChatStorage(ChatStorage):
+    """
+    ChatStorage auf Basis von ChatDatabase (SQLite-Datei).
+
+    Jeder Aufruf läuft per asyncio.to_thread, damit die Event-Loop (UI, Streams)
+    nie auf die Platte wartet. Für synchrone Helfer (Embedding-Index,
+    Migrationen) bleibt die ChatDatabase unter `self.db` erreichbar.
+
+    Mit write_behind (Standard) laufen neue Konversationen und Nachrichten aller
+    Sitzungen über einen WriteBehindBuffer: gebündelte Transaktionen statt einer
+    pro Nachricht. Alle anderen Zugriffe schreiben vorher den Puffer leer, sehen
+    also immer den aktuellen Stand.
+    """
+
+    def __init__(
+        self,
+        db: Optional[ChatDatabase] = None,
+        db_path: Optional[str] = None,
+        write_behind: bool = True,
+        flush_ms: float = DEFAULT_FLUSH_MS,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        compress_threshold: int = DEFAULT_THRESHOLD
+    ):
+        self.db = db or ChatDatabase(db_path, compress_threshold=compress_threshold)
+        self.buffer = WriteBehindBuffer(self.db, flush_ms=flush_ms, max_pending=max_pending) if write_behind else None
+        # Draft-Besitzer: ein neu gestarteter Worker räumt die Drafts seines Vorgängers sofort auf
+        worker_id = os.environ.get("YAT_WORKER_ID")
+        self.owner = f"w{worker_id}" if worker_id is not None else "main"
+
+    async def _write(self, kind: str, args: tuple):
+        if self.buffer is not None:
+            return await self.buffer.submit(kind, args)
+        return (await asyncio.to_thread(self.db.write_batch, [(kind, args)]))[0]
+
+    async def _settle(self):
+        """Gepufferte Schreibvorgänge committen (vor Lesen, Löschen, Updates)"""
+        if self.buffer is not None and self.buffer.pending:
+            await self.buffer.flush()
+
+    async def create_conversation(self, conversation_id: str, title: str = "New Conversation",
+                                  provider_id: str = "", model_id: str = "") -> str:
+        if self.buffer is not None:
+            return await self.buffer.submit("conversation", (conversation_id, title, provider_id, model_id))
+        return await asyncio.to_thread(self.db.create_conversation, conversation_id, title, provider_id, model_id)
+
+    async def get_conversations(self, limit: int = 50) -> List[Dict]:
+        await self._settle()
+        return await asyncio.to_thread(self.db.get_conversations, limit)
+
+    async def list_conversations(self, limit: int = 50, cursor: Optional[str] = None, provider_id: Optional[str] = None,
+                                 model_id: Optional[str] = None, sort: str = "updated") -> Dict:
+        await self._settle()
+        return await asyncio.to_thread(self.db.list_conversations, limit, cursor, provider_id, model_id, sort)
+
+    async def update_conversation_title(self, conversation_id: str, new_title: str):
+        await self._settle()
+        await asyncio.to_thread(self.db.update_conversation_title, conversation_id, new_title)
+
+    async def delete_conversation(self, conversation_id: str):
+        await self._settle()
+        message_ids = await asyncio.to_thread(self.db.purge_conversation, conversation_id)
+        if self.db.message_index is not None:
+            self.db.message_index.remove(message_ids)
+
+    async def save_message(self, conversation_id: str, message: Message) -> int:
+        if self.buffer is not None:
+            message_id = await self.buffer.submit("message", (conversation_id, message))
+        else:
+            message_id = await asyncio.to_thread(self.db.insert_message, conversation_id, message)
+        # Embedding-Index im Event-Loop-Thread anstoßen (plant dort seinen Hintergrund-Task)
+        if self.db.message_index is not None:
+            self.db.message_index.enqueue(message_id, message.content)
+        return message_id
+
+    async def load_messages(self, conversation_id: str) -> List[Message]:
+        await self._settle()
+        return await asyncio.to_thread(self.db.load_messages, conversation_id)
+
+    async def save_summary(self, conversation_id: str, content: str, covered_messages: int,
+                           token_count: int = 0, model: str = ""):
+        await self._settle()
+        await asyncio.to_thread(self.db.save_summary, conversation_id, content, covered_messages, token_count, model)
+
+    async def load_summary(self, conversation_id: str) -> Optional[Dict]:
+        await self._settle()
+        return await asyncio.to_thread(self.db.load_summary, conversation_id)
+
+    async def search_messages(self, query: str, limit: int = 20) -> List[Dict]:
+        await self._settle()
+        return await asyncio.to_thread(self.db.search_messages, query, limit)
+
+    async def save_draft(self, draft_id: str, conversation_id: str, message: Message):
+        await self._write("draft", (draft_id, self.owner, conversation_id, message))
+
+    async def finalize_draft(self, draft_id: str, conversation_id: str, message: Message) -> int:
+        message_id = await self._write("finalize", (draft_id, conversation_id, message))
+        if self.db.message_index is not None:
+            self.db.message_index.enqueue(message_id, message.content)
+        return message_id
+
+    async def recover_drafts(self) -> List[Dict]:
+        await self._settle()
+        recovered = await asyncio.to_thread(self.db.recover_drafts, self.owner, DRAFT_STALE_SECONDS)
+        if self.db.message_index is not None:
+            for message in recovered:
+                self.db.message_index.enqueue(message["message_id"], message["content"])
+        return recovered
+
+    async def close(self):
+        """Puffer leeren (beim Beenden, damit nichts verloren geht)"""
+        if self.buffer is not None:
+            await self.buffer.close()
+
+    def get_stats(self) -> Dict:
+        return {"write_behind": self.buffer.get_stats() if self.buffer is not None else None}
@@ -0,0 +1,138 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from core.paths import get_data_path
+from core.sqlite_utils import connect
+
+HEARTBEAT_SECONDS = 2.0     # Eigenen Stand so oft schreiben und den der anderen Worker lesen
+STALE_SECONDS = 15.0        # Worker ohne Heartbeat seit so vielen Sekunden gilt als beendet
+SETTLE_SECONDS = 2 * HEARTBEAT_SECONDS  # Verzögerung, mit der ein Stream eines anderen Workers sichtbar wird
+
+
+class StreamActivity:
+    """
+    Laufende Antworten aller Worker-Prozesse (Multi-Worker-Web-Modus, siehe
+    core/cluster.py), gespeichert in SQLite wie storage/rate_limiter.py.
+
+    Jeder Worker schreibt eine Zeile (laufende Streams, Zeitpunkt des letzten
+    Stream-Starts/-Endes, Heartbeat): sofort bei jeder Änderung (notify() aus
+    LLMManager.stream_chat) und sonst alle HEARTBEAT_SECONDS. Beim selben
+    Schreiben wird der Stand der anderen Worker gelesen und zwischengespeichert,
+    idle() selbst greift nie auf die Datei zu.
+    """
+
+    def __init__(self, worker_id: str, db_path: Optional[str] = None):
+        self.worker_id = worker_id
+        self.db_path = db_path or get_data_path("stream_activity.db")
+        self.active = 0
+        self.last_stream_at = 0.0   # time.time(), Start oder Ende des letzten Streams in diesem Worker
+        self.workers: Dict[str, Dict] = {}  # Letzter gelesener Stand der anderen (lebenden) Worker
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.init_database()
+
+    def init_database(self):
+        """Erstelle Tabelle falls nicht vorhanden"""
+        conn = connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS stream_activity (
+                worker TEXT PRIMARY KEY,
+                active INTEGER,
+                last_stream_at REAL,
+                heartbeat REAL
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def notify(self, active: int):
+        """Anzahl laufender Streams in diesem Worker hat sich geändert (billig, schreibt im Hintergrund)"""
+        self.active = active
+        self.last_stream_at = time.time()
+        self._changed.set()
+
+    def _sync(self) -> Dict[str, Dict]:
+        """Eigene Zeile schreiben, Zeilen der anderen lebenden Worker lesen"""
+        now = time.time()
+        conn = connect(self.db_path)
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO stream_activity (worker, active, last_stream_at, heartbeat)
+                VALUES (?, ?, ?, ?)
+            """, (self.worker_id, self.active, self.last_stream_at, now))
+            conn.commit()
+            rows = conn.execute("""
+                SELECT worker, active, last_stream_at FROM stream_activity
+                WHERE worker != ? AND heartbeat >= ?
+            """, (self.worker_id, now - STALE_SECONDS)).fetchall()
+            return {worker: {"active": active, "last_stream_at": last} for worker, active, last in rows}
+        finally:
+            conn.close()
+
+    def _remove(self):
+        conn = connect(self.db_path)
+        try:
+            conn.execute("DELETE FROM stream_activity WHERE worker = ?", (self.worker_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    async def _loop(self):
+        while True:
+            self._changed.clear()
+            try:
+                self.workers = await asyncio.to_thread(self._sync)
+            except Exception as e:
+                print(f"[WARN] Stream activity sync failed: {e}")
+            # asyncio.wait statt wait_for: wait_for verschluckt unter 3.11 ein cancel(),
+            # das gleichzeitig mit notify() ankommt (stop() würde dann ewig warten)
+            changed = asyncio.ensure_future(self._changed.wait())
+            try:
+                await asyncio.wait({changed}, timeout=HEARTBEAT_SECONDS)
+            finally:
+                changed.cancel()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Heartbeat beenden und die eigene Zeile entfernen (andere warten nicht auf STALE_SECONDS)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await asyncio.to_thread(self._remove)
+        except Exception as e:
+            print(f"[WARN] Stream activity cleanup failed: {e}")
+
+    @property
+    def other_workers(self) -> int:
+        """Anzahl anderer lebender Worker (Stand des letzten Heartbeats)"""
+        return len(self.workers)
+
+    def idle_seconds(self) -> float:
+        """Sekunden seit dem letzten Stream in irgendeinem Worker (0 = es läuft gerade einer)"""
+        if self.active or any(w["active"] for w in self.workers.values()):
+            return 0.0
+        last = max([self.last_stream_at] + [w["last_stream_at"] for w in self.workers.values()])
+        return max(0.0, time.time() - last)
+
+    def idle(self) -> bool:
+        """
+        Kein Stream in irgendeinem Worker - auch keiner, der seit dem letzten
+        Lesen begonnen und schon geendet haben könnte (SETTLE_SECONDS)
+        """
+        return self.idle_seconds() > SETTLE_SECONDS
+
+    def get_stats(self) -> Dict:
+        return {
+            "worker": self.worker_id,
+            "active": self.active,
+            "other_workers": self.other_workers,
+            "other_active": sum(w["active"] for w in self.workers.values()),
+        }
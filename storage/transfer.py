@@ -0,0 +1,187 @@
+import gzip
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from core.providers.types import Message, Role
+from .chat_db import ChatDatabase
+
+# Export-Format (JSONL, eine Zeile pro Record, optional .gz):
+#   {"type": "header", "format": "yat-chat-export", "version": 1, "exported_at": ...}
+#   {"type": "conversation", "id", "title", "provider_id", "model_id", "created_at", "updated_at"}
+#   {"type": "summary", "conversation_id", "content", "covered_messages", "token_count", "model", "updated_at"}
+#   {"type": "message", "conversation_id", "role", "content", "timestamp", "metadata"}
+# Nachrichten folgen ihrer Konversation. Zähler (message_count, preview, ...) werden
+# nicht exportiert, die Datenbank berechnet sie beim Import.
+EXPORT_FORMAT = "yat-chat-export"
+EXPORT_VERSION = 1
+DEFAULT_IMPORT_BATCH = 5000  # Nachrichten pro Transaktion
+
+# Parquet (optional, pyarrow): ein Verzeichnis mit zwei Dateien
+PARQUET_CONVERSATIONS = "conversations.parquet"
+PARQUET_MESSAGES = "messages.parquet"
+CONVERSATION_FIELDS = ["id", "title", "provider_id", "model_id", "created_at", "updated_at"]
+MESSAGE_FIELDS = ["conversation_id", "role", "content", "timestamp", "metadata"]
+
+
+def export_records(db: ChatDatabase, conversation_ids: Optional[List[str]] = None) -> Iterator[Dict]:
+    """Header + alle Records aus der Datenbank (Generator, konstanter Speicher)"""
+    yield {"type": "header", "format": EXPORT_FORMAT, "version": EXPORT_VERSION, "exported_at": datetime.now().isoformat()}
+    yield from db.iter_export(conversation_ids)
+
+
+def _open_text(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", compresslevel=6, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_jsonl(records: Iterable[Dict], path) -> Dict[str, int]:
+    """Records zeilenweise schreiben, gibt die Anzahl pro Typ zurück"""
+    counts: Dict[str, int] = {}
+    with _open_text(Path(path), "w") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            counts[record["type"]] = counts.get(record["type"], 0) + 1
+    return counts
+
+
+def read_jsonl(path) -> Iterator[Dict]:
+    """Records einer Export-Datei lesen (prüft den Header)"""
+    with _open_text(Path(path), "r") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != EXPORT_FORMAT:
+            raise ValueError(f"{path} is not a Y.A.T. chat export")
+        if header.get("version", 0) > EXPORT_VERSION:
+            raise ValueError(f"Export version {header['version']} is newer than supported ({EXPORT_VERSION})")
+        yield header
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def write_parquet(records: Iterable[Dict], directory, batch_size: int = DEFAULT_IMPORT_BATCH) -> Dict[str, int]:
+    """
+    Records als zwei Parquet-Dateien (Konversationen inkl. Zusammenfassung als JSON,
+    Nachrichten mit Metadaten als JSON), geschrieben in Row Groups zu batch_size.
+    """
+    pa = _pyarrow()
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    string = pa.string()
+    conversation_schema = pa.schema([(name, string) for name in CONVERSATION_FIELDS + ["summary"]])
+    message_schema = pa.schema([(name, string) for name in MESSAGE_FIELDS])
+    counts: Dict[str, int] = {}
+    conversations: List[Dict] = []
+    messages: List[Dict] = []
+
+    with pa.parquet.ParquetWriter(directory / PARQUET_CONVERSATIONS, conversation_schema) as conversation_writer, \
+            pa.parquet.ParquetWriter(directory / PARQUET_MESSAGES, message_schema) as message_writer:
+        def flush_conversations():
+            if conversations:
+                conversation_writer.write_table(pa.Table.from_pylist(conversations, schema=conversation_schema))
+                conversations.clear()
+
+        def flush_messages():
+            if messages:
+                message_writer.write_table(pa.Table.from_pylist(messages, schema=message_schema))
+                messages.clear()
+
+        for record in records:
+            kind = record["type"]
+            counts[kind] = counts.get(kind, 0) + 1
+            if kind == "conversation":
+                # Nicht leeren, solange die Zusammenfassung der letzten Konversation noch kommen kann
+                if len(conversations) >= batch_size:
+                    flush_conversations()
+                conversations.append({name: record.get(name) for name in CONVERSATION_FIELDS} | {"summary": None})
+            elif kind == "summary":
+                if conversations and conversations[-1]["id"] == record["conversation_id"]:
+                    summary = {k: v for k, v in record.items() if k not in ("type", "conversation_id")}
+                    conversations[-1]["summary"] = json.dumps(summary, ensure_ascii=False)
+            elif kind == "message":
+                messages.append({name: record.get(name) for name in MESSAGE_FIELDS[:-1]}
+                                | {"metadata": json.dumps(record.get("metadata") or {}, ensure_ascii=False)})
+                if len(messages) >= batch_size:
+                    flush_messages()
+        flush_conversations()
+        flush_messages()
+    return counts
+
+
+def read_parquet(directory, batch_size: int = DEFAULT_IMPORT_BATCH) -> Iterator[Dict]:
+    """Records aus write_parquet(): erst alle Konversationen, dann die Nachrichten (Batch für Batch)"""
+    pa = _pyarrow()
+    directory = Path(directory)
+    yield {"type": "header", "format": EXPORT_FORMAT, "version": EXPORT_VERSION}
+    for batch in pa.parquet.ParquetFile(directory / PARQUET_CONVERSATIONS).iter_batches(batch_size=batch_size):
+        for row in batch.to_pylist():
+            summary = row.pop("summary")
+            yield {"type": "conversation", **row}
+            if summary:
+                yield {"type": "summary", "conversation_id": row["id"], **json.loads(summary)}
+    for batch in pa.parquet.ParquetFile(directory / PARQUET_MESSAGES).iter_batches(batch_size=batch_size):
+        for row in batch.to_pylist():
+            row["metadata"] = json.loads(row["metadata"]) if row["metadata"] else {}
+            yield {"type": "message", **row}
+
+
+def read_records(path) -> Iterator[Dict]:
+    """Verzeichnis = Parquet, sonst JSONL (.jsonl / .jsonl.gz)"""
+    return read_parquet(path) if Path(path).is_dir() else read_jsonl(path)
+
+
+def import_records(
+    db: ChatDatabase,
+    records: Iterable[Dict],
+    batch_size: int = DEFAULT_IMPORT_BATCH,
+    progress: Optional[Callable[[Dict], None]] = None
+) -> Dict[str, int]:
+    """
+    Records blockweise importieren (je batch_size Nachrichten eine Transaktion,
+    siehe ChatDatabase.import_batch). Mehrfaches Importieren derselben Datei legt
+    nichts doppelt an. progress(stats) wird nach jedem Block aufgerufen.
+    """
+    totals = {"conversations": 0, "summaries": 0, "messages": 0, "duplicates": 0, "orphaned": 0}
+    conversations: List[Dict] = []
+    summaries: List[Dict] = []
+    messages: List[tuple] = []
+
+    def flush():
+        stats = db.import_batch(conversations, summaries, messages)
+        for key, value in stats.items():
+            totals[key] += value
+        conversations.clear()
+        summaries.clear()
+        messages.clear()
+        if progress:
+            progress(totals)
+
+    for record in records:
+        kind = record.get("type")
+        if kind == "conversation":
+            conversations.append(record)
+        elif kind == "summary":
+            summaries.append(record)
+        elif kind == "message":
+            messages.append((record["conversation_id"], Message(
+                role=Role(record["role"]),
+                content=record.get("content") or "",
+                timestamp=datetime.fromisoformat(record["timestamp"]),
+                metadata=record.get("metadata") or {}
+            )))
+        if len(messages) + len(conversations) >= batch_size:
+            flush()
+    if conversations or summaries or messages:
+        flush()
+    return totals
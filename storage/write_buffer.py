@@ -0,0 +1,173 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+from .chat_db import ChatDatabase
+
+DEFAULT_FLUSH_MS = 5.0        # Max. Sammelzeit vor einem Batch (obere Schranke der Zusatz-Latenz)
+DEFAULT_BATCH_SIZE = 500      # Ops pro Transaktion
+DEFAULT_MAX_PENDING = 5000    # Darüber warten neue Schreibaufrufe (Back-Pressure)
+
+
+class WriteBehindBuffer:
+    """
+    Gruppen-Commit für Chat-Schreibvorgänge aller Sitzungen.
+
+    Jeder Aufruf von submit() reiht einen Schreibvorgang ein und wartet, bis der
+    Batch mit ihm committed ist - was quittiert ist, steht also sicher in der
+    Datenbank. Ein einziger Schreib-Task schreibt alles Eingereihte in einer
+    Transaktion (executemany, ein UPDATE von updated_at pro Konversation statt
+    pro Nachricht). Was während eines Batches eintrifft, bildet den nächsten.
+    Unter Last wird zusätzlich kurz gesammelt (bis so viele Ops da sind wie im
+    letzten Batch, höchstens flush_ms) - ein einzelner Schreiber wartet nie.
+
+    - Latenz: höchstens flush_ms + Dauer eines Batches
+    - Back-Pressure: mehr als max_pending offene Ops -> submit() wartet auf Platz
+    - Fehler: schlägt ein Batch fehl, werden seine Ops einzeln wiederholt, damit
+      nur der fehlerhafte Aufrufer die Exception bekommt
+    - Shutdown: close() schreibt alles Offene, danach werden neue Ops abgelehnt
+    """
+
+    def __init__(
+        self,
+        db: ChatDatabase,
+        flush_ms: float = DEFAULT_FLUSH_MS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_pending: int = DEFAULT_MAX_PENDING
+    ):
+        self.db = db
+        self.flush_ms = max(0.0, float(flush_ms))
+        self.batch_size = max(1, int(batch_size))
+        self.max_pending = max(1, int(max_pending))
+
+        self._queue: List[tuple] = []  # (kind, args, future)
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._wakeup = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._pending = 0
+        self._last_batch = 0
+
+        # Statistik
+        self.batches = 0
+        self.ops_written = 0
+        self.max_batch = 0
+        self.write_ms = 0.0
+        self.backpressure_waits = 0
+        self.peak_pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Eingereihte, noch nicht committete Ops"""
+        return self._pending
+
+    async def submit(self, kind: str, args: tuple) -> Any:
+        """Op einreihen und auf ihren Commit warten (Ergebnis wie ChatDatabase.write_batch)"""
+        if self._closed:
+            raise RuntimeError("Write buffer is closed")
+        if self._slots.locked():
+            self.backpressure_waits += 1
+        await self._slots.acquire()
+        self._pending += 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((kind, args, future))
+        self.peak_pending = max(self.peak_pending, self.pending)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self._wakeup.set()
+        # Abbruch des Aufrufers bricht den Schreibvorgang nicht ab (shield)
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        """Schreib-Task: sammeln, dann batchweise schreiben"""
+        while not self._closed:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            await self._linger()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[ERR] Write buffer flush failed: {e}")
+
+    async def _linger(self):
+        """Unter Last kurz weiter sammeln: bis so viele Ops da sind wie im letzten Batch, max. flush_ms"""
+        target = min(self._last_batch, self.batch_size)
+        if not self.flush_ms or target <= 1:
+            return
+        deadline = time.perf_counter() + self.flush_ms / 1000
+        while len(self._queue) < target:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    async def flush(self):
+        """Alles Eingereihte jetzt schreiben"""
+        async with self._write_lock:
+            while self._queue:
+                batch = self._queue[:self.batch_size]
+                del self._queue[:self.batch_size]
+                await self._write(batch)
+
+    async def _write(self, batch: List[tuple]):
+        ops = [(kind, args) for kind, args, _ in batch]
+        started = time.perf_counter()
+        try:
+            outcomes = await asyncio.to_thread(self.db.write_batch, ops)
+        except Exception as batch_error:
+            if len(ops) == 1:
+                outcomes = [batch_error]
+            else:
+                print(f"[WARN] Batch of {len(ops)} writes failed ({batch_error}), retrying one by one")
+                outcomes = []
+                for op in ops:
+                    try:
+                        outcomes.extend(await asyncio.to_thread(self.db.write_batch, [op]))
+                    except Exception as e:
+                        outcomes.append(e)
+
+        self.batches += 1
+        self.ops_written += len(batch)
+        self.max_batch = max(self.max_batch, len(batch))
+        self._last_batch = len(batch)
+        self.write_ms += (time.perf_counter() - started) * 1000
+
+        for (_, _, future), outcome in zip(batch, outcomes):
+            self._pending -= 1
+            self._slots.release()
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    async def close(self):
+        """Offene Ops schreiben, Schreib-Task beenden"""
+        self._closed = True
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> Dict:
+        return {
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "batches": self.batches,
+            "ops_written": self.ops_written,
+            "avg_batch": round(self.ops_written / self.batches, 1) if self.batches else 0,
+            "max_batch": self.max_batch,
+            "avg_write_ms": round(self.write_ms / self.batches, 2) if self.batches else 0,
+            "backpressure_waits": self.backpressure_waits,
+            "flush_ms": self.flush_ms,
+        }
@@ -0,0 +1,109 @@
+"""
+Chat History Export / Import
+Backup and migration of the chat history without copying the SQLite file
+(see storage/transfer.py). Both directions stream: export reads the database
+with cursors in blocks, import writes one transaction per --batch-size
+messages, memory use does not grow with the size of the history.
+
+Importing is idempotent: conversations that already exist (same id) are kept,
+messages that already exist (same chat, role, timestamp and content) are
+skipped. So the same backup can be imported twice, or merged into a history
+that already contains part of it.
+
+JSONL is the default (".gz" compresses). Parquet needs pyarrow and writes a
+directory with conversations.parquet and messages.parquet.
+
+Import is safe while Y.A.T. is running (WAL), new messages show up in
+"Related" after the next start.
+
+Usage:
+    python tools/chat_export.py export backup.jsonl.gz
+    python tools/chat_export.py export backup_dir --format parquet
+    python tools/chat_export.py export chat.jsonl --conversation 1f0c...
+    python tools/chat_export.py import backup.jsonl.gz
+    python tools/chat_export.py import backup.jsonl.gz --db path/to/chat_history.db --batch-size 20000
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.paths import get_data_path  # noqa: E402
+from storage.chat_db import ChatDatabase  # noqa: E402
+from storage.transfer import (  # noqa: E402
+    DEFAULT_IMPORT_BATCH, export_records, import_records, read_records, write_jsonl, write_parquet
+)
+
+
+def run_export(db: ChatDatabase, args):
+    started = time.perf_counter()
+    records = export_records(db, args.conversation)
+    if args.format == "parquet":
+        counts = write_parquet(records, args.path)
+    else:
+        counts = write_jsonl(records, args.path)
+    elapsed = time.perf_counter() - started
+    messages = counts.get("message", 0)
+    print(f"[OK] Exported {counts.get('conversation', 0)} chats, {messages} messages, "
+          f"{counts.get('summary', 0)} summaries to {args.path} in {elapsed:.1f}s "
+          f"({messages / elapsed if elapsed else 0:.0f} msg/s)")
+
+
+def run_import(db: ChatDatabase, args):
+    if not os.path.exists(args.path):
+        print(f"[ERR] {args.path} not found")
+        sys.exit(1)
+    started = time.perf_counter()
+
+    def progress(totals):
+        done = totals["messages"] + totals["duplicates"]
+        print(f"    {done} messages ({done / (time.perf_counter() - started):.0f}/s)", end="\r", flush=True)
+
+    try:
+        totals = import_records(db, read_records(args.path), batch_size=args.batch_size, progress=progress)
+    except ValueError as e:
+        print(f"[ERR] {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+    print(" " * 60, end="\r")
+    print(f"[OK] Imported {totals['conversations']} chats, {totals['messages']} messages, "
+          f"{totals['summaries']} summaries in {elapsed:.1f}s "
+          f"({(totals['messages'] + totals['duplicates']) / elapsed if elapsed else 0:.0f} msg/s)")
+    if totals["duplicates"]:
+        print(f"     {totals['duplicates']} messages already existed (skipped)")
+    if totals["orphaned"]:
+        print(f"[WARN] {totals['orphaned']} messages without their chat in the file or database (skipped)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / import the chat history")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="JSONL file (.jsonl / .jsonl.gz) or Parquet directory")
+    parser.add_argument("--db", default=None, help="Database file (default: ~/.yat/chat_history.db)")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl", help="Export format")
+    parser.add_argument("--conversation", action="append", help="Export only this chat id (repeatable)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_IMPORT_BATCH, help="Messages per import transaction")
+    args = parser.parse_args()
+
+    db_path = args.db or get_data_path("chat_history.db")
+    if args.command == "export" and not os.path.exists(db_path):
+        print(f"[ERR] {db_path} not found")
+        sys.exit(1)
+    db = ChatDatabase(db_path)
+
+    try:
+        if args.command == "export":
+            run_export(db, args)
+        else:
+            run_import(db, args)
+    except RuntimeError as e:  # pyarrow missing
+        print(f"[ERR] {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Reply Checkpoint Benchmark
+What crash-safety for streamed replies costs (storage/checkpoint.py), on the
+SQLite chat database with S replies streaming at the same time:
+
+- final only      the reply is written once when the stream ends (old behavior)
+- per chunk       a draft upsert after every chunk (the naive alternative)
+- checkpoint      a draft every --interval-ms or --chars (what the app does)
+
+Reported per mode: draft writes, write amplification (bytes handed to SQLite
+for drafts + final / final bytes), bytes the process actually wrote (wchar
+from /proc/self/io, Linux only; includes WAL frames) and how much slower the
+streams got than the simulated provider.
+
+The crash test streams a reply in a child process, kills it (SIGKILL) halfway
+and checks that recover_drafts() brings back the part that had been
+checkpointed, marked as interrupted.
+
+Each run uses a throw-away database in a temp directory, ~/.yat is never touched.
+
+Usage:
+    python tools/checkpoint_bench.py
+    python tools/checkpoint_bench.py --streams 50 --chars 20000 --interval-ms 500
+    python tools/checkpoint_bench.py --check      # Exit 1 if the crash test loses more than one interval
+"""
+import argparse
+import asyncio
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.providers.types import Message, Role  # noqa: E402
+from storage.base import INTERRUPTED_MARKER  # noqa: E402
+from storage.checkpoint import ReplyCheckpoint, DEFAULT_CHECKPOINT_MS, DEFAULT_CHECKPOINT_CHARS  # noqa: E402
+from storage.sqlite_storage import SQLiteChatStorage  # noqa: E402
+
+CHUNK = "token text "  # 11 chars, roughly what providers send per chunk
+
+
+def written_bytes() -> int:
+    """Bytes this process passed to write() so far (0 where /proc is not available)"""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+async def stream_reply(store, conversation_id: str, chunks: int, token_ms: float, mode: str, interval_ms: float, chars: int,
+                       progress=None) -> ReplyCheckpoint:
+    message = Message(role=Role.ASSISTANT, content="")
+    if mode == "final only":
+        checkpoint = ReplyCheckpoint(store, conversation_id, message, interval_ms=float("inf"), every_chars=10**12)
+    else:
+        checkpoint = ReplyCheckpoint(store, conversation_id, message, interval_ms=interval_ms, every_chars=chars)
+    content = ""
+    for _ in range(chunks):
+        await asyncio.sleep(token_ms / 1000)
+        content += CHUNK
+        if mode == "per chunk":
+            await checkpoint._save(message.model_copy(update={"content": content}))
+        else:
+            checkpoint.update(content)
+        if progress:
+            progress(len(content))
+    await checkpoint.finish(content)
+    return checkpoint
+
+
+async def measure(workdir: str, mode: str, args) -> dict:
+    store = SQLiteChatStorage(db_path=str(Path(workdir) / f"bench_{mode.replace(' ', '_')}.db"))
+    chunks = max(1, args.chars // len(CHUNK))
+    for s in range(args.streams):
+        await store.create_conversation(f"c{s}")
+
+    before = written_bytes()
+    started = time.perf_counter()
+    checkpoints = await asyncio.gather(*(
+        stream_reply(store, f"c{s}", chunks, args.token_ms, mode, args.interval_ms, args.checkpoint_chars)
+        for s in range(args.streams)
+    ))
+    elapsed = time.perf_counter() - started
+    await store.close()
+    physical = written_bytes() - before
+
+    final = sum(c.final_bytes for c in checkpoints)
+    drafts = sum(c.draft_bytes for c in checkpoints)
+    ideal = chunks * args.token_ms / 1000
+    return {
+        "mode": mode,
+        "draft_writes": sum(c.checkpoints for c in checkpoints),
+        "logical_amp": (drafts + final) / final,
+        "physical_amp": physical / final if physical else None,
+        "slowdown": elapsed / ideal - 1,
+    }
+
+
+def crash_child(db_path: str, chars: int, token_ms: float, interval_ms: float, checkpoint_chars: int):
+    """Child process: stream one reply with checkpoints, print progress until killed"""
+    async def run():
+        store = SQLiteChatStorage(db_path=db_path)
+        await store.create_conversation("crash")
+
+        def progress(length):
+            print(length, flush=True)
+
+        await stream_reply(store, "crash", chars // len(CHUNK), token_ms, "checkpoint", interval_ms, checkpoint_chars, progress)
+    asyncio.run(run())
+
+
+async def crash_test(workdir: str, args) -> bool:
+    db_path = str(Path(workdir) / "crash.db")
+    child = subprocess.Popen(
+        [sys.executable, __file__, "--crash-child", db_path, "--chars", str(args.chars), "--token-ms", str(args.token_ms),
+         "--interval-ms", str(args.interval_ms), "--checkpoint-chars", str(args.checkpoint_chars)],
+        stdout=subprocess.PIPE, text=True
+    )
+    streamed = 0
+    for line in child.stdout:
+        streamed = int(line)
+        if streamed >= args.chars // 2:
+            break
+    child.send_signal(signal.SIGKILL)
+    child.wait()
+
+    store = SQLiteChatStorage(db_path=db_path)
+    recovered = await store.recover_drafts()
+    messages = await store.load_messages("crash")
+    await store.close()
+
+    kept = len(recovered[0]["content"]) - len(INTERRUPTED_MARKER) if recovered else 0
+    chars_per_s = len(CHUNK) / (args.token_ms / 1000)
+    allowed_loss = min(args.checkpoint_chars, chars_per_s * args.interval_ms / 1000) + len(CHUNK) * 2
+    ok = (len(recovered) == 1 and messages and messages[-1].metadata.get("interrupted") is True
+          and streamed - kept <= allowed_loss)
+    print(f"    {'[OK] ' if ok else '[ERR]'} crash test: killed at {streamed} chars, recovered {kept} "
+          f"(lost {streamed - kept}, allowed {allowed_loss:.0f}), marked interrupted: "
+          f"{bool(messages) and messages[-1].metadata.get('interrupted') is True}")
+    return ok
+
+
+async def main_async(args) -> bool:
+    with tempfile.TemporaryDirectory(prefix="yat_ckpt_") as workdir:
+        rows = []
+        for mode in ("final only", "per chunk", "checkpoint"):
+            print(f"[*] {mode}: {args.streams} streams x {args.chars} chars...")
+            rows.append(await measure(workdir, mode, args))
+        print("[*] Crash recovery")
+        ok = await crash_test(workdir, args)
+
+    print(f"\n{'mode':<12} {'draft writes':>12} {'write amp':>10} {'bytes written/final':>20} {'stream slowdown':>16}")
+    for r in rows:
+        physical = f"{r['physical_amp']:.1f}x" if r["physical_amp"] is not None else "n/a"
+        print(f"{r['mode']:<12} {r['draft_writes']:>12} {r['logical_amp']:>9.1f}x {physical:>20} {r['slowdown']:>15.0%}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming reply checkpoint benchmark")
+    parser.add_argument("--streams", type=int, default=20, help="Concurrent replies")
+    parser.add_argument("--chars", type=int, default=8000, help="Length of each reply")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="Simulated time per chunk")
+    parser.add_argument("--interval-ms", type=float, default=DEFAULT_CHECKPOINT_MS)
+    parser.add_argument("--checkpoint-chars", type=int, default=DEFAULT_CHECKPOINT_CHARS)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--crash-child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.crash_child:
+        crash_child(args.crash_child, args.chars, args.token_ms, args.interval_ms, args.checkpoint_chars)
+        return
+
+    ok = asyncio.run(main_async(args))
+    if args.check and not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compress Existing Chat History
+New messages above the size threshold are compressed automatically (see
+storage/compression.py). This migrates the history written before that:
+trains a zlib dictionary from your own messages, rewrites old rows in batches
+and (optionally) VACUUMs the file so the freed space goes back to the disk.
+
+Safe while Y.A.T. is running (small transactions, WAL), but VACUUM briefly
+locks the database - run it with the app closed.
+
+Usage:
+    python tools/compress_history.py                     # ~/.yat/chat_history.db
+    python tools/compress_history.py --vacuum
+    python tools/compress_history.py --train --recompress --vacuum   # New dictionary, redo everything
+    python tools/compress_history.py --db path/to/chat_history.db --threshold 512
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.paths import get_data_path  # noqa: E402
+from core.sqlite_utils import connect  # noqa: E402
+from storage.chat_db import ChatDatabase  # noqa: E402
+from storage.compression import DEFAULT_THRESHOLD  # noqa: E402
+
+
+def file_size(db_path: str) -> int:
+    return sum(os.path.getsize(p) for p in (db_path, db_path + "-wal") if os.path.exists(p))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compress the existing chat history")
+    parser.add_argument("--db", default=None, help="Database file (default: ~/.yat/chat_history.db)")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD, help="Compress content from this many bytes")
+    parser.add_argument("--train", action="store_true", help="Train a new dictionary even if one exists")
+    parser.add_argument("--recompress", action="store_true", help="Also rewrite rows that are already compressed")
+    parser.add_argument("--vacuum", action="store_true", help="Shrink the file afterwards")
+    args = parser.parse_args()
+
+    db_path = args.db or get_data_path("chat_history.db")
+    if not os.path.exists(db_path):
+        print(f"[ERR] {db_path} not found")
+        sys.exit(1)
+
+    db = ChatDatabase(db_path, compress_threshold=args.threshold)
+    size_before = file_size(db_path)
+    print(f"[*] {db_path}: {size_before / 1024 / 1024:.1f} MB")
+
+    dict_id = db.train_dictionary() if args.train else db.ensure_dictionary()
+    if dict_id is not None:
+        print(f"[OK] Trained dictionary #{dict_id} ({len(db.codec.dictionaries[dict_id]) // 1024} KB)")
+    elif db.codec.active_dict_id is None:
+        print("[WARN] Too few large messages for a dictionary, using plain zlib")
+
+    started = time.perf_counter()
+    stats = db.compress_existing(recompress=args.recompress)
+    print(f"[OK] {stats['rows']} rows checked, {stats['compressed']} compressed in {time.perf_counter() - started:.1f}s")
+    if stats["bytes_before"]:
+        print(f"     message data: {stats['bytes_before'] / 1024:.0f} KB -> {stats['bytes_after'] / 1024:.0f} KB "
+              f"({1 - stats['bytes_after'] / stats['bytes_before']:.0%} smaller)")
+
+    if args.vacuum:
+        conn = connect(db_path)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+        conn.close()
+        size_after = file_size(db_path)
+        print(f"[OK] VACUUM: {size_before / 1024 / 1024:.1f} MB -> {size_after / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Message Compression Benchmark
+Size and read cost of compressing large message bodies (storage/compression.py)
+on a synthetic, code-heavy history built from this repository's own sources
+(Python modules and docs wrapped in Markdown answers) plus short user prompts.
+
+Compared: plain TEXT, zlib, zlib with a dictionary trained on the history.
+Reported: database size after VACUUM, size reduction, load_messages time per
+chat (what opening a chat costs), full-text search time and insert rate.
+
+Finally two ChatDatabase instances on one file stand in for two worker
+processes: a dictionary trained by one must be readable by the other
+(load_messages, search), and both training at once must leave one dictionary.
+
+Each run uses throw-away databases in a temp directory, ~/.yat is never touched.
+
+Usage:
+    python tools/compression_bench.py
+    python tools/compression_bench.py --conversations 300 --threshold 512
+    python tools/compression_bench.py --check     # Exit 1 if the multi-process check fails
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.providers.types import Message, Role  # noqa: E402
+from core.sqlite_utils import connect  # noqa: E402
+from storage.chat_db import ChatDatabase  # noqa: E402
+from storage.compression import DEFAULT_THRESHOLD  # noqa: E402
+
+
+def load_sources() -> list:
+    sources = []
+    for pattern in ("core/**/*.py", "storage/*.py", "ui_nicegui/*.py", "tools/*.py", "docs/*.md"):
+        for path in sorted(ROOT_DIR.glob(pattern)):
+            text = path.read_text(encoding="utf-8", errors="ignore")
+            if len(text) > 500:
+                sources.append((path.suffix, text))
+    return sources
+
+
+def build_history(conversations: int, turns: int, seed: int = 7) -> list:
+    """[(conversation_id, [Message])] - answers quote 1-4 KB slices of real code/docs"""
+    rng = random.Random(seed)
+    sources = load_sources()
+    history = []
+    for c in range(conversations):
+        messages = []
+        for t in range(turns):
+            suffix, text = rng.choice(sources)
+            start = rng.randrange(0, max(1, len(text) - 4000))
+            snippet = text[start:start + rng.randint(1000, 4000)]
+            messages.append(Message(role=Role.USER, content=f"How does this part work? ({c}-{t})"))
+            lang = "python" if suffix == ".py" else "markdown"
+            messages.append(Message(
+                role=Role.ASSISTANT,
+                content=f"Here is the relevant part:\n\n```{lang}\n{snippet}\n```\n\nIt works as shown above. ({c}-{t})",
+                metadata={"provider": "bench", "model": "m", "tokens": len(snippet) // 4}
+            ))
+        history.append((f"c{c}", messages))
+    return history
+
+
+def file_size(db_path: str) -> int:
+    conn = connect(db_path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    conn.close()
+    return os.path.getsize(db_path)
+
+
+def measure(workdir: str, name: str, history: list, threshold: int, use_dict: bool) -> dict:
+    db_path = str(Path(workdir) / f"{name.replace(' ', '_')}.db")
+    db = ChatDatabase(db_path, compress_threshold=threshold)
+
+    if use_dict:
+        # Train on the first 20% (what an existing install would have), then write everything
+        for cid, messages in history[:max(1, len(history) // 5)]:
+            db.create_conversation(cid)
+            db.write_batch([("message", (cid, m)) for m in messages])
+        db.train_dictionary(min_samples=10)
+        db.compress_existing(recompress=True)
+        remaining = history[max(1, len(history) // 5):]
+    else:
+        remaining = history
+
+    started = time.perf_counter()
+    for cid, messages in remaining:
+        db.create_conversation(cid)
+        db.write_batch([("message", (cid, m)) for m in messages])
+    insert_s = time.perf_counter() - started
+    inserted = sum(len(m) for _, m in remaining)
+
+    load_ms = []
+    for cid, _ in history[::max(1, len(history) // 50)]:
+        t = time.perf_counter()
+        db.load_messages(cid)
+        load_ms.append((time.perf_counter() - t) * 1000)
+
+    t = time.perf_counter()
+    db.search_messages("wal_checkpoint")
+    search_ms = (time.perf_counter() - t) * 1000
+
+    return {
+        "name": name,
+        "size": file_size(db_path),
+        "load_ms": statistics.median(load_ms),
+        "search_ms": search_ms,
+        "inserts_per_s": inserted / insert_s,
+    }
+
+
+def check_shared_dictionary(workdir: str, history: list, threshold: int) -> bool:
+    """Dictionary trained by another process (worker, tool) after this one opened the database"""
+    db_path = str(Path(workdir) / "shared.db")
+    trainer = ChatDatabase(db_path, compress_threshold=threshold)
+    reader = ChatDatabase(db_path, compress_threshold=threshold)  # Started before the dictionary existed
+    sample = history[:max(2, len(history) // 5)]
+    for cid, messages in sample:
+        trainer.create_conversation(cid)
+        trainer.write_batch([("message", (cid, m)) for m in messages])
+    trainer.train_dictionary(min_samples=10)
+    trainer.compress_existing(recompress=True)
+
+    cid, messages = sample[0]
+    try:
+        loaded = [m.content for m in reader.load_messages(cid)]
+        found = reader.search_messages("It works as shown above")
+        read_ok = loaded == [m.content for m in messages] and len(found) > 0
+        error = ""
+    except Exception as e:
+        read_ok, error = False, f": {e}"
+    print(f"{'[OK] ' if read_ok else '[ERR]'} dictionary from another process readable "
+          f"(load_messages, search){error}")
+
+    # Two fresh "workers" start at once, only one may train
+    racers = [ChatDatabase(str(Path(workdir) / "race.db"), compress_threshold=threshold) for _ in range(2)]
+    for cid, messages in sample:
+        racers[0].create_conversation(cid)
+        racers[0].write_batch([("message", (cid, m)) for m in messages])
+    threads = [threading.Thread(target=db.ensure_dictionary, kwargs={"min_samples": 10}) for db in racers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    conn = connect(str(Path(workdir) / "race.db"))
+    dictionaries = conn.execute("SELECT COUNT(*) FROM compression_dicts").fetchone()[0]
+    conn.close()
+    same = racers[0].codec.active_dict_id == racers[1].codec.active_dict_id
+    race_ok = dictionaries == 1 and same
+    print(f"{'[OK] ' if race_ok else '[ERR]'} concurrent first training: {dictionaries} dictionary, "
+          f"{'same' if same else 'DIFFERENT'} active id in both")
+    return read_ok and race_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Message compression benchmark")
+    parser.add_argument("--conversations", type=int, default=150)
+    parser.add_argument("--turns", type=int, default=6, help="Question/answer pairs per chat")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    history = build_history(args.conversations, args.turns)
+    raw = sum(len(m.content.encode("utf-8")) for _, messages in history for m in messages)
+    print(f"[*] {args.conversations} chats, {sum(len(m) for _, m in history)} messages, {raw / 1024 / 1024:.1f} MB of text")
+
+    with tempfile.TemporaryDirectory(prefix="yat_zip_") as workdir:
+        results = [
+            measure(workdir, "plain", history, 0, False),
+            measure(workdir, "zlib", history, args.threshold, False),
+            measure(workdir, "zlib + dict", history, args.threshold, True),
+        ]
+
+        base = results[0]
+        print(f"\n{'format':<12} {'db size':>9} {'reduction':>10} {'load chat':>10} {'overhead':>9} {'search':>9} {'inserts/s':>10}")
+        for r in results:
+            print(f"{r['name']:<12} {r['size'] / 1024 / 1024:>7.2f}MB {1 - r['size'] / base['size']:>9.0%} "
+                  f"{r['load_ms']:>8.2f}ms {r['load_ms'] - base['load_ms']:>+7.2f}ms {r['search_ms']:>7.1f}ms "
+                  f"{r['inserts_per_s']:>10.0f}")
+
+        print()
+        shared_ok = check_shared_dictionary(workdir, history, args.threshold)
+    if args.check and not shared_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Chat Database Maintenance
+The app runs this by itself while idle (storage/maintenance.py): retention
+(archive or delete old chats), incremental vacuum and ANALYZE. This tool shows
+the state of the database, runs a pass right now and brings archived chats back.
+
+Retention settings default to the ones in ~/.yat/user_settings.json
+(retention_days, retention_max_conversations, retention_max_mb,
+retention_action), flags override them.
+
+Safe while Y.A.T. is running (small transactions, WAL). The one-time switch to
+incremental vacuum (older databases) briefly locks the file.
+
+Usage:
+    python tools/db_maintenance.py status
+    python tools/db_maintenance.py run
+    python tools/db_maintenance.py run --retention-days 180
+    python tools/db_maintenance.py archived                 # Archived chats, newest first
+    python tools/db_maintenance.py restore <conversation_id> [...]
+    python tools/db_maintenance.py check                    # Scheduler self-test on a temp database (also
+                                                            # with a stream in another worker), exit 1 on failure
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.llm_manager import LLMManager  # noqa: E402
+from core.paths import get_data_path  # noqa: E402
+from core.providers.types import Message, Role  # noqa: E402
+from core.sqlite_utils import connect  # noqa: E402
+from core.user_config import UserConfig  # noqa: E402
+from storage.chat_db import ChatDatabase  # noqa: E402
+from storage.maintenance import DatabaseMaintenance, idle_without_streams  # noqa: E402
+from storage.stream_activity import HEARTBEAT_SECONDS, SETTLE_SECONDS, StreamActivity  # noqa: E402
+
+
+def print_status(maintenance: DatabaseMaintenance):
+    status = maintenance.status()
+    print(f"[*] {maintenance.db.db_path}")
+    print(f"    {status['conversations']} chats, {status['size_mb']:.1f} MB "
+          f"({status['free_pages']} free pages, {status['free_ratio']:.0%})")
+    print(f"    incremental vacuum: {'on' if status['incremental_vacuum'] else 'off (switched on by the next run if worth it)'}")
+    if "archived_conversations" in status:
+        print(f"    archive: {status['archived_conversations']} chats in {maintenance.archive_path}")
+
+
+async def check_scheduler(cluster: bool) -> bool:
+    """
+    Drives the real background loop (start() -> _loop) with the idle check main.py
+    uses: no pass while a stream is running, exactly one pass once idle.
+    cluster=True: the stream runs in another worker and is only known through
+    the shared StreamActivity file, like in multi-worker mode.
+    """
+    with tempfile.TemporaryDirectory(prefix="yat_maintenance_") as workdir:
+        db = ChatDatabase(str(Path(workdir) / "chat.db"))
+        db.create_conversation("old", "Old chat")
+        db.save_message("old", Message(role=Role.USER, content="hello"))
+        conn = connect(db.db_path)
+        conn.execute("UPDATE conversations SET updated_at = ?", ((datetime.now() - timedelta(days=60)).isoformat(),))
+        conn.commit()
+        conn.close()
+
+        manager = LLMManager()
+        other = None
+        if cluster:
+            activity_path = str(Path(workdir) / "stream_activity.db")
+            manager.stream_activity = StreamActivity("0", activity_path)
+            other = StreamActivity("1", activity_path)  # Worker 1, only shares the file
+            manager.stream_activity.start()
+            other.start()
+        maintenance = DatabaseMaintenance(
+            db, archive_path=str(Path(workdir) / "archive.db"), retention_days=30,
+            idle_seconds=0, is_idle=idle_without_streams(manager), poll_seconds=0.02
+        )
+        maintenance.last_run = float("-inf")  # Due right away
+        stream = object()
+        if cluster:
+            other.notify(1)  # A reply is streaming in worker 1
+            await asyncio.sleep(HEARTBEAT_SECONDS * 1.5)  # Worker 0 has read it
+        else:
+            manager._active_streams[stream] = 1  # A reply is streaming
+        maintenance.start()
+        try:
+            await asyncio.sleep(0.3)
+            busy_ok = maintenance.runs == 0 and maintenance.failed_runs == 0 and not maintenance._task.done()
+            print(f"    {'[OK] ' if busy_ok else '[ERR]'} no pass while streaming (runs={maintenance.runs}, "
+                  f"failed={maintenance.failed_runs}, loop alive={not maintenance._task.done()})")
+
+            if cluster:
+                other.notify(0)
+            else:
+                del manager._active_streams[stream]
+            deadline = time.monotonic() + 10 + SETTLE_SECONDS
+            while maintenance.runs == 0 and not maintenance._task.done() and time.monotonic() < deadline:
+                await asyncio.sleep(0.02)
+            if maintenance._task.done() and not maintenance._task.cancelled() and maintenance._task.exception():
+                print(f"    [ERR] loop died: {maintenance._task.exception()!r}")
+            archived = maintenance.last_report["conversations"] if maintenance.last_report else []
+            idle_ok = maintenance.runs == 1 and maintenance.failed_runs == 0 and archived == ["old"]
+            print(f"    {'[OK] ' if idle_ok else '[ERR]'} pass once idle (runs={maintenance.runs}, "
+                  f"failed={maintenance.failed_runs}, archived={archived})")
+        finally:
+            await maintenance.stop()
+            if cluster:
+                await other.stop()
+                await manager.stream_activity.stop()
+    return busy_ok and idle_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat database maintenance")
+    parser.add_argument("command", choices=["status", "run", "archived", "restore", "check"])
+    parser.add_argument("ids", nargs="*", help="Conversation ids (restore)")
+    parser.add_argument("--db", default=None, help="Database file (default: ~/.yat/chat_history.db)")
+    parser.add_argument("--archive", default=None, help="Archive file (default: ~/.yat/chat_archive.db)")
+    parser.add_argument("--retention-days", type=float, default=UserConfig.get('retention_days', 0))
+    parser.add_argument("--max-conversations", type=int, default=UserConfig.get('retention_max_conversations', 0))
+    parser.add_argument("--max-mb", type=float, default=UserConfig.get('retention_max_mb', 0))
+    parser.add_argument("--action", choices=["archive", "delete"], default=UserConfig.get('retention_action', 'archive'))
+    args = parser.parse_args()
+
+    if args.command == "check":
+        print("[*] Maintenance scheduler, single process")
+        ok = asyncio.run(check_scheduler(cluster=False))
+        print("[*] Maintenance scheduler, stream in another worker")
+        ok = asyncio.run(check_scheduler(cluster=True)) and ok
+        if not ok:
+            sys.exit(1)
+        return
+
+    db_path = args.db or get_data_path("chat_history.db")
+    if not os.path.exists(db_path):
+        print(f"[ERR] {db_path} not found")
+        sys.exit(1)
+    maintenance = DatabaseMaintenance(
+        ChatDatabase(db_path),
+        archive_path=args.archive or get_data_path("chat_archive.db"),
+        retention_days=args.retention_days,
+        max_conversations=args.max_conversations,
+        max_mb=args.max_mb,
+        action=args.action
+    )
+
+    if args.command == "status":
+        print_status(maintenance)
+    elif args.command == "run":
+        report = maintenance.run()
+        verb = "archived" if args.action == "archive" else "deleted"
+        print(f"[OK] {len(report['conversations'])} chats {verb} ({len(report['message_ids'])} messages), "
+              f"{report['freed_mb']:.1f} MB freed ({report['vacuum'] or 'no vacuum needed'}), "
+              f"statistics refreshed in {report['duration_s']:.1f}s")
+        print_status(maintenance)
+    elif args.command == "archived":
+        if not os.path.exists(maintenance.archive_path):
+            print("[INFO] No archive yet")
+            return
+        archive = ChatDatabase(maintenance.archive_path, compress_threshold=0)
+        for conversation in archive.get_conversations(limit=-1):
+            print(f"{conversation['id']}  {conversation['updated_at'][:10]}  "
+                  f"{conversation['message_count']:>5} msgs  {conversation['title']}")
+    else:
+        if not args.ids:
+            print("[ERR] Which chats? python tools/db_maintenance.py restore <conversation_id> [...]")
+            sys.exit(1)
+        restored = maintenance.restore_conversations(args.ids)["conversations"]
+        print(f"[OK] Restored {len(restored)} of {len(args.ids)} chats")
+        missing = set(args.ids) - set(restored)
+        if missing:
+            print(f"[WARN] Not in the archive: {', '.join(sorted(missing))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Load Test for the Multi-Worker Web Mode
+Starts `main.py --web --workers W` for each W, fires C concurrent streaming chats
+through the sticky proxy and reports aggregate throughput per worker count.
+
+Every chat goes through the real server path (see /_loadtest/chat in main.py):
+LLMManager.stream_chat with a simulated provider, markdown rendering of the
+growing reply per chunk (what ChatView does) and both messages written to the
+shared SQLite chat database. Rendering makes a worker CPU bound, so with enough
+concurrent chats the throughput should grow almost linearly with the workers.
+
+Each run uses a throw-away HOME, so ~/.yat is never touched.
+
+Usage:
+    python tools/load_test.py                          # 1, 2, 4 workers, 64 chats
+    python tools/load_test.py --workers 1 2 4 8 --clients 128 --tokens 300
+    python tools/load_test.py --check                  # Exit 1 if efficiency < --min-efficiency
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.cluster import wait_for_port  # noqa: E402
+
+STARTUP_TIMEOUT = 90.0
+
+
+async def stream_chat(port: int, tokens: int, token_ms: float) -> dict:
+    """One client: GET /_loadtest/chat through the proxy, read the streamed body"""
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /_loadtest/chat?tokens={tokens}&token_ms={token_ms} HTTP/1.1\r\n"
+                 f"Host: 127.0.0.1:{port}\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    worker = None
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"set-cookie: yat_worker="):
+            worker = int(line.split(b"=", 1)[1].split(b";", 1)[0])
+
+    first_byte, received = None, 0
+    while True:
+        data = await reader.read(65536)
+        if not data:
+            break
+        if first_byte is None:
+            first_byte = time.perf_counter()
+        received += data.count(b"loadtest/")
+    writer.close()
+    return {
+        "ok": status == 200,
+        "worker": worker,
+        "tokens": received,
+        "ttfb_ms": ((first_byte or time.perf_counter()) - started) * 1000,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+async def run_clients(port: int, clients: int, tokens: int, token_ms: float):
+    return await asyncio.gather(*(stream_chat(port, tokens, token_ms) for _ in range(clients)))
+
+
+def measure(workers: int, port: int, clients: int, tokens: int, token_ms: float) -> dict:
+    with tempfile.TemporaryDirectory(prefix="yat_load_") as home:
+        env = {**os.environ, "HOME": home, "USERPROFILE": home, "YAT_LOADTEST": "1"}
+        command = [sys.executable, str(ROOT_DIR / "main.py"), "--web", "--port", str(port)]
+        if workers > 1:
+            command += ["--workers", str(workers)]
+        server = subprocess.Popen(command, cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            worker_ports = [port] if workers == 1 else [port] + [port + 1 + i for i in range(workers)]
+            if not all(wait_for_port(p, STARTUP_TIMEOUT) for p in worker_ports):
+                raise RuntimeError(f"Server with {workers} worker(s) did not start")
+
+            asyncio.run(run_clients(port, min(clients, workers * 2), 5, 0))  # Warm-up: init providers in every worker
+            started = time.perf_counter()
+            results = asyncio.run(run_clients(port, clients, tokens, token_ms))
+            elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    total_tokens = sum(r["tokens"] for r in results)
+    per_worker = {}
+    for r in results:
+        per_worker[r["worker"]] = per_worker.get(r["worker"], 0) + 1
+    return {
+        "workers": workers,
+        "seconds": elapsed,
+        "tokens_per_s": total_tokens / elapsed,
+        "failed": sum(1 for r in results if not r["ok"] or r["tokens"] < tokens),
+        "ttfb_p50_ms": statistics.median(r["ttfb_ms"] for r in results),
+        "spread": per_worker,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-worker web mode load test")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=64, help="Concurrent streaming chats")
+    parser.add_argument("--tokens", type=int, default=200, help="Chunks per reply")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="Simulated time per chunk")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--min-efficiency", type=float, default=0.7)
+    args = parser.parse_args()
+
+    counts = sorted(set([1] + args.workers))
+    results = []
+    for workers in counts:
+        print(f"[*] {workers} worker(s), {args.clients} concurrent chats...")
+        results.append(measure(workers, args.port, args.clients, args.tokens, args.token_ms))
+    baseline = results[0]["tokens_per_s"]
+
+    print(f"\n{'workers':>7} {'seconds':>8} {'tokens/s':>10} {'speedup':>8} {'efficiency':>10} {'ttfb p50':>9} {'failed':>6}")
+    failed = False
+    for r in results:
+        speedup = r["tokens_per_s"] / baseline
+        efficiency = speedup / r["workers"]
+        ok = r["failed"] == 0 and efficiency >= args.min_efficiency
+        failed |= not ok
+        print(f"{r['workers']:>7} {r['seconds']:>8.2f} {r['tokens_per_s']:>10.0f} {speedup:>7.2f}x {efficiency:>9.0%} "
+              f"{r['ttfb_p50_ms']:>7.0f}ms {r['failed']:>6}{'' if ok else '  <-- FAIL'}")
+        if r["workers"] > 1:
+            print(f"{'':>7} chats per worker: {dict(sorted((k, v) for k, v in r['spread'].items() if k is not None))}")
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,7 @@ def reset():
 
     # Safety Check
     print(f"[WARN] This will delete all Settings, Keys, and Chat History!")
+    print("Tip: Back up the chat history first: python tools/chat_export.py export chat_backup.jsonl.gz")
     response = input(f"Are you sure you want to delete {data_dir}? [y/N] ")
     
     if response.lower() == 'y':
@@ -0,0 +1,146 @@
+"""
+Session Benchmark for Y.A.T.
+Simulates N browser sessions streaming at the same time through ONE shared
+LLMManager (as in --web mode) and checks two things:
+
+- Isolation: every session selects its own model and switches it mid-run; each
+  reply must come from the model that session had selected (no cross-talk).
+- Throughput: aggregate tokens/s with N sessions vs. N x a single session.
+  Streams are I/O bound, so efficiency should stay close to 100%.
+
+The provider is a local simulation (fixed time per token, no network), so the
+numbers measure OUR overhead (session views, context building, metadata).
+
+Also checked: with max_sessions open, a reloaded page (its old session is
+detached, as main.py does on disconnect) gets a session right away, while a
+new tab is still turned away when no session is detached.
+
+Usage:
+    python tools/session_bench.py                      # 1, 10, 50 sessions
+    python tools/session_bench.py --sessions 1 20 100 --tokens 100 --token-ms 5
+    python tools/session_bench.py --check              # Exit 1 on cross-talk, efficiency < --min-efficiency or a rejected reload
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.llm_manager import LLMManager  # noqa: E402
+from core.providers.simulated import SimulatedProvider, DEFAULT_MODELS as MODELS_PER_PROVIDER  # noqa: E402
+from core.providers.types import Message, Role  # noqa: E402
+from core.session import SessionLimitError, SessionManager  # noqa: E402
+
+
+def build_manager(tokens: int, token_ms: float) -> LLMManager:
+    manager = LLMManager()
+    for provider_id in ("alpha", "beta"):
+        manager.register_provider(provider_id, SimulatedProvider(provider_id, tokens, token_ms))
+    manager.active_provider_id, manager.active_model_id = "alpha", "m0"
+    return manager
+
+
+async def run_session(session, index: int, turns: int) -> dict:
+    """Each turn: select a model (different per session and turn), stream, verify the tags"""
+    errors, tokens = 0, 0
+    for turn in range(turns):
+        provider_id = ("alpha", "beta")[(index + turn) % 2]
+        model_id = f"m{(index + turn) % MODELS_PER_PROVIDER}"
+        session.llm.active_provider_id, session.llm.active_model_id = provider_id, model_id
+
+        history = [Message(role=Role.USER, content=f"session {index} turn {turn}")]
+        chunks = []
+        async for chunk in session.llm.stream_chat(history):
+            chunks.append(chunk)
+        expected = f"{provider_id}/{model_id} "
+        errors += sum(1 for c in chunks if c != expected)
+        tokens += len(chunks)
+    return {"errors": errors, "tokens": tokens}
+
+
+async def measure(n: int, turns: int, tokens: int, token_ms: float) -> dict:
+    manager = build_manager(tokens, token_ms)
+    sessions = SessionManager(manager, max_sessions=n)
+    opened = [sessions.open() for _ in range(n)]
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # LLMManager logs every request
+        results = await asyncio.gather(*(run_session(s, i, turns) for i, s in enumerate(opened)))
+    elapsed = time.perf_counter() - started
+
+    for session in opened:
+        sessions.close(session.id)
+    total_tokens = sum(r["tokens"] for r in results)
+    return {
+        "sessions": n,
+        "seconds": elapsed,
+        "tokens": total_tokens,
+        "tokens_per_s": total_tokens / elapsed,
+        "cross_talk": sum(r["errors"] for r in results),
+        "global_model_untouched": (manager.active_provider_id, manager.active_model_id) == ("alpha", "m0"),
+    }
+
+
+async def check_reload_at_limit(limit: int = 3) -> bool:
+    """All slots taken: a reload (old session detached) must get in, a new tab must not"""
+    sessions = SessionManager(build_manager(1, 0), max_sessions=limit)
+    opened = [sessions.open() for _ in range(limit)]
+    worker = opened[0].start_task(asyncio.sleep(3600))  # Stands in for the page's queue worker
+
+    try:
+        sessions.open()
+        new_tab_rejected = False
+    except SessionLimitError:
+        new_tab_rejected = True
+
+    sessions.detach(opened[0].id)  # Page reload: the old client disconnects ...
+    try:
+        sessions.open()            # ... and the new page asks for a session
+        reload_ok = True
+    except SessionLimitError:
+        reload_ok = False
+    await asyncio.sleep(0)
+    ok = new_tab_rejected and reload_ok and worker.cancelled() and len(sessions) == limit
+    print(f"{'[OK] ' if ok else '[ERR]'} reload at max_sessions={limit}: new tab "
+          f"{'rejected' if new_tab_rejected else 'ADMITTED'}, reload {'admitted' if reload_ok else 'REJECTED'}, "
+          f"old session {'closed' if worker.cancelled() else 'STILL RUNNING'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent session isolation/throughput benchmark")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--tokens", type=int, default=50, help="Chunks per reply")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="Simulated time per chunk")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--min-efficiency", type=float, default=0.8)
+    args = parser.parse_args()
+
+    counts = sorted(set([1] + args.sessions))
+    results = [asyncio.run(measure(n, args.turns, args.tokens, args.token_ms)) for n in counts]
+    baseline = results[0]["tokens_per_s"]
+
+    print(f"{'sessions':>8} {'seconds':>8} {'tokens/s':>10} {'efficiency':>10} {'cross-talk':>10}")
+    failed = False
+    for r in results:
+        efficiency = r["tokens_per_s"] / (baseline * r["sessions"])
+        ok = r["cross_talk"] == 0 and r["global_model_untouched"] and efficiency >= args.min_efficiency
+        failed |= not ok
+        print(f"{r['sessions']:>8} {r['seconds']:>8.2f} {r['tokens_per_s']:>10.0f} {efficiency:>9.0%} "
+              f"{r['cross_talk']:>10}{'' if ok else '  <-- FAIL'}")
+
+    print()
+    failed |= not asyncio.run(check_reload_at_limit())
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Startup Benchmark for Y.A.T.
+Measures how long the app needs until it is ready to serve the first page.
+
+Every run happens in a fresh Python process with:
+- a throw-away HOME (so ~/.yat side effects never touch real user data)
+- stubbed provider SDKs (openai, anthropic, google.generativeai) on PYTHONPATH,
+  so we measure OUR import cost and not the SDKs' network/setup cost
+
+Cold = empty bytecode cache (pycache_prefix), Warm = cache populated by a previous run.
+
+Usage:
+    python tools/startup_bench.py                 # Report only
+    python tools/startup_bench.py --check         # Exit 1 if a budget is exceeded or could not be measured (CI)
+    python tools/startup_bench.py --check --allow-skip   # ... skipped phases (ImportError, e.g. no nicegui) only warn
+    python tools/startup_bench.py --runs 10 --budget plugins=150
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Budgets in milliseconds (checked against the WARM median)
+DEFAULT_PHASE_BUDGETS_MS = {
+    "dotenv": 25,
+    "data_dir": 10,
+    "core_imports": 150,
+    "plugin_loader": 50,
+    "plugins": 250,
+    "main_import": 1500,
+}
+
+# Cumulative import time budgets for our own modules (WARM median, ms)
+DEFAULT_MODULE_BUDGETS_MS = {
+    "core.plugin_loader": 50,
+    # Mostly not ours: asyncio (~25 ms) and pydantic with the Message/ModelInfo models
+    # (~60 ms, core.providers.types) - every path that touches a Message pays it anyway
+    "core.llm_manager": 130,
+    "core.provider_config_manager": 25,
+    "storage.chat_db": 100,
+    "ui_nicegui.app_layout": 1200,
+}
+
+# --- Stubbed provider SDKs -------------------------------------------------
+# Just enough surface for the plugins to import and instantiate clients.
+_STUBS = {
+    "openai/__init__.py": '''
+class AsyncOpenAI:
+    def __init__(self, *args, **kwargs):
+        self.kwargs = kwargs
+    async def close(self):
+        pass
+''',
+    "anthropic/__init__.py": '''
+class AsyncAnthropic:
+    def __init__(self, *args, **kwargs):
+        self.kwargs = kwargs
+    async def close(self):
+        pass
+''',
+    "google/__init__.py": "",
+    "google/generativeai/__init__.py": '''
+def configure(**kwargs):
+    pass
+
+def list_models(**kwargs):
+    return iter(())
+
+class GenerationConfig:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+class GenerativeModel:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+''',
+    "google/generativeai/client.py": '''
+def get_default_model_client():
+    return None
+''',
+    "google/generativeai/types.py": '''
+from enum import Enum
+
+class HarmCategory(Enum):
+    HARM_CATEGORY_HARASSMENT = 1
+    HARM_CATEGORY_HATE_SPEECH = 2
+    HARM_CATEGORY_SEXUALLY_EXPLICIT = 3
+    HARM_CATEGORY_DANGEROUS_CONTENT = 4
+
+class HarmBlockThreshold(Enum):
+    BLOCK_ONLY_HIGH = 1
+''',
+}
+
+# --- Child process script --------------------------------------------------
+# Replays the startup sequence of main.py phase by phase and prints JSON timings.
+_PHASE_SCRIPT = r'''
+import json, sys, time
+results = {}
+
+def phase(name, fn):
+    start = time.perf_counter()
+    try:
+        fn()
+        results[name] = (time.perf_counter() - start) * 1000
+    except ImportError as e:
+        results[name] = None
+        results.setdefault("_skipped", {})[name] = str(e)
+
+def _dotenv():
+    from dotenv import load_dotenv
+    from core.paths import resolve_resource_path, get_data_path
+    load_dotenv(resolve_resource_path(".env"))
+    load_dotenv(get_data_path(".env"), override=True)
+
+def _data_dir():
+    import datetime
+    from core.paths import ensure_data_dir, get_data_path
+    ensure_data_dir()
+    with open(get_data_path("init_marker.txt"), "w") as f:
+        f.write(f"Timestamp: {datetime.datetime.now()}\n")
+
+def _core_imports():
+    import core.llm_manager, core.provider_config_manager, core.user_config, storage.chat_db
+
+def _plugin_loader():
+    import core.plugin_loader
+
+def _plugins():
+    import contextlib, io
+    from core.plugin_loader import PluginLoader
+    with contextlib.redirect_stdout(io.StringIO()):
+        PluginLoader(plugins_dir="plugins").load_all_plugins()
+
+def _main_import():
+    import contextlib, io
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+
+for name, fn in [
+    ("dotenv", _dotenv),
+    ("data_dir", _data_dir),
+    ("core_imports", _core_imports),
+    ("plugin_loader", _plugin_loader),
+    ("plugins", _plugins),
+    ("main_import", _main_import),
+]:
+    phase(name, fn)
+
+print("@@RESULT@@" + json.dumps(results))
+'''
+
+
+def write_stubs(stub_dir: Path):
+    """Write the fake provider SDK packages"""
+    for rel_path, source in _STUBS.items():
+        target = stub_dir / rel_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(source.lstrip(), encoding="utf-8")
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Parse `python -X importtime` output.
+    Returns {module: (self_us, cumulative_us)} for every imported module.
+    (Module names are indented by nesting depth in the raw output - we strip that.)
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            _, values = line.split(":", 1)
+            self_us, cumulative_us, name = values.split("|", 2)
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue  # Header line ("self [us] | cumulative | imported package")
+    return modules
+
+
+def run_once(home_dir: Path, stub_dir: Path, pycache_dir: Path) -> tuple:
+    """Run the phase script in a fresh interpreter, return (phases, modules)"""
+    env = dict(os.environ)
+    env["HOME"] = str(home_dir)
+    env["USERPROFILE"] = str(home_dir)  # Windows
+    env["PYTHONPATH"] = os.pathsep.join([str(stub_dir), str(ROOT_DIR)])
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-X", f"pycache_prefix={pycache_dir}", "-c", _PHASE_SCRIPT],
+        cwd=ROOT_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    marker = next((l for l in proc.stdout.splitlines() if l.startswith("@@RESULT@@")), None)
+    if proc.returncode != 0 or marker is None:
+        raise RuntimeError(f"Benchmark child failed (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+
+    return json.loads(marker[len("@@RESULT@@"):]), parse_importtime(proc.stderr)
+
+
+def median_or_none(values):
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+
+def format_ms(value) -> str:
+    return f"{'skipped':>11s}" if value is None else f"{value:8.1f} ms"
+
+
+def check_budgets(label: str, measured: dict, budgets: dict, skipped: list) -> list:
+    """Print a budget table and return the list of violations (unmeasured budgets go to skipped)"""
+    violations = []
+    print(f"\n{label}")
+    for name, budget in budgets.items():
+        value = measured.get(name)
+        if value is None:
+            status = "[SKIP]"
+            skipped.append(name)
+        elif value > budget:
+            status = "[FAIL]"
+            violations.append(f"{name}: {value:.1f} ms > {budget} ms")
+        else:
+            status = "[OK]  "
+        print(f"  {status} {name:32s} {format_ms(value)}  (budget {budget} ms)")
+    return violations
+
+
+def parse_budget_overrides(items) -> dict:
+    overrides = {}
+    for item in items or []:
+        try:
+            name, value = item.split("=", 1)
+            overrides[name.strip()] = float(value)
+        except ValueError:
+            raise SystemExit(f"Invalid budget '{item}' (expected name=ms)")
+    return overrides
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Y.A.T. startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Warm runs (default: 5)")
+    parser.add_argument("--check", action="store_true", help="Exit with code 1 if a budget is exceeded or skipped")
+    parser.add_argument("--allow-skip", action="store_true",
+                        help="With --check: budgets that could not be measured (ImportError) don't fail")
+    parser.add_argument("--budget", action="append", metavar="NAME=MS",
+                        help="Override a phase or module budget (repeatable)")
+    parser.add_argument("--top", type=int, default=15, help="Show the N slowest imports")
+    args = parser.parse_args()
+
+    overrides = parse_budget_overrides(args.budget)
+    phase_budgets = {**DEFAULT_PHASE_BUDGETS_MS,
+                     **{k: v for k, v in overrides.items() if k in DEFAULT_PHASE_BUDGETS_MS}}
+    module_budgets = {**DEFAULT_MODULE_BUDGETS_MS,
+                      **{k: v for k, v in overrides.items() if k not in DEFAULT_PHASE_BUDGETS_MS}}
+
+    with tempfile.TemporaryDirectory(prefix="yat-bench-") as tmp:
+        tmp_path = Path(tmp)
+        home_dir, stub_dir, pycache_dir = tmp_path / "home", tmp_path / "stubs", tmp_path / "pycache"
+        home_dir.mkdir()
+        write_stubs(stub_dir)
+
+        print(f"[*] Startup benchmark ({sys.executable})")
+        print(f"    Cold run + {args.runs} warm run(s), stubbed SDKs in {stub_dir}")
+
+        # Cold: empty bytecode cache, fresh data dir
+        cold_phases, cold_modules = run_once(home_dir, stub_dir, pycache_dir)
+
+        # Warm: bytecode cache and ~/.yat exist
+        warm_runs = [run_once(home_dir, stub_dir, pycache_dir) for _ in range(max(1, args.runs))]
+
+    skipped = cold_phases.pop("_skipped", {})
+    for phases, _ in warm_runs:
+        phases.pop("_skipped", None)
+
+    warm_phases = {name: median_or_none([p.get(name) for p, _ in warm_runs]) for name in phase_budgets}
+    warm_modules = {
+        name: median_or_none([
+            m[name][1] / 1000 if name in m else None for _, m in warm_runs
+        ])
+        for name in set().union(*(m.keys() for _, m in warm_runs))
+    }
+
+    print(f"\n{'Phase':34s} {'cold':>11s} {'warm':>11s}")
+    for name in phase_budgets:
+        print(f"  {name:32s} {format_ms(cold_phases.get(name))} {format_ms(warm_phases.get(name))}")
+    total_cold = sum(v for v in cold_phases.values() if v is not None)
+    total_warm = sum(v for v in warm_phases.values() if v is not None)
+    print(f"  {'TOTAL':32s} {format_ms(total_cold)} {format_ms(total_warm)}")
+
+    for name, reason in skipped.items():
+        print(f"  [INFO] {name} skipped: {reason}")
+
+    print(f"\nSlowest imports (warm, cumulative):")
+    slowest = sorted(((v, k) for k, v in warm_modules.items() if v is not None), reverse=True)[:args.top]
+    for value, name in slowest:
+        print(f"  {format_ms(value)}  {name}")
+
+    unmeasured = []
+    violations = check_budgets("Phase budgets (warm median):", warm_phases, phase_budgets, unmeasured)
+    violations += check_budgets("Module budgets (warm median, cumulative):", warm_modules, module_budgets, unmeasured)
+
+    if violations:
+        print(f"\n[WARN] {len(violations)} budget(s) exceeded:")
+        for v in violations:
+            print(f"  - {v}")
+    if unmeasured:
+        print(f"\n[WARN] {len(unmeasured)} budget(s) not measured (skipped): {', '.join(unmeasured)}")
+    if not violations:
+        print(f"\n[OK] All {'measured ' if unmeasured else ''}startup budgets met")
+    if args.check and (violations or (unmeasured and not args.allow_skip)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""
+Storage Conformance & Performance Suite
+Every chat storage backend (storage/base.py) must pass these checks: ordering,
+round-trips (role, content, timestamp, metadata, unicode), conversation pages
+(cursor, filters, sorts, counters), summaries, cascade delete, search
+semantics, export and (if supported) reply drafts. After the checks the same
+backend is timed on a synthetic history (saves/s, load, list, search, export).
+"page" is one list_conversations() page with previews and counters, "N+1" the
+same information via get_conversations() plus load_messages() per chat.
+
+Each backend gets fresh, throw-away storage (SQLite in a temp directory), so
+~/.yat is never touched.
+
+Usage:
+    python tools/storage_conformance.py                          # sqlite + memory
+    python tools/storage_conformance.py --backend mypkg.store:MyStorage
+    python tools/storage_conformance.py --conversations 200 --messages 50
+    python tools/storage_conformance.py --check                  # Exit 1 if any check fails
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.providers.types import Message, Role  # noqa: E402
+from storage.base import ChatStorage, INTERRUPTED_MARKER, PREVIEW_CHARS, create_chat_storage  # noqa: E402
+from storage.memory_storage import MemoryChatStorage  # noqa: E402
+from storage.sqlite_storage import SQLiteChatStorage  # noqa: E402
+
+TICK = 0.002  # Keeps updated_at strictly increasing between steps
+
+
+def make_factory(spec: str, workdir: str):
+    """Callable returning a fresh, empty backend per check"""
+    counter = iter(range(1_000_000))
+    if spec == "sqlite":
+        return lambda: SQLiteChatStorage(db_path=str(Path(workdir) / f"chat_{next(counter)}.db"))
+    if spec == "memory":
+        return MemoryChatStorage
+    return lambda: create_chat_storage(spec)
+
+
+def expect(condition: bool, what: str):
+    if not condition:
+        raise AssertionError(what)
+
+
+# --- Conformance checks --------------------------------------------------------
+
+async def check_conversation_list(store: ChatStorage):
+    for i in range(3):
+        await store.create_conversation(f"c{i}", title=f"Chat {i}", provider_id="p", model_id=f"m{i}")
+        await asyncio.sleep(TICK)
+    conversations = await store.get_conversations()
+    expect([c["id"] for c in conversations] == ["c2", "c1", "c0"], "conversations not newest first")
+    expect(set(conversations[0]) >= {"id", "title", "provider_id", "model_id", "created_at", "updated_at"},
+           "conversation dict is missing fields")
+    expect(conversations[0]["model_id"] == "m2" and conversations[0]["title"] == "Chat 2", "conversation fields differ")
+    expect(len(await store.get_conversations(limit=2)) == 2, "limit not applied")
+    expect(len(await store.get_conversations(limit=-1)) == 3, "limit=-1 must return everything")
+
+
+async def check_save_bumps_updated_at(store: ChatStorage):
+    await store.create_conversation("old")
+    await asyncio.sleep(TICK)
+    await store.create_conversation("new")
+    await asyncio.sleep(TICK)
+    await store.save_message("old", Message(role=Role.USER, content="hello again"))
+    expect((await store.get_conversations())[0]["id"] == "old", "save_message must move the chat to the top")
+    await asyncio.sleep(TICK)
+    await store.update_conversation_title("new", "Renamed")
+    conversations = await store.get_conversations()
+    expect(conversations[0]["id"] == "new" and conversations[0]["title"] == "Renamed", "title update not applied")
+
+
+async def check_conversation_pages(store: ChatStorage):
+    for i in range(7):
+        await store.create_conversation(f"c{i}", title=f"Chat {6 - i}", provider_id="p" if i % 2 else "q", model_id=f"m{i % 3}")
+        await asyncio.sleep(TICK)
+    await store.save_message("c2", Message(role=Role.ASSISTANT, content="greeting", metadata={"tokens": 5}))
+    await store.save_message("c2", Message(role=Role.USER, content="x" * (PREVIEW_CHARS + 50),
+                                           metadata={"tokens": {"counter": "chars", "count": 30, "chars": 150}}))
+    await store.save_message("c2", Message(role=Role.USER, content="second question"))
+
+    seen, cursor = [], None
+    while True:
+        page = await store.list_conversations(limit=3, cursor=cursor)
+        expect(len(page["conversations"]) <= 3, "page larger than limit")
+        seen += [c["id"] for c in page["conversations"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    expect(seen == ["c2", "c6", "c5", "c4", "c3", "c1", "c0"], f"cursor pages out of order or incomplete: {seen}")
+
+    top = (await store.list_conversations(limit=1))["conversations"][0]
+    expect(top["message_count"] == 3 and top["char_count"] == len("greeting") + PREVIEW_CHARS + 50 + len("second question"),
+           "message_count/char_count wrong")
+    expect(top["token_count"] == 35, "token_count must add up cached token counts")
+    expect(top["preview"] == "x" * PREVIEW_CHARS, "preview must be the first user message, cut to PREVIEW_CHARS")
+    expect(top["last_message_at"] is not None, "last_message_at missing")
+    by_messages = (await store.list_conversations(limit=1, sort="messages"))["conversations"]
+    expect(by_messages[0]["id"] == "c2", "sort by messages wrong")
+
+    filtered = await store.list_conversations(provider_id="p", model_id="m1")
+    expect([c["id"] for c in filtered["conversations"]] == ["c1"] and filtered["next_cursor"] is None,
+           "provider/model filter wrong")
+    titles, cursor = [], None
+    while True:
+        page = await store.list_conversations(limit=2, cursor=cursor, sort="title")
+        titles += [c["title"] for c in page["conversations"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    expect(titles == sorted(titles) and len(titles) == 7, "title sort must be ascending across pages")
+    try:
+        await store.list_conversations(cursor="not a cursor")
+        expect(False, "invalid cursor must raise ValueError")
+    except ValueError:
+        pass
+
+
+async def check_message_roundtrip(store: ChatStorage):
+    await store.create_conversation("c")
+    base = datetime(2024, 5, 1, 12, 0, 0, 123456)
+    sent = [
+        Message(role=Role.USER, content="Grüße 👋 — \"quotes\" and 'apostrophes'", timestamp=base,
+                metadata={"tokens": 12, "nested": {"a": [1, 2]}}),
+        Message(role=Role.ASSISTANT, content="line 1\nline 2\n```py\nprint(1)\n```", timestamp=base + timedelta(seconds=2),
+                metadata={"provider": "p", "model": "m"}),
+        Message(role=Role.SYSTEM, content="", timestamp=base + timedelta(seconds=1)),
+    ]
+    ids = [await store.save_message("c", m) for m in sent]
+    expect(len(set(ids)) == 3 and all(isinstance(i, int) for i in ids), "message ids must be distinct ints")
+    sent[0].metadata["tokens"] = 999  # Mutating the caller's object afterwards must not change stored data
+    loaded = await store.load_messages("c")
+    expect([m.timestamp for m in loaded] == sorted(m.timestamp for m in loaded), "messages not oldest first")
+    expect([m.role for m in loaded] == [Role.USER, Role.SYSTEM, Role.ASSISTANT], "roles/order differ")
+    expect(loaded[0].content == "Grüße 👋 — \"quotes\" and 'apostrophes'", "unicode content differs")
+    expect(loaded[0].metadata == {"tokens": 12, "nested": {"a": [1, 2]}}, "metadata differs")
+    expect(loaded[0].timestamp == base, "timestamp differs")
+    expect(loaded[2].content.endswith("```"), "multi-line content differs")
+    expect(await store.load_messages("missing") == [], "unknown conversation must load as []")
+
+
+async def check_large_messages(store: ChatStorage):
+    await store.create_conversation("c", title="Code")
+    code = "".join(f"def handler_{i}(request):\n    return respond(request, status={200 + i % 5})\n\n" for i in range(300))
+    big_meta = {"sources": [{"path": f"docs/page_{i}.md", "score": 0.5} for i in range(200)]}
+    await store.save_message("c", Message(role=Role.ASSISTANT, content=code, metadata=big_meta))
+    loaded = (await store.load_messages("c"))[0]
+    expect(loaded.content == code and loaded.metadata == big_meta, "large message differs after round-trip")
+    hits = await store.search_messages("HANDLER_299(")
+    expect(len(hits) == 1 and hits[0]["content"] == code, "search must find text inside large messages")
+    exported = [item async for item in store.export_conversations()]
+    expect(exported[0]["messages"][0]["content"] == code, "large message differs in export")
+
+
+async def check_isolation(store: ChatStorage):
+    await store.create_conversation("a")
+    await store.create_conversation("b")
+    await store.save_message("a", Message(role=Role.USER, content="for a"))
+    await store.save_message("b", Message(role=Role.USER, content="for b"))
+    expect([m.content for m in await store.load_messages("a")] == ["for a"], "messages leaked between chats")
+
+
+async def check_summary(store: ChatStorage):
+    await store.create_conversation("c")
+    expect(await store.load_summary("c") is None, "missing summary must be None")
+    await store.save_summary("c", "first", covered_messages=4, token_count=10, model="p|m")
+    await store.save_summary("c", "second", covered_messages=8, token_count=20, model="p|m")
+    summary = await store.load_summary("c")
+    expect(summary is not None and summary["content"] == "second", "summary not replaced")
+    expect(summary["covered_messages"] == 8 and summary["token_count"] == 20 and summary["model"] == "p|m",
+           "summary fields differ")
+
+
+async def check_delete(store: ChatStorage):
+    for cid in ("keep", "drop"):
+        await store.create_conversation(cid)
+        await store.save_message(cid, Message(role=Role.USER, content=f"needle {cid}"))
+        await store.save_summary(cid, "s", covered_messages=1)
+    await store.delete_conversation("drop")
+    expect([c["id"] for c in await store.get_conversations()] == ["keep"], "conversation not deleted")
+    expect(await store.load_messages("drop") == [], "messages not deleted")
+    expect(await store.load_summary("drop") is None, "summary not deleted")
+    expect([r["conversation_id"] for r in await store.search_messages("needle")] == ["keep"], "deleted messages still found")
+    await store.delete_conversation("never-existed")
+
+
+async def check_search(store: ChatStorage):
+    await store.create_conversation("c", title="Search chat")
+    base = datetime(2024, 1, 1)
+    texts = ["The Quick brown fox", "quick thinking", "100% sure", "snake_case name", "nothing here"]
+    for i, text in enumerate(texts):
+        await store.save_message("c", Message(role=Role.USER, content=text, timestamp=base + timedelta(minutes=i)))
+
+    hits = await store.search_messages("QUICK")
+    expect([h["content"] for h in hits] == ["quick thinking", "The Quick brown fox"], "case-insensitive/newest-first search failed")
+    expect(set(hits[0]) >= {"message_id", "conversation_id", "title", "role", "content", "timestamp"}, "search hit is missing fields")
+    expect(hits[0]["title"] == "Search chat" and hits[0]["role"] == "user", "search hit fields differ")
+    expect([h["content"] for h in await store.search_messages("%")] == ["100% sure"], "'%' must match literally")
+    expect([h["content"] for h in await store.search_messages("e_c")] == ["snake_case name"], "'_' must match literally")
+    expect(len(await store.search_messages("e", limit=2)) == 2, "search limit not applied")
+    expect(await store.search_messages("zebra") == [], "search without hits must return []")
+
+
+async def check_export(store: ChatStorage):
+    for cid in ("x", "y"):
+        await store.create_conversation(cid, title=f"Chat {cid}")
+        await store.save_message(cid, Message(role=Role.USER, content=f"q {cid}", metadata={"k": cid}))
+        await store.save_message(cid, Message(role=Role.ASSISTANT, content=f"a {cid}"))
+    await store.save_summary("x", "sum", covered_messages=2)
+
+    exported = [item async for item in store.export_conversations()]
+    expect(sorted(item["conversation"]["id"] for item in exported) == ["x", "y"], "export misses conversations")
+    x = next(item for item in exported if item["conversation"]["id"] == "x")
+    expect([m["content"] for m in x["messages"]] == ["q x", "a x"], "exported messages differ")
+    expect(x["messages"][0]["role"] == "user" and x["messages"][0]["metadata"] == {"k": "x"}, "exported message fields differ")
+    datetime.fromisoformat(x["messages"][0]["timestamp"])
+    expect(x["summary"]["content"] == "sum", "summary not exported")
+    only_y = [item async for item in store.export_conversations(["y"])]
+    expect([item["conversation"]["id"] for item in only_y] == ["y"], "export filter not applied")
+
+
+async def check_drafts(store: ChatStorage):
+    if type(store).save_draft is ChatStorage.save_draft:
+        return "skipped"  # Drafts are optional (no crash-safe checkpointing then)
+    await store.create_conversation("c")
+    await store.save_message("c", Message(role=Role.USER, content="question"))
+    reply = Message(role=Role.ASSISTANT, content="")
+    for partial in ("par", "partial"):
+        await store.save_draft("d1", "c", reply.model_copy(update={"content": partial}))
+    expect(len(await store.load_messages("c")) == 1, "drafts must not show up as messages")
+    reply.content = "partial and complete"
+    message_id = await store.finalize_draft("d1", "c", reply)
+    expect(isinstance(message_id, int), "finalize_draft must return the message id")
+    expect(await store.recover_drafts() == [], "finalized draft must be gone")
+    expect([m.content for m in await store.load_messages("c")] == ["question", "partial and complete"], "final message differs")
+
+    await store.save_draft("d2", "c", Message(role=Role.ASSISTANT, content="cut off"))
+    recovered = await store.recover_drafts()
+    expect(len(recovered) == 1 and recovered[0]["content"] == "cut off" + INTERRUPTED_MARKER, "draft not recovered")
+    last = (await store.load_messages("c"))[-1]
+    expect(last.metadata.get("interrupted") is True and last.content.endswith(INTERRUPTED_MARKER), "recovered reply not marked")
+    expect(await store.recover_drafts() == [], "draft recovered twice")
+
+    await store.create_conversation("gone")
+    await store.save_draft("d3", "gone", Message(role=Role.ASSISTANT, content="orphan"))
+    await store.delete_conversation("gone")
+    expect(await store.recover_drafts() == [], "drafts of deleted chats must be dropped")
+
+
+CHECKS = [
+    check_conversation_list,
+    check_save_bumps_updated_at,
+    check_conversation_pages,
+    check_message_roundtrip,
+    check_large_messages,
+    check_isolation,
+    check_summary,
+    check_delete,
+    check_search,
+    check_export,
+    check_drafts,
+]
+
+
+async def run_checks(factory) -> list:
+    failures = []
+    for check in CHECKS:
+        store = factory()
+        try:
+            result = await check(store)
+            print(f"    {'[--]' if result == 'skipped' else '[OK]'}  {check.__name__}{' (not supported)' if result == 'skipped' else ''}")
+        except Exception as e:
+            failures.append(check.__name__)
+            print(f"    [ERR] {check.__name__}: {e}")
+            if not isinstance(e, AssertionError):
+                traceback.print_exc()
+        finally:
+            await store.close()
+    return failures
+
+
+# --- Performance ---------------------------------------------------------------
+
+async def run_benchmark(factory, conversations: int, messages: int) -> dict:
+    store = factory()
+    try:
+        words = "alpha beta gamma delta epsilon zeta eta theta iota kappa".split()
+        started = time.perf_counter()
+        for c in range(conversations):
+            cid = f"bench-{c}"
+            await store.create_conversation(cid, title=f"Bench {c}")
+            for m in range(messages):
+                role = Role.USER if m % 2 == 0 else Role.ASSISTANT
+                text = " ".join(words[(c + m + i) % len(words)] for i in range(40)) + f" #{c}-{m}"
+                await store.save_message(cid, Message(role=role, content=text, metadata={"tokens": 40}))
+        save_s = time.perf_counter() - started
+        total = conversations * messages
+
+        load_ms = []
+        for c in range(0, conversations, max(1, conversations // 50)):
+            t = time.perf_counter()
+            await store.load_messages(f"bench-{c}")
+            load_ms.append((time.perf_counter() - t) * 1000)
+
+        t = time.perf_counter()
+        await store.get_conversations()
+        list_ms = (time.perf_counter() - t) * 1000
+
+        t = time.perf_counter()
+        await store.list_conversations(limit=50)
+        page_ms = (time.perf_counter() - t) * 1000
+
+        t = time.perf_counter()
+        for conversation in await store.get_conversations(limit=50):
+            await store.load_messages(conversation["id"])
+        n_plus_one_ms = (time.perf_counter() - t) * 1000
+
+        t = time.perf_counter()
+        await store.search_messages(f"#{conversations // 2}-1")
+        search_ms = (time.perf_counter() - t) * 1000
+
+        t = time.perf_counter()
+        exported = 0
+        async for item in store.export_conversations():
+            exported += len(item["messages"])
+        export_s = time.perf_counter() - t
+
+        return {
+            "saves_per_s": total / save_s,
+            "load_p50_ms": statistics.median(load_ms),
+            "list_ms": list_ms,
+            "page_ms": page_ms,
+            "n_plus_one_ms": n_plus_one_ms,
+            "search_ms": search_ms,
+            "export_per_s": exported / export_s if export_s else float("inf"),
+        }
+    finally:
+        await store.close()
+
+
+async def main_async(args) -> bool:
+    ok = True
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="yat_storage_") as workdir:
+        for spec in args.backend:
+            factory = make_factory(spec, workdir)
+            print(f"[*] {spec}: conformance")
+            failures = await run_checks(factory)
+            ok &= not failures
+            if not args.skip_bench:
+                print(f"[*] {spec}: {args.conversations} chats x {args.messages} messages")
+                results[spec] = await run_benchmark(factory, args.conversations, args.messages)
+
+    if results:
+        print(f"\n{'backend':<24} {'saves/s':>9} {'load p50':>9} {'list':>8} {'page':>8} {'N+1':>9} {'search':>8} "
+              f"{'export msg/s':>13}")
+        for spec, r in results.items():
+            print(f"{spec:<24} {r['saves_per_s']:>9.0f} {r['load_p50_ms']:>7.2f}ms {r['list_ms']:>6.2f}ms "
+                  f"{r['page_ms']:>6.2f}ms {r['n_plus_one_ms']:>7.2f}ms {r['search_ms']:>6.2f}ms {r['export_per_s']:>13.0f}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat storage conformance and performance suite")
+    parser.add_argument("--backend", nargs="+", default=["sqlite", "memory"],
+                        help='"sqlite", "memory" or "module:Class"')
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=20, help="Messages per conversation")
+    parser.add_argument("--skip-bench", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    ok = asyncio.run(main_async(args))
+    print("\n[OK] All backends conform" if ok else "\n[ERR] Conformance failures (see above)")
+    if args.check and not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Export / Import Benchmark
+Throughput and memory of the streaming chat export and import
+(storage/transfer.py, tools/chat_export.py) on a synthetic history:
+
+- export      database -> JSONL (plain and .gz)
+- import      JSONL -> empty database, one transaction per --batch-size messages
+- re-import   the same file again; everything must be skipped as duplicate
+
+Reported: messages/s per phase and the peak RSS of the process after each
+phase. The history is generated in blocks too, so a flat peak means memory
+does not grow with the number of messages. Finally the imported database is
+exported again and compared record by record with the first export.
+
+Each run uses throw-away files in a temp directory, ~/.yat is never touched.
+
+Usage:
+    python tools/transfer_bench.py
+    python tools/transfer_bench.py --messages 2000000 --batch-size 20000
+    python tools/transfer_bench.py --check     # Exit 1 if the round-trip differs or duplicates were imported
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.providers.types import Message, Role  # noqa: E402
+from storage.chat_db import ChatDatabase  # noqa: E402
+from storage.transfer import DEFAULT_IMPORT_BATCH, export_records, import_records, read_jsonl, write_jsonl  # noqa: E402
+
+WORDS = ("the model streams tokens while the sidebar lists chats with previews and the storage layer "
+         "writes batches into sqlite using one transaction per block of messages").split()
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def build_history(db: ChatDatabase, messages: int, per_chat: int, seed: int = 3):
+    """Synthetic history, written in blocks (never all in memory)"""
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    ops = []
+    for m in range(messages):
+        c, turn = divmod(m, per_chat)
+        cid = f"chat-{c:07d}"
+        if turn == 0:
+            ops.append(("conversation", (cid, f"Chat {c}", "bench", "model")))
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 80)))
+        ops.append(("message", (cid, Message(
+            role=Role.USER if turn % 2 == 0 else Role.ASSISTANT,
+            content=f"{text} ({c}-{turn})",
+            timestamp=base + timedelta(seconds=m),
+            metadata={"tokens": {"counter": "chars", "count": len(text) // 4, "chars": len(text)}}
+        ))))
+        if len(ops) >= 10000:
+            db.write_batch(ops)
+            ops = []
+    if ops:
+        db.write_batch(ops)
+
+
+def timed(label: str, messages: int, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<18} {elapsed:>7.2f}s {messages / elapsed:>11.0f} msg/s {peak_rss_mb():>9.0f} MB")
+    return result
+
+
+def same_records(a, b) -> bool:
+    """Both exports without header (exported_at differs)"""
+    a, b = iter(a), iter(b)
+    next(a), next(b)
+    sentinel = object()
+    for left, right in zip(a, b):
+        if left != right:
+            return False
+    return next(a, sentinel) is sentinel and next(b, sentinel) is sentinel
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat export/import benchmark")
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--per-chat", type=int, default=40, help="Messages per conversation")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_IMPORT_BATCH)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="yat_transfer_") as workdir:
+        work = Path(workdir)
+        source = ChatDatabase(str(work / "source.db"))
+        print(f"[*] Building {args.messages} messages in {args.messages // args.per_chat} chats...")
+        build_history(source, args.messages, args.per_chat)
+        print(f"    peak RSS after build: {peak_rss_mb():.0f} MB\n")
+
+        print(f"{'phase':<18} {'time':>8} {'throughput':>15} {'peak RSS':>12}")
+        timed("export jsonl", args.messages, lambda: write_jsonl(export_records(source), work / "backup.jsonl"))
+        timed("export jsonl.gz", args.messages, lambda: write_jsonl(export_records(source), work / "backup.jsonl.gz"))
+
+        target = ChatDatabase(str(work / "target.db"))
+        first = timed("import", args.messages,
+                      lambda: import_records(target, read_jsonl(work / "backup.jsonl"), batch_size=args.batch_size))
+        again = timed("re-import", args.messages,
+                      lambda: import_records(target, read_jsonl(work / "backup.jsonl.gz"), batch_size=args.batch_size))
+
+        size_mb = os.path.getsize(work / "backup.jsonl") / 1024 / 1024
+        gz_mb = os.path.getsize(work / "backup.jsonl.gz") / 1024 / 1024
+        roundtrip = same_records(export_records(source), export_records(target))
+
+    print(f"\nbackup.jsonl {size_mb:.1f} MB, backup.jsonl.gz {gz_mb:.1f} MB")
+    print(f"import: {first['messages']} new; re-import: {again['messages']} new, {again['duplicates']} duplicates")
+    ok = roundtrip and first["messages"] == args.messages and again["messages"] == 0
+    print(f"{'[OK] ' if ok else '[ERR]'} round-trip {'identical' if roundtrip else 'DIFFERS'}, "
+          f"re-import {'added nothing' if again['messages'] == 0 else 'ADDED DUPLICATES'}")
+    if args.check and not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
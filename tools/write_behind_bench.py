@@ -0,0 +1,130 @@
+"""
+Write-Behind Benchmark
+How many messages/s the chat database takes when C sessions save at the same
+time: one transaction per message (write_behind off) vs. batched group commits
+(storage/write_buffer.py). Every save is awaited until committed, so both
+modes give the same durability; the numbers are sustained, acknowledged writes.
+
+Also checks:
+- Back-pressure: with a small max_pending, writers wait instead of growing the queue
+- Shutdown: close() commits every write that was still queued
+
+Each run uses a throw-away database in a temp directory, ~/.yat is never touched.
+
+Usage:
+    python tools/write_behind_bench.py                           # 1, 10, 50, 200 writers
+    python tools/write_behind_bench.py --writers 1 100 --messages 50 --flush-ms 10
+    python tools/write_behind_bench.py --check                   # Exit 1 if batching is not faster at >= 10 writers
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from core.providers.types import Message, Role  # noqa: E402
+from storage.sqlite_storage import SQLiteChatStorage  # noqa: E402
+from storage.write_buffer import DEFAULT_FLUSH_MS  # noqa: E402
+
+TEXT = "lorem ipsum dolor sit amet " * 20  # ~540 chars, a typical short reply
+
+
+async def writer(store: SQLiteChatStorage, conversation_id: str, messages: int, latencies: list):
+    await store.create_conversation(conversation_id, title="bench")
+    for i in range(messages):
+        role = Role.USER if i % 2 == 0 else Role.ASSISTANT
+        started = time.perf_counter()
+        await store.save_message(conversation_id, Message(role=role, content=f"{TEXT}{i}"))
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def measure(workdir: str, writers: int, messages: int, write_behind: bool, flush_ms: float) -> dict:
+    db_path = str(Path(workdir) / f"bench_{writers}_{int(write_behind)}.db")
+    store = SQLiteChatStorage(db_path=db_path, write_behind=write_behind, flush_ms=flush_ms)
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(store, f"c{w}", messages, latencies) for w in range(writers)))
+    elapsed = time.perf_counter() - started
+    stats = store.get_stats()["write_behind"] or {}
+    await store.close()
+
+    latencies.sort()
+    return {
+        "msgs_per_s": writers * messages / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "avg_batch": stats.get("avg_batch", 1),
+    }
+
+
+async def check_backpressure(workdir: str) -> bool:
+    store = SQLiteChatStorage(db_path=str(Path(workdir) / "backpressure.db"), max_pending=20)
+    await store.create_conversation("c")
+    await asyncio.gather(*(store.save_message("c", Message(role=Role.USER, content=str(i))) for i in range(500)))
+    stats = store.get_stats()["write_behind"]
+    await store.close()
+    ok = stats["peak_pending"] <= 20 and stats["backpressure_waits"] > 0
+    print(f"    {'[OK] ' if ok else '[ERR]'} back-pressure: peak queue {stats['peak_pending']} (limit 20), "
+          f"{stats['backpressure_waits']} waits")
+    return ok
+
+
+async def check_shutdown(workdir: str) -> bool:
+    db_path = str(Path(workdir) / "shutdown.db")
+    store = SQLiteChatStorage(db_path=db_path, flush_ms=50)
+    await store.create_conversation("c")
+    tasks = [asyncio.create_task(store.save_message("c", Message(role=Role.USER, content=str(i)))) for i in range(300)]
+    await asyncio.sleep(0)  # Queued, not committed yet
+    await store.close()
+    await asyncio.gather(*tasks)
+    saved = len(SQLiteChatStorage(db_path=db_path, write_behind=False).db.load_messages("c"))
+    ok = saved == 300
+    print(f"    {'[OK] ' if ok else '[ERR]'} shutdown: {saved}/300 queued messages committed by close()")
+    return ok
+
+
+async def main_async(args) -> bool:
+    ok = True
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="yat_wb_") as workdir:
+        for writers in args.writers:
+            print(f"[*] {writers} writer(s) x {args.messages} messages...")
+            direct = await measure(workdir, writers, args.messages, False, args.flush_ms)
+            batched = await measure(workdir, writers, args.messages, True, args.flush_ms)
+            rows.append((writers, direct, batched))
+
+        print("[*] Guarantees")
+        ok &= await check_backpressure(workdir)
+        ok &= await check_shutdown(workdir)
+
+    print(f"\n{'writers':>7} | {'direct msg/s':>12} {'p99':>8} | {'batched msg/s':>13} {'p50':>7} {'p99':>8} {'batch':>6} | {'speedup':>7}")
+    for writers, direct, batched in rows:
+        speedup = batched["msgs_per_s"] / direct["msgs_per_s"]
+        if writers >= 10 and speedup < 1.0:
+            ok = False
+        print(f"{writers:>7} | {direct['msgs_per_s']:>12.0f} {direct['p99_ms']:>6.1f}ms | "
+              f"{batched['msgs_per_s']:>13.0f} {batched['p50_ms']:>5.1f}ms {batched['p99_ms']:>6.1f}ms "
+              f"{batched['avg_batch']:>6} | {speedup:>6.1f}x")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write-behind batching benchmark")
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 10, 50, 200], help="Concurrent sessions")
+    parser.add_argument("--messages", type=int, default=40, help="Messages per writer")
+    parser.add_argument("--flush-ms", type=float, default=DEFAULT_FLUSH_MS)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    ok = asyncio.run(main_async(args))
+    if args.check and not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
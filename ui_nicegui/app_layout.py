@@ -5,35 +5,40 @@ Orchestrates sidebar, chat view, and input area
 from nicegui import ui
 import asyncio
 import uuid
-from core.llm_manager import LLMManager
 from core.providers.types import Message, Role
-from storage.chat_db import ChatDatabase
+from core.session import ChatSession
+from core.summarizer import ConversationSummarizer
+from core.user_config import UserConfig
+from storage.base import ChatStorage
+from storage.checkpoint import ReplyCheckpoint, DEFAULT_CHECKPOINT_MS, DEFAULT_CHECKPOINT_CHARS
 from .sidebar import Sidebar
 from .chat_view import ChatView
 from .input_area import InputArea
 
+HISTORY_PAGE_SIZE = 50
+
 
 class AppLayout:
-    def __init__(self, llm_manager: LLMManager):
-        self.llm_manager = llm_manager
-        
-        # Persistence
-        self.db = ChatDatabase()
-        self.current_conversation_id = None
-        
-        # State
-        self.message_history: list[Message] = []
-        
-        # Message Queue (sequential processing)
-        self.message_queue = asyncio.Queue()
-        self.is_processing = False
+    def __init__(self, session: ChatSession, storage: ChatStorage, message_index=None):
+        # Per-client state (model selection, history, queue); providers are shared (core/session.py)
+        self.session = session
+        self.llm_manager = session.llm
+        
+        # Persistence (shared backend, see storage/base.py)
+        self.storage = storage
+        self.message_index = message_index  # Shared across pages, None = semantic search off
+        self.summarizer = ConversationSummarizer(self.llm_manager, self.storage)
+        self.history_loaded = 0  # Chats shown in the sidebar (refresh keeps pages loaded via "Load more")
+        self.history_cursor = None
         
         # Components
         self.sidebar = Sidebar(
-            llm_manager,
+            self.llm_manager,
             self.handle_model_change,
             on_new_chat=self.handle_new_chat,
-            on_load_chat=self.handle_load_chat
+            on_load_chat=self.handle_load_chat,
+            show_related=message_index is not None,
+            on_load_more_history=self.load_more_history
         )
         self.chat_view = ChatView()
         self.input_area = InputArea(self.handle_input_submit)
@@ -52,59 +57,87 @@ class AppLayout:
                 # Input Area
                 self.input_area.build()
         
-        # Start queue worker
-        asyncio.create_task(self._queue_worker())
+        # Start queue worker (cancelled when the session closes)
+        self.session.start_task(self._queue_worker())
     
     async def initialize_async(self):
         """Initialize async components"""
         await self.sidebar.load_models()
-        self.refresh_history_list()
+        await self.refresh_history_list()
     
     async def _queue_worker(self):
         """Sequential message processor"""
         while True:
-            prompt = await self.message_queue.get()
+            prompt = await self.session.queue.get()
             try:
                 await self.run_chat_flow(prompt)
             except Exception as e:
                 print(f"Queue error: {e}")
                 # Cannot use ui.notify in background task - just log
             finally:
-                self.message_queue.task_done()
+                self.session.queue.task_done()
     
-    def refresh_history_list(self):
-        """Refresh chat history sidebar"""
-        conversations = self.db.get_conversations()
-        self.sidebar.update_history_list(conversations)
+    async def refresh_history_list(self):
+        """Refresh chat history sidebar (one query incl. previews, see storage/base.py)"""
+        page = await self.storage.list_conversations(limit=max(self.history_loaded, HISTORY_PAGE_SIZE))
+        self.history_loaded = len(page['conversations'])
+        self.history_cursor = page['next_cursor']
+        self.sidebar.update_history_list(page['conversations'], has_more=self.history_cursor is not None)
+    
+    async def load_more_history(self):
+        """Next page of the chat history"""
+        if self.history_cursor is None:
+            return
+        page = await self.storage.list_conversations(limit=HISTORY_PAGE_SIZE, cursor=self.history_cursor)
+        self.history_loaded += len(page['conversations'])
+        self.history_cursor = page['next_cursor']
+        self.sidebar.append_history_list(page['conversations'], has_more=self.history_cursor is not None)
     
     def handle_new_chat(self):
         """Start a new chat"""
-        self.current_conversation_id = None
-        self.message_history = []
+        self.session.reset()
         self.chat_view.clear()
+        self.sidebar.update_related_list([])
         print('New chat started')
     
-    def handle_load_chat(self, conversation_id):
+    async def handle_load_chat(self, conversation_id):
         """Load existing chat from history"""
-        if self.current_conversation_id == conversation_id:
+        if self.session.conversation_id == conversation_id:
             return
         
-        self.current_conversation_id = conversation_id
-        self.message_history = self.db.load_messages(conversation_id)
+        self.session.conversation_id = conversation_id
+        self.session.message_history = await self.storage.load_messages(conversation_id)
+        self.session.summary = await self.storage.load_summary(conversation_id)
         
         self.chat_view.clear()
-        for msg in self.message_history:
+        for msg in self.session.message_history:
             self.chat_view.add_message(msg)
         
+        self.session.start_task(self.refresh_related())
         print('Chat loaded')
     
+    async def refresh_related(self):
+        """Update the sidebar's "related conversations" for the open chat"""
+        conversation_id = self.session.conversation_id
+        if not conversation_id or self.message_index is None:
+            return
+        if self.message_index.pending:
+            await self.message_index.flush()  # Include the messages just sent
+        try:
+            related = await self.message_index.related_conversations(conversation_id)
+        except Exception as e:
+            print(f"Related conversations error: {e}")
+            return
+        if conversation_id == self.session.conversation_id:
+            self.sidebar.update_related_list(related)
+    
     def handle_model_change(self, status_text):
         """Handle model selection change"""
         print(f"Model changed: {status_text}")
     
     async def handle_input_submit(self, text):
         """Queue message for processing"""
-        await self.message_queue.put(text)
+        await self.session.queue.put(text)
     
     async def run_chat_flow(self, text):
         """Process chat message with streaming"""
@@ -114,35 +147,47 @@ class AppLayout:
         self.input_area.disable()
         
         # Ensure Conversation ID
-        if not self.current_conversation_id:
-            self.current_conversation_id = str(uuid.uuid4())
+        if not self.session.conversation_id:
+            self.session.conversation_id = str(uuid.uuid4())
             title = text[:30] + '...' if len(text) > 30 else text
-            self.db.create_conversation(
-                self.current_conversation_id,
+            await self.storage.create_conversation(
+                self.session.conversation_id,
                 title=title,
                 provider_id=self.llm_manager.active_provider_id,
                 model_id=self.llm_manager.active_model_id
             )
-            self.refresh_history_list()
+            await self.refresh_history_list()
         
         # 1. User Message
         user_msg = Message(role=Role.USER, content=text)
-        self.message_history.append(user_msg)
+        self.llm_manager.count_tokens(user_msg)  # Cached in metadata -> persisted with the message
+        self.session.message_history.append(user_msg)
         self.chat_view.add_message(user_msg)
-        self.db.save_message(self.current_conversation_id, user_msg)
+        await self.storage.save_message(self.session.conversation_id, user_msg)
         
         # 2. Assistant Message Placeholder
         assistant_msg = Message(role=Role.ASSISTANT, content='')
         self.chat_view.add_message(assistant_msg)
-        self.message_history.append(assistant_msg)
+        self.session.message_history.append(assistant_msg)
         
-        # 3. Stream Response
+        # 3. Stream Response (partial reply is checkpointed, survives a crash or closed tab)
         current_content = ''
+        checkpoint = ReplyCheckpoint(
+            self.storage, self.session.conversation_id, assistant_msg,
+            interval_ms=float(UserConfig.get('checkpoint_interval_ms', DEFAULT_CHECKPOINT_MS)),
+            every_chars=int(UserConfig.get('checkpoint_chars', DEFAULT_CHECKPOINT_CHARS))
+        )
         
         try:
-            async for chunk in self.llm_manager.stream_chat(self.message_history[:-1]):
+            request = self.summarizer.compose(self.session.message_history[:-1], self.session.summary)
+            async for chunk in self.llm_manager.stream_chat(request, metadata=assistant_msg.metadata, use_cache=True):
                 current_content += chunk
                 self.chat_view.update_last_message(current_content)
+                checkpoint.update(current_content)
+        except asyncio.CancelledError:
+            # Session closed mid-answer: keep what arrived, marked as interrupted
+            await asyncio.shield(checkpoint.finish(current_content, interrupted=True))
+            raise
         except Exception as e:
             current_content += f'\n\n[Error: {str(e)}]'
             self.chat_view.update_last_message(current_content)
@@ -150,9 +195,29 @@ class AppLayout:
         
         # Update final content
         assistant_msg.content = current_content
-        self.db.save_message(self.current_conversation_id, assistant_msg)
+        suggestion = assistant_msg.metadata.get('cache_suggestion')
+        if suggestion:
+            ui.notify(f"Similar question answered before ({suggestion['similarity']:.0%}): "
+                      f"\"{suggestion['prompt'][:60]}\"", type='info')
+        self.llm_manager.count_tokens(assistant_msg)
+        await checkpoint.finish()
         
         # Refresh history list (for timestamp update)
-        self.refresh_history_list()
+        await self.refresh_history_list()
+        self.session.start_task(self.refresh_related())
         
         self.input_area.enable()
+        
+        # Fold older turns into the summary in the background (doesn't block the next prompt)
+        if self.summarizer.enabled:
+            self.session.start_task(self._update_summary(self.session.conversation_id, list(self.session.message_history)))
+    
+    async def _update_summary(self, conversation_id, history):
+        """Background: refresh the rolling summary, apply it if the chat is still open"""
+        try:
+            new_summary = await self.summarizer.maybe_summarize(conversation_id, history, self.session.summary)
+        except Exception as e:
+            print(f"Summary error: {e}")
+            return
+        if new_summary and conversation_id == self.session.conversation_id:
+            self.session.summary = new_summary
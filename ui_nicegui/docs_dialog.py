@@ -1,13 +1,15 @@
 
+import html
 from nicegui import ui
-from core.docs_manager import DocsManager
+from core.docs_manager import get_docs_manager
 
 class DocsDialog:
     def __init__(self):
-        self.manager = DocsManager()
+        self.manager = get_docs_manager()  # Shared + cached, only reloads changed files
         self.dialog = None
-        self.content_markdown = None
+        self.content_html = None
         self.nav_column = None
+        self._last_query = None
         
     def show(self):
         """Show the documentation dialog"""
@@ -23,6 +25,7 @@ class DocsDialog:
                     ui.label('Y.A.T. Knowledge Base').classes('text-lg font-bold text-white')
                 
                 with ui.row().classes('items-center gap-2'):
+                    # debounce=300: the browser only sends the value after a typing pause
                     ui.input(placeholder='Search docs...', on_change=self._handle_search).props(
                         'dense outlined rounded debounce=300'
                     ).classes('w-64').style('background-color: var(--bg-primary);')
@@ -39,7 +42,7 @@ class DocsDialog:
                 # RIGHT: Content
                 with splitter.after:
                     with ui.column().classes('w-full h-full p-8 overflow-y-auto').style('background-color: var(--bg-primary);'):
-                        self.content_markdown = ui.markdown().classes('w-full prose prose-invert prose-blue max-w-none')
+                        self.content_html = ui.html('').classes('w-full prose prose-invert prose-blue max-w-none')
             
         self.dialog.open()
         # Load README by default
@@ -58,8 +61,15 @@ class DocsDialog:
                 ).classes('w-full text-left text-gray-300 hover:bg-gray-800 rounded-md px-3 py-2 text-sm')
 
     def _handle_search(self, e):
-        """Handle search input"""
-        query = e.value
+        """Handle search input (already debounced client-side)"""
+        query = e.value or ''
+        if query == self._last_query:
+            return
+        self._last_query = query
+        self._render_results(query)
+
+    def _render_results(self, query):
+        """Render search results (or the file list for an empty query)"""
         self.nav_column.clear()
         
         if not query:
@@ -89,7 +99,11 @@ class DocsDialog:
                                  ui.label(f"...{m['content']}...").classes('text-xs text-gray-500 truncate w-full')
 
     def _load_doc(self, filename):
-        """Load content into markdown area"""
-        content = self.manager.get_doc_content(filename)
-        if content:
-            self.content_markdown.set_content(content)
+        """Show the pre-rendered (cached) HTML of a document"""
+        rendered = self.manager.get_doc_html(filename)
+        if rendered is None:
+            content = self.manager.get_doc_content(filename)
+            if not content:
+                return
+            rendered = f"<pre>{html.escape(content)}</pre>"  # markdown2 missing - show raw text
+        self.content_html.set_content(rendered)
@@ -5,16 +5,17 @@ Comprehensive provider management interface
 from nicegui import ui
 import os
 from pathlib import Path
-from core.provider_config_manager import ProviderConfigManager
+from core.provider_config_manager import get_provider_config_manager
 
 
 class ProviderSettingsDialog:
     def __init__(self, llm_manager=None, sidebar=None):
         self.dialog = None
-        self.config_manager = ProviderConfigManager()
+        self.config_manager = get_provider_config_manager()
         self.llm_manager = llm_manager
         self.sidebar = sidebar
         self.provider_inputs = {}
+        self.provider_cards = {}  # provider_id -> container, re-rendered one by one on changes
         self.pending_active_provider = None  # Staged change until Save
         
     def show(self, initial_tab='providers'):
@@ -117,6 +118,9 @@ class ProviderSettingsDialog:
             # Set initial state
             footer_row.visible = (tabs.value == provider_tab)
         
+        # Live updates while open (also for changes made in another window)
+        self.config_manager.subscribe(self._on_provider_config_change)
+        self.dialog.on('hide', lambda: self.config_manager.unsubscribe(self._on_provider_config_change))
         self.dialog.open()
         
         # Auto-scroll to active provider
@@ -130,16 +134,43 @@ class ProviderSettingsDialog:
     def _render_provider_list(self):
         """Render provider cards (can be called to refresh)"""
         self.provider_list_container.clear()
+        self.provider_cards = {}
         
         with self.provider_list_container:
-            if self.llm_manager:
-                loaded_provider_ids = list(self.llm_manager.providers.keys())
-                for provider in self.config_manager.get_all_providers():
-                    if provider.id in loaded_provider_ids:
-                        self._build_provider_card(provider)
-            else:
-                for provider in self.config_manager.get_all_providers():
-                    self._build_provider_card(provider)
+            for provider in self.config_manager.get_all_providers():
+                if self.llm_manager and provider.id not in self.llm_manager.providers:
+                    continue
+                self.provider_cards[provider.id] = ui.column().classes('w-full gap-0')
+                self._render_provider_card(provider.id)
+    
+    def _render_provider_card(self, provider_id: str):
+        """Rebuild a single provider card (typed but unsaved values are kept)"""
+        container = self.provider_cards.get(provider_id)
+        provider = self.config_manager.get_provider(provider_id)
+        if container is None or provider is None:
+            return
+        self._capture_inputs()
+        for key in [k for k in self.provider_inputs if k.startswith(f"{provider_id}_")]:
+            del self.provider_inputs[key]
+        container.clear()
+        with container:
+            self._build_provider_card(provider)
+    
+    def _on_provider_config_change(self, event):
+        """ProviderConfigManager listener: only the affected card is re-rendered"""
+        self._render_provider_card(event.provider_id)
+    
+    def _capture_inputs(self):
+        """Remember current input values so a re-render doesn't lose what the user typed"""
+        if not hasattr(self, 'temp_input_values'):
+            self.temp_input_values = {}
+        
+        for key, widget in self.provider_inputs.items():
+            # For booleans/switches, value is boolean. For inputs, it's string.
+            val = widget.value
+            if isinstance(val, bool):
+                 val = 'true' if val else 'false'
+            self.temp_input_values[key] = val
     
     def _build_provider_card(self, provider):
         """Build a card for a single provider"""
@@ -257,20 +288,12 @@ class ProviderSettingsDialog:
     
     def _activate_provider(self, provider_id: str):
         """Stage provider activation (applied on Save)"""
-        # 1. PRESERVE STATE: Capture all current input values before destroying them
-        if not hasattr(self, 'temp_input_values'):
-            self.temp_input_values = {}
-        
-        for key, widget in self.provider_inputs.items():
-            # For booleans/switches, value is boolean. For inputs, it's string.
-            val = widget.value
-            if isinstance(val, bool):
-                 val = 'true' if val else 'false'
-            self.temp_input_values[key] = val
-            
+        previous = self.pending_active_provider or (self.llm_manager and self.llm_manager.active_provider_id)
         self.pending_active_provider = provider_id
-        # Refresh UI to show checked radio button
-        self._render_provider_list()
+        # Refresh only the two cards whose radio button changed
+        if previous and previous != provider_id:
+            self._render_provider_card(previous)
+        self._render_provider_card(provider_id)
     
     def _toggle_provider(self, provider_id: str, enabled: bool):
         """Toggle provider enabled/disabled"""
@@ -278,14 +301,13 @@ class ProviderSettingsDialog:
             self.config_manager.enable_provider(provider_id)
         else:
             self.config_manager.disable_provider(provider_id)
-        
-        # Refresh dialog
-        self.dialog.close()
-        self.show()
+        # The card is re-rendered by _on_provider_config_change
     
     def _save_settings(self):
         """Save all provider settings"""
-        # Update environment variables and configs
+        # Update environment variables and configs (collected per provider: one write each)
+        config_updates = {}
+        changed_keys = set()  # Providers whose API key was set, changed or removed
         for input_key, input_widget in self.provider_inputs.items():
             provider_id, setting_key = input_key.split('_', 1)
             
@@ -310,6 +332,8 @@ class ProviderSettingsDialog:
             # Save to environment if has env_var (API keys)
             if setting_def.get('env_var'):
                 print(f"DEBUG: Saving {setting_def['env_var']} = '{value}' (Length: {len(value)})")
+                if (os.environ.get(setting_def['env_var']) or '') != (value or ''):
+                    changed_keys.add(provider_id)
                 if value:
                     os.environ[setting_def['env_var']] = value
                     self._update_env_file(setting_def['env_var'], value)
@@ -321,11 +345,16 @@ class ProviderSettingsDialog:
             
             # Update provider config ONLY for non-API-key settings
             # API keys should NEVER be in provider_config.json
+            updates = config_updates.setdefault(provider_id, {})
             if setting_key != 'api_key':
-                self.config_manager.update_provider_config(
-                    provider_id,
-                    {setting_key: value}
-                )
+                updates[setting_key] = value
+        
+        # Unchanged values are no-ops; the status is re-checked for new/removed keys
+        for provider_id, updates in config_updates.items():
+            self.config_manager.update_provider_config(provider_id, updates)
+        # New clients for changed keys / base URLs are built and swapped in by the LLMManager listener
+        for provider_id in changed_keys:
+            self.config_manager.api_key_changed(provider_id)
         
         # Apply pending provider activation immediately so re-init knows what's active
         if self.pending_active_provider and self.llm_manager:
@@ -341,21 +370,18 @@ class ProviderSettingsDialog:
             import asyncio
             async def reinit_sequence():
                 print(">>> DEBUG: reinit_sequence STARTED")
-                # 1. Re-initialize ACTIVE provider first
+                # 1. Wait until the ACTIVE provider runs with the new key / base URL
+                #    (rebuilt and hot-swapped by LLMManager.on_provider_config_change)
                 active_pid = self.llm_manager.active_provider_id
-                if active_pid and active_pid in self.llm_manager.providers:
-                    try:
-                        await self.llm_manager.providers[active_pid].initialize()
-                        print(f"[OK] Re-initialized (ACTIVE): {active_pid}")
-                    except Exception as e:
-                        print(f"[ERR] Re-init failed (ACTIVE): {active_pid}: {e}")
+                if active_pid:
+                    await self.llm_manager.wait_for_rebuild(active_pid)
 
                 # 2. If we just switched provider, load its models and select default
                 if self.pending_active_provider:
                      provider_instance = self.llm_manager.providers.get(self.pending_active_provider)
                      if provider_instance:
                         try:
-                            models = await provider_instance.get_available_models()
+                            models = [m for m in await provider_instance.get_available_models() if m.is_chat_model]
                             if not models:
                                 raise ValueError("No models returned by provider. Please check API Key/Settings.")
                             
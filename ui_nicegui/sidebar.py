@@ -2,24 +2,36 @@
 Sidebar component for NiceGUI
 Model selection, chat history, and controls
 """
+import asyncio
 from nicegui import ui
 from core.llm_manager import LLMManager
+from core.provider_config_manager import get_provider_config_manager
 from core.user_config import UserConfig
 
 
 class Sidebar:
-    def __init__(self, llm_manager: LLMManager, on_model_change, on_new_chat=None, on_load_chat=None):
+    def __init__(self, llm_manager: LLMManager, on_model_change, on_new_chat=None, on_load_chat=None, show_related=False,
+                 on_load_more_history=None):
         self.llm_manager = llm_manager
         self.on_model_change = on_model_change
         self.on_new_chat = on_new_chat
         self.on_load_chat = on_load_chat
+        self.on_load_more_history = on_load_more_history
+        self.show_related = show_related
         
         self.model_select = None
         self.history_container = None
+        self.load_more_button = None
+        self.related_container = None
         self.status_container = None
         
     def build(self):
         """Build the sidebar UI with professional dark theme"""
+        # Provider changes (from any client's settings dialog) update this sidebar in place
+        config_manager = get_provider_config_manager()
+        config_manager.subscribe(self._on_provider_config_change)
+        ui.context.client.on_disconnect(lambda: config_manager.unsubscribe(self._on_provider_config_change))
+        
         with ui.column().classes('w-72 h-screen p-5 gap-4').style(
             'background-color: var(--bg-secondary); border-right: 1px solid var(--border-color);'
         ):
@@ -76,6 +88,13 @@ class Sidebar:
                 with ui.column().classes('w-full flex-1 overflow-y-auto overflow-x-hidden justify-start p-2 gap-2') as history_col:
                     self.history_container = history_col
                     ui.label('No chats yet').classes('text-sm italic text-gray-500 p-2')
+            
+            # Related Conversations (semantic search over past chats)
+            if self.show_related:
+                with ui.expansion('Related', icon='hub', value=True).classes('w-full text-sm text-gray-300').props('dense'):
+                    with ui.column().classes('w-full max-h-48 overflow-y-auto overflow-x-hidden gap-1') as related_col:
+                        self.related_container = related_col
+                        ui.label('Open a chat to see related ones').classes('text-xs italic text-gray-500 p-1')
         
             ui.separator().classes('bg-gray-700 mt-2')
             
@@ -124,6 +143,15 @@ class Sidebar:
 
 
     
+    def _on_provider_config_change(self, event):
+        """Only the active provider is shown: its status badge, or its models if it was (en/dis)abled"""
+        if event.provider_id != self.llm_manager.active_provider_id or self.model_select is None:
+            return
+        if event.kind in ('enabled', 'disabled'):
+            asyncio.create_task(self.load_models())
+        else:
+            self.update_provider_status()
+    
     async def _refresh_models(self):
         """Refresh models from all providers"""
         await self.load_models()
@@ -133,10 +161,12 @@ class Sidebar:
         if self.on_new_chat:
             self.on_new_chat()
     
-    def _handle_load_chat(self, conversation_id):
+    async def _handle_load_chat(self, conversation_id):
         """Handle chat load from history"""
         if self.on_load_chat:
-            self.on_load_chat(conversation_id)
+            result = self.on_load_chat(conversation_id)
+            if asyncio.iscoroutine(result):
+                await result
     
     def _handle_model_change(self, e):
         """Handle model selection change"""
@@ -152,6 +182,9 @@ class Sidebar:
             # Persist selection
             UserConfig.save('last_model', value)
             
+            # Warm the model now (e.g. Ollama loads it into memory) instead of on the first prompt
+            self.llm_manager.schedule_preload(pid, mid)
+            
             if self.on_model_change:
                 self.on_model_change(f'Switched to {mid}')
         except (ValueError, AttributeError) as err:
@@ -180,8 +213,43 @@ class Sidebar:
         self.model_select.update()
         
         
-        # Update Active Provider Status Badge
+        if not self.update_provider_status():
+            return  # No plugins at all
+        
+        # Smart default selection
+        # Respect the managers active provider (which was set by main.py from config)
+        saved_model = UserConfig.get('last_model')
+        current_manager_provider = self.llm_manager.active_provider_id
+        
+        target_value = None
+        
+        # 1. Try saved model ONLY if it matches active provider
+        if saved_model and saved_model in options and saved_model.startswith(current_manager_provider + '|'):
+             target_value = saved_model
         
+        # 2. Else use current selection from Manager (which main.py set up)
+        elif f"{current_manager_provider}|{self.llm_manager.active_model_id}" in options:
+             target_value = f"{current_manager_provider}|{self.llm_manager.active_model_id}"
+             
+        # 3. Fallback: First model of active provider
+        if not target_value:
+             provider_options = [k for k in options.keys() if k.startswith(current_manager_provider + '|')]
+             if provider_options:
+                 target_value = provider_options[0]
+        
+        # 4. Ultimate Fallback
+        if not target_value and options:
+            target_value = list(options.keys())[0]
+
+        if target_value:
+            self.model_select.value = target_value
+            # Do NOT trigger on_change if we are just restoring state to avoid loops
+            # self._handle_model_change(None) 
+            # We just set the UI to match the internal state
+            pass
+    
+    def update_provider_status(self) -> bool:
+        """Update the active provider badge + error box. Returns False if no plugins are loaded."""
         # CRITICAL: Check if NO plugins loaded (system broken)
         if len(self.llm_manager.providers) == 0:
             from core.paths import get_data_path
@@ -196,7 +264,7 @@ class Sidebar:
             print(f"CRITICAL: No provider plugins loaded!")
             print(f"Debug log: {debug_log}")
             print(f"{'='*60}\n")
-            return
+            return False
         
         active_provider = self.llm_manager.providers.get(self.llm_manager.active_provider_id)
         if active_provider:
@@ -257,62 +325,81 @@ class Sidebar:
                         )
         
         self.status_container.visible = has_errors
+        return True
+    
+    def update_related_list(self, related):
+        """Show conversations similar to the open one (title + matching snippet)"""
+        if self.related_container is None:
+            return
+        self.related_container.clear()
         
-        # Smart default selection
-        # Respect the managers active provider (which was set by main.py from config)
-        saved_model = UserConfig.get('last_model')
-        current_manager_provider = self.llm_manager.active_provider_id
-        
-        target_value = None
-        
-        # 1. Try saved model ONLY if it matches active provider
-        if saved_model and saved_model in options and saved_model.startswith(current_manager_provider + '|'):
-             target_value = saved_model
-        
-        # 2. Else use current selection from Manager (which main.py set up)
-        elif f"{current_manager_provider}|{self.llm_manager.active_model_id}" in options:
-             target_value = f"{current_manager_provider}|{self.llm_manager.active_model_id}"
-             
-        # 3. Fallback: First model of active provider
-        if not target_value:
-             provider_options = [k for k in options.keys() if k.startswith(current_manager_provider + '|')]
-             if provider_options:
-                 target_value = provider_options[0]
-        
-        # 4. Ultimate Fallback
-        if not target_value and options:
-            target_value = list(options.keys())[0]
-
-        if target_value:
-            self.model_select.value = target_value
-            # Do NOT trigger on_change if we are just restoring state to avoid loops
-            # self._handle_model_change(None) 
-            # We just set the UI to match the internal state
-            pass
+        with self.related_container:
+            if not related:
+                ui.label('Nothing related found').classes('text-xs italic text-gray-500 p-1')
+                return
+            for conv in related:
+                conv_id = conv['id']
+                with ui.column().classes('w-full p-2 gap-0 cursor-pointer rounded').style(
+                    'background-color: var(--bg-accent); border: 1px solid var(--border-color);'
+                ).on('click', lambda cid=conv_id: self._handle_load_chat(cid)):
+                    with ui.row().classes('w-full justify-between items-center no-wrap'):
+                        ui.label(conv['title']).classes('text-xs font-medium text-gray-200 truncate')
+                        ui.label(f"{conv['score']:.0%}").classes('text-[10px] text-gray-500')
+                    ui.label(conv['snippet']).classes('text-[10px] text-gray-500 truncate w-full')
     
-    def update_history_list(self, conversations):
+    def update_history_list(self, conversations, has_more=False):
         """Update chat history list with modern card design"""
         self.history_container.clear()
+        self.load_more_button = None
         
         if not conversations:
             with self.history_container:
                 ui.label('No chats yet').classes('text-sm italic text-gray-500 p-2')
         else:
-            with self.history_container:
-                for conv in conversations:
-                    conv_id = conv['id']
-                    with ui.card().classes('w-full p-3 cursor-pointer transition-all').style(
-                        'background-color: var(--bg-secondary); border: 1px solid var(--border-color);'
-                        'transition: all 0.2s ease;'
-                    ).on('click', lambda cid=conv_id: self._handle_load_chat(cid)):
-                        # Add hover effect via inline style
-                        ui.add_head_html("""
-                        <style>
-                        .nicegui-content .q-card:hover {
-                            background-color: var(--bg-accent) !important;
-                            border-color: var(--accent-color) !important;
-                        }
-                        </style>
-                        """)
-                        ui.label(conv['title']).classes('text-sm font-medium text-gray-200 truncate')
-                        ui.label(conv['updated_at'][:10]).classes('text-xs text-gray-500 mt-1')
+            self.append_history_list(conversations, has_more)
+    
+    def append_history_list(self, conversations, has_more=False):
+        """Append the next page of chats below the loaded ones"""
+        if self.load_more_button is not None:
+            self.load_more_button.delete()
+            self.load_more_button = None
+        
+        with self.history_container:
+            for conv in conversations:
+                self._render_history_card(conv)
+            if has_more and self.on_load_more_history:
+                self.load_more_button = ui.button(
+                    'Load more',
+                    icon='expand_more',
+                    on_click=self._handle_load_more_history
+                ).props('flat dense size=sm color=blue-4').classes('w-full')
+    
+    async def _handle_load_more_history(self):
+        result = self.on_load_more_history()
+        if asyncio.iscoroutine(result):
+            await result
+    
+    def _render_history_card(self, conv):
+        conv_id = conv['id']
+        with ui.card().classes('w-full p-3 cursor-pointer transition-all').style(
+            'background-color: var(--bg-secondary); border: 1px solid var(--border-color);'
+            'transition: all 0.2s ease;'
+        ).on('click', lambda cid=conv_id: self._handle_load_chat(cid)):
+            # Add hover effect via inline style
+            ui.add_head_html("""
+            <style>
+            .nicegui-content .q-card:hover {
+                background-color: var(--bg-accent) !important;
+                border-color: var(--accent-color) !important;
+            }
+            </style>
+            """)
+            ui.label(conv['title']).classes('text-sm font-medium text-gray-200 truncate')
+            if conv.get('preview'):
+                ui.label(conv['preview']).classes('text-xs text-gray-400 truncate w-full')
+            details = conv['updated_at'][:10]
+            if conv.get('message_count'):
+                details += f" · {conv['message_count']} msgs"
+            if conv.get('token_count'):
+                details += f" · {conv['token_count']:,} tokens"
+            ui.label(details).classes('text-xs text-gray-500 mt-1')